@@ -0,0 +1,93 @@
+"""
+Benchmark: charts/second and peak RSS for rendering many symbols.
+
+    python benchmarks/bench_batch_render.py --symbols 500 --mode batch
+    python benchmarks/bench_batch_render.py --symbols 500 --mode serial
+
+Run each mode in its own process so the peak RSS numbers are not mixed.
+Peak RSS uses the `resource` module and is reported as None on Windows.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from candlestick_chart_generator import generate_candlestick_image, generate_candlestick_images
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def make_frame(seed: int, bars: int = 250) -> pd.DataFrame:
+    """Random-walk OHLCV with the MA columns the generator expects (newest first)."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    open_ = close * (1 + rng.normal(0, 0.005, bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, bars)))
+    df = pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close,
+        'Volume': rng.integers(100_000, 5_000_000, bars),
+    }, index=pd.bdate_range(end='2024-12-31', periods=bars))
+    for n in (20, 50, 200):
+        df[f'Close_MA{n}'] = df['Close'].rolling(n, min_periods=1).mean()
+    return df.iloc[::-1]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {'self': round(own, 1), 'largest_child': round(children, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=250)
+    parser.add_argument('--mode', choices=['batch', 'serial'], default='batch')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', help='Write the result as JSON to this path')
+    args = parser.parse_args()
+
+    frames = {f'SYM{i:04d}': make_frame(i, args.bars) for i in range(args.symbols)}
+
+    start = time.perf_counter()
+    if args.mode == 'batch':
+        results = generate_candlestick_images(frames, max_workers=args.workers)
+        rendered = sum(1 for png in results.values() if png)
+    else:
+        rendered = 0
+        for df in frames.values():
+            if generate_candlestick_image(df) is not None:
+                rendered += 1
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'mode': args.mode,
+        'symbols': args.symbols,
+        'bars': args.bars,
+        'workers': args.workers or os.cpu_count(),
+        'rendered': rendered,
+        'seconds': round(elapsed, 2),
+        'charts_per_second': round(rendered / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
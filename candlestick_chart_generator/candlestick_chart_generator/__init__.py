@@ -1 +1 @@
-from .generator import generate_candlestick_image
+from .generator import generate_candlestick_image, generate_candlestick_images
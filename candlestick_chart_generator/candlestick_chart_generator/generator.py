@@ -1,25 +1,30 @@
 import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
 import mplfinance as mpf
 import io
-
-def generate_candlestick_image(df: pd.DataFrame, figsize= None, datetime_format=''):
-    """
-    Generates a candlestick chart with volume and moving averages.
-
-    Args:
-        df: Pandas DataFrame with DatetimeIndex (newest first) and columns:
-            'Open', 'Close', 'Low', 'High', 'Volume',
-            'Close_MA20', 'Close_MA50', 'Close_MA200'.
-
-    Returns:
-        io.BytesIO: An in-memory bytes buffer containing the chart image (PNG format),
-                    suitable for use with openpyxl.drawing.image.Image.
-                    Returns None if the DataFrame is empty or lacks required columns.
-    """
-    required_columns = ['Open', 'High', 'Low', 'Close', 'Volume', 'Close_MA20', 'Close_MA50', 'Close_MA200']
-    if not all(col in df.columns for col in required_columns):
+import os
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+REQUIRED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Close_MA20', 'Close_MA50', 'Close_MA200']
+
+# Style is immutable once built, so build it once per process instead of per chart.
+_STYLE = None
+
+def _get_style():
+    global _STYLE
+    if _STYLE is None:
+        mc = mpf.make_marketcolors(up='red', down='blue', inherit=True)
+        _STYLE = mpf.make_mpf_style(base_mpf_style="yahoo", marketcolors=mc)
+    return _STYLE
+
+def _prepare_frame(df: pd.DataFrame):
+    """Validates the DataFrame and returns it oldest-first, or None if it cannot be plotted."""
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
         # Consider logging a warning or raising a more specific error
-        print(f"DataFrame missing one or more required columns: {required_columns}")
+        print(f"DataFrame missing one or more required columns: {REQUIRED_COLUMNS}")
         return None
 
     if df.empty:
@@ -38,7 +43,10 @@ def generate_candlestick_image(df: pd.DataFrame, figsize= None, datetime_format=
     # The problem description states "newest date first", so we need to check and potentially reverse.
     if df.index[0] > df.index[-1]: # Newest date is at the start
         df = df.iloc[::-1] # Reverse the DataFrame
+    return df
 
+def _render_png(df: pd.DataFrame, datetime_format='') -> bytes:
+    """Renders a prepared (oldest-first) DataFrame to PNG bytes and closes the figure."""
     # Define moving average plots
     ma_plots = [
         mpf.make_addplot(df['Close_MA20'], color='red', width=0.7),
@@ -46,20 +54,13 @@ def generate_candlestick_image(df: pd.DataFrame, figsize= None, datetime_format=
         mpf.make_addplot(df['Close_MA200'], color='blue', width=0.7),
     ]
 
-    if not figsize:
-        figsize = (6, 3)
-
-    mc = mpf.make_marketcolors(up='red', down='blue', inherit=True)
-    cs  = mpf.make_mpf_style(base_mpf_style="yahoo", marketcolors=mc)
     # Create the plot
     # The 'volume=True' argument automatically adds a volume subplot.
-    # 'style='yahoo'' is a common style for financial charts.
-    # 'figsize' can be adjusted as needed.
     # 'mav' tuple for mplfinance internal MA calculation is removed as we are providing MAs.
     fig, axes = mpf.plot(
         df,
         type='candle',
-        style= cs,
+        style=_get_style(),
 #        style='yahoo',
 #        title='Candlestick Chart',
         ylabel='',
@@ -69,14 +70,85 @@ def generate_candlestick_image(df: pd.DataFrame, figsize= None, datetime_format=
         figsize=(4, 2), # Adjust figure size as needed
         returnfig=True # Returns the figure and axes objects
     )
+    try:
+        # Save the plot to an in-memory buffer
+        image_stream = io.BytesIO()
+        fig.savefig(image_stream, format='png')
+        return image_stream.getvalue()
+    finally:
+        # pyplot keeps every figure alive until it is closed; without this a loop leaks memory
+        plt.close(fig)
+
+def generate_candlestick_image(df: pd.DataFrame, figsize= None, datetime_format=''):
+    """
+    Generates a candlestick chart with volume and moving averages.
+
+    Args:
+        df: Pandas DataFrame with DatetimeIndex (newest first) and columns:
+            'Open', 'Close', 'Low', 'High', 'Volume',
+            'Close_MA20', 'Close_MA50', 'Close_MA200'.
 
-    # Save the plot to an in-memory buffer
-    image_stream = io.BytesIO()
-    fig.savefig(image_stream, format='png')
+    Returns:
+        io.BytesIO: An in-memory bytes buffer containing the chart image (PNG format),
+                    suitable for use with openpyxl.drawing.image.Image.
+                    Returns None if the DataFrame is empty or lacks required columns.
+    """
+    df = _prepare_frame(df)
+    if df is None:
+        return None
+
+    image_stream = io.BytesIO(_render_png(df, datetime_format))
     image_stream.seek(0) # Rewind the stream to the beginning
-    
     return image_stream
 
+def _init_worker():
+    # Each worker renders off-screen with Agg and builds the style once
+    matplotlib.use('Agg')
+    _get_style()
+
+def _render_one(df: pd.DataFrame, datetime_format=''):
+    try:
+        df = _prepare_frame(df)
+        if df is None:
+            return None
+        return _render_png(df, datetime_format)
+    except Exception as e:
+        print(f"Failed to render chart: {e}")
+        return None
+
+def generate_candlestick_images(frames, datetime_format='', max_workers=None, chunksize=4):
+    """
+    Renders many candlestick charts across a process pool.
+
+    Args:
+        frames: Mapping of key (e.g. symbol) -> DataFrame, or a list of DataFrames,
+                in the same format generate_candlestick_image accepts.
+        datetime_format: Passed through to mplfinance.
+        max_workers: Number of worker processes. Defaults to the CPU count;
+                     1 renders in the calling process.
+        chunksize: Frames sent to a worker per task.
+
+    Returns:
+        dict or list: PNG bytes per input frame (same keys/order as `frames`),
+                      None for frames that could not be plotted.
+                      Wrap a value in io.BytesIO for openpyxl.drawing.image.Image.
+    """
+    is_mapping = isinstance(frames, Mapping)
+    keys = list(frames.keys()) if is_mapping else None
+    dfs = list(frames.values()) if is_mapping else list(frames)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(dfs)))
+
+    if max_workers == 1:
+        results = [_render_one(df, datetime_format) for df in dfs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            results = list(executor.map(_render_one, dfs, repeat(datetime_format), chunksize=max(1, chunksize)))
+
+    return dict(zip(keys, results)) if is_mapping else results
+
 if __name__ == '__main__':
     # Create a sample DataFrame for testing
     data = {
@@ -103,7 +175,7 @@ if __name__ == '__main__':
         image_bytes_io.seek(0) # Reset stream position if you need to read it again
 
     # Test with empty DataFrame
-    empty_df = pd.DataFrame(columns=required_columns)
+    empty_df = pd.DataFrame(columns=REQUIRED_COLUMNS)
     empty_df.index = pd.to_datetime(empty_df.index)
     print(f"Test with empty DataFrame: {generate_candlestick_image(empty_df)}")
 
@@ -1,7 +1,8 @@
 import unittest
 import pandas as pd
 import io
-from candlestick_chart_generator import generate_candlestick_image # Updated import
+import matplotlib.pyplot as plt
+from candlestick_chart_generator import generate_candlestick_image, generate_candlestick_images # Updated import
 
 class TestGenerator(unittest.TestCase):
 
@@ -84,6 +85,31 @@ class TestGenerator(unittest.TestCase):
         image_stream_oldest = generate_candlestick_image(df_oldest_first)
         self.assertIsNotNone(image_stream_oldest)
 
+    def test_generate_candlestick_image_closes_figure(self):
+        """Repeated calls must not leave figures open in pyplot."""
+        before = len(plt.get_fignums())
+        for _ in range(3):
+            generate_candlestick_image(self.sample_df.copy())
+        self.assertEqual(len(plt.get_fignums()), before)
+
+    def test_generate_candlestick_images_batch(self):
+        """Batch rendering returns PNG bytes per key and None for invalid frames."""
+        frames = {
+            'AAA': self.sample_df.copy(),
+            'BBB': self.sample_df.iloc[::-1].copy(),
+            'BAD': self.sample_df.drop(columns=['Volume']),
+        }
+        results = generate_candlestick_images(frames, max_workers=2)
+        self.assertEqual(list(results.keys()), ['AAA', 'BBB', 'BAD'])
+        self.assertTrue(results['AAA'].startswith(b'\x89PNG'))
+        self.assertTrue(results['BBB'].startswith(b'\x89PNG'))
+        self.assertIsNone(results['BAD'])
+
+        # A list in gives a list out; max_workers=1 renders in-process
+        results = generate_candlestick_images([self.sample_df.copy()], max_workers=1)
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0].startswith(b'\x89PNG'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,284 @@
+"""
+Offline benchmark suite (no network).
+
+Run from investment_app:
+    python -m backend.benchmarks.run_benchmarks --sizes 100 1000 5000 --output bench.json
+    python -m backend.benchmarks.run_benchmarks --sizes 100 --only indicators signals
+
+Every benchmark runs against a SyntheticMarket and a throwaway SQLite file, so
+results are comparable between commits. Compare two result files with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+from sqlmodel import SQLModel, Session, create_engine
+
+from ..database import Stock, StockAlert, TradeHistory
+from .synthetic import SyntheticMarket, use_synthetic_market
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCHMARKS = ["indicators", "frame_memory", "signals", "process_stocks", "stocks_list", "check_alerts", "calculate_analytics", "equity_curve", "rs_rank"]
+DEFAULT_SIZES = [100, 1000, 5000]
+# calculate_analytics replays trades for this many symbols at most (it is per-trade, not per-universe)
+MAX_TRADED_SYMBOLS = 500
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def _make_engine(tmp_dir):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+def _seed_db(engine, market: SyntheticMarket, symbols):
+    """Stocks with populated metrics (as after an update), one alert per stock and a few trades."""
+    rng = np.random.default_rng(market.seed)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        for sym in symbols:
+            close = float(market.frame(sym)["Close"].iloc[-1])
+            session.add(Stock(
+                symbol=sym, company_name=f"{sym} Synthetic Corp", sector="Technology", industry="Software",
+                asset_type="stock", current_price=close, change_percentage_1d=float(rng.normal(0, 2)),
+                change_percentage_5d=float(rng.normal(0, 5)), rs_rating=int(rng.integers(1, 99)),
+                composite_rating=int(rng.integers(1, 99)), atr_14=close * 0.03, slope_5ma=float(rng.normal(0, 20)),
+                change_percentage_20d=float(rng.normal(0, 8)), change_percentage_50d=float(rng.normal(0, 12)),
+                change_percentage_200d=float(rng.normal(0, 25)),
+            ))
+            session.add(StockAlert(
+                symbol=sym, condition_json="{}",
+                stages_json=json.dumps([[{"metric": "slope_5ma", "op": "lte", "value": 0}],
+                                        [{"metric": "slope_5ma", "op": "gte", "value": 10}]]),
+            ))
+        for sym in symbols[:MAX_TRADED_SYMBOLS]:
+            df = market.frame(sym)
+            buy_at = int(rng.integers(0, max(1, len(df) - 60)))
+            for offset, trade_type, qty in ((buy_at, "買い", 100.0), (buy_at + 40, "売り", 50.0)):
+                session.add(TradeHistory(
+                    symbol=sym, trade_type=trade_type, quantity=qty,
+                    price=float(df["Close"].iloc[min(offset, len(df) - 1)]),
+                    trade_date=df.index[min(offset, len(df) - 1)].to_pydatetime(),
+                ))
+        session.commit()
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def run_size(n: int, selected, years: float, seed: int):
+    from ..services.stock_service import stock_service
+    from ..services.signals import get_signal_functions
+
+    market = SyntheticMarket(years=years, seed=seed)
+    symbols = market.symbols(n)
+    results = []
+
+    def record(name, seconds, units=n, **extra):
+        row = {
+            "benchmark": name, "symbols": n, "seconds": round(seconds, 4),
+            "per_symbol_ms": round(seconds / units * 1000, 3) if units else None,
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+        row.update(extra)
+        results.append(row)
+        print(f"  {name:<22} n={n:<6} {seconds:9.3f}s  ({row['per_symbol_ms']} ms/symbol)")
+
+    with use_synthetic_market(market), tempfile.TemporaryDirectory() as tmp_dir:
+        raw = {sym: market.frame(sym) for sym in symbols}
+
+        enriched = {}
+        if "indicators" in selected or "signals" in selected:
+            def indicators():
+                for sym, df in raw.items():
+                    enriched[sym] = stock_service._add_technical_indicators(df.copy())
+            seconds = _timed(indicators)
+            if "indicators" in selected:
+                record("indicators", seconds)
+                # Next day's refetch of a fixed period: the window drops its oldest bar and
+                # gains a new one; only the new bar (plus the warm-up head) is computed
+                from ..services import stock_service as stock_service_module
+                with patch.object(stock_service_module, "INDICATOR_CACHE_MB", 1 << 20):
+                    for sym, df in raw.items():
+                        stock_service._add_technical_indicators(df.iloc[:-1].copy(), key=(sym, "bench", "1d"))
+                    def indicators_incremental():
+                        for sym, df in raw.items():
+                            stock_service._add_technical_indicators(df.iloc[1:].copy(), key=(sym, "bench", "1d"))
+                    record("indicators_incremental", _timed(indicators_incremental))
+                    stock_service._enriched.clear()
+                    stock_service._enriched_bytes = 0
+
+        if "frame_memory" in selected:
+            # Footprint of the enriched frames: previous policy (float64, rounded, NaN as 0) vs compact_bars
+            from ..services.frame_dtypes import compact_bars, to_panel
+            from ..services.indicators import PRICE_INDICATORS
+            full = {sym: PRICE_INDICATORS.compute(df.copy()) for sym, df in raw.items()}
+            legacy_bytes = sum(df.round(2).fillna(0).memory_usage(deep=True).sum() for df in full.values())
+            compact = {}
+            def frame_memory():
+                for sym, df in full.items():
+                    compact[sym] = compact_bars(df)
+            seconds = _timed(frame_memory)
+            compact_bytes = sum(df.memory_usage(deep=True).sum() for df in compact.values())
+            panel = to_panel(compact)
+            panel_bytes = panel.memory_usage(deep=True).sum()
+            object_bytes = panel.astype({"ticker": object}).memory_usage(deep=True).sum()
+            record("frame_memory", seconds,
+                   legacy_kb_per_symbol=round(legacy_bytes / n / 1024, 1),
+                   kb_per_symbol=round(compact_bytes / n / 1024, 1),
+                   panel_mb=round(panel_bytes / 1024 ** 2, 1),
+                   panel_object_ticker_mb=round(object_bytes / 1024 ** 2, 1))
+            print(f"    {legacy_bytes / n / 1024:.1f} KB/symbol -> {compact_bytes / n / 1024:.1f} KB/symbol; "
+                  f"panel {object_bytes / 1024 ** 2:.1f} MB (object ticker) -> {panel_bytes / 1024 ** 2:.1f} MB (category)")
+            del full, compact, panel
+
+        if "signals" in selected:
+            funcs = get_signal_functions()
+            def signals():
+                for df in enriched.values():
+                    for func in funcs.values():
+                        func(df)
+            record("signals", _timed(signals), signal_count=len(funcs))
+
+        needs_db = {"process_stocks", "stocks_list", "check_alerts", "calculate_analytics", "equity_curve", "rs_rank"} & set(selected)
+        if not needs_db:
+            return results
+
+        engine = _make_engine(tmp_dir)
+        _seed_db(engine, market, symbols)
+
+        if "process_stocks" in selected:
+            from ..services import update_manager as update_manager_module
+            manager = update_manager_module.update_manager
+            with patch.object(update_manager_module, "engine", engine):
+                manager.is_stop_requested = False
+                manager.progress = 0
+                manager.total = n
+                errors = []
+                record("process_stocks", _timed(lambda: manager._process_stocks(symbols, errors)), errors=len(errors))
+
+        if "stocks_list" in selected:
+            from ..routers.stocks import list_stocks
+            with Session(engine) as session:
+                record("stocks_list_lite", _timed(lambda: list_stocks(offset=0, limit=n, asset_type="stock", show_hidden_only=False, lite=True, session=session)))
+            with Session(engine) as session:
+                record("stocks_list", _timed(lambda: list_stocks(offset=0, limit=n, asset_type="stock", show_hidden_only=False, lite=False, session=session)))
+
+        if "check_alerts" in selected:
+            from ..routers.alerts import check_alerts
+            with Session(engine) as session:
+                record("check_alerts", _timed(lambda: check_alerts(session=session)))
+
+        if "calculate_analytics" in selected:
+            from sqlmodel import select
+            from ..routers import history as history_module
+            with Session(engine) as session:
+                trades = session.exec(select(TradeHistory)).all()
+            traded = min(n, MAX_TRADED_SYMBOLS)
+            with patch.object(history_module, "engine", engine):
+                history_module._analytics_cache.clear()
+                record("calculate_analytics", _timed(lambda: history_module.calculate_analytics(trades)), units=traded, trades=len(trades))
+                record("calculate_analytics_cached", _timed(lambda: history_module.calculate_analytics(trades)), units=traded, trades=len(trades))
+
+        if "equity_curve" in selected:
+            from sqlmodel import select
+            from ..routers import history as history_module
+            from ..services.equity_curve import EquityCurveEngine
+            with Session(engine) as session:
+                trades = session.exec(select(TradeHistory)).all()
+                sectors = dict(session.exec(select(Stock.symbol, Stock.sector)).all())
+            traded = min(n, MAX_TRADED_SYMBOLS)
+            closes = history_module._load_market_data(sorted({t.symbol for t in trades}))
+            curve = EquityCurveEngine()
+            record("equity_curve", _timed(lambda: curve.get(trades, closes, sectors)), units=traded, trades=len(trades))
+            # One more bar for every symbol: only the tail is recomputed
+            extended = {}
+            for sym, series in closes.items():
+                extended[sym] = series.copy()
+                extended[sym].loc[series.index[-1] + timedelta(days=1)] = series.iloc[-1]
+            record("equity_curve_incremental", _timed(lambda: curve.get(trades, extended, sectors)), units=traded, mode=curve.last_build.get("mode"))
+
+        if "rs_rank" in selected:
+            from ..services import rs_rank as rs_rank_module
+            with patch.object(rs_rank_module, "engine", engine):
+                record("rs_rank", _timed(rs_rank_module.rs_rank_service.recompute))
+
+        engine.dispose()
+    return results
+
+def compare(baseline_path: str, current_path: str, threshold: float = 0.1):
+    """Print per-benchmark change; returns the number of regressions above threshold."""
+    with open(baseline_path) as f:
+        base = {(r["benchmark"], r["symbols"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        cur = json.load(f)["results"]
+    regressions = 0
+    for r in cur:
+        b = base.get((r["benchmark"], r["symbols"]))
+        if not b or not b["seconds"]:
+            continue
+        change = (r["seconds"] - b["seconds"]) / b["seconds"]
+        flag = "REGRESSION" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{r['benchmark']:<22} n={r['symbols']:<6} {b['seconds']:9.3f}s -> {r['seconds']:9.3f}s ({change:+.1%}) {flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON results path (default: benchmark_results_<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    results = []
+    for n in args.sizes:
+        print(f"[benchmark] {n} symbols")
+        results.extend(run_size(n, args.only, args.years, args.seed))
+
+    output = args.output or f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    payload = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "years": args.years,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"[benchmark] results written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
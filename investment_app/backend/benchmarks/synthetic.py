@@ -0,0 +1,196 @@
+"""
+Synthetic market data for offline benchmarks.
+
+SyntheticMarket generates deterministic OHLCV per symbol (random walk with
+occasional unadjusted splits and missing sessions) and exposes a yfinance-like
+surface (`download`, `Ticker`) so StockService can run without network.
+"""
+import sys
+import tempfile
+import time
+import types
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653}
+
+def symbol_seed(symbol: str, seed: int = 0) -> int:
+    # Stable across processes (hash() is salted per interpreter)
+    return (zlib.crc32(symbol.encode("utf-8")) + seed) % (2 ** 32)
+
+def generate_ohlcv(symbol: str, years: float = 2, seed: int = 0, end: str = None,
+                   split_rate: float = 0.2, gap_rate: float = 0.01) -> pd.DataFrame:
+    """
+    Daily OHLCV for `years` of business days ending at `end` (default: last business day).
+    - split_rate: probability that the series contains one 2:1 or 3:1 split
+      (prices before it are left unadjusted, as a raw feed would be)
+    - gap_rate: fraction of sessions dropped (halts, holidays the calendar does not know about)
+    """
+    rng = np.random.default_rng(symbol_seed(symbol, seed))
+    end_ts = pd.Timestamp(end) if end else pd.Timestamp.today().normalize() - pd.offsets.BDay(1)
+    index = pd.bdate_range(end=end_ts, periods=max(2, int(252 * years)))
+    n = len(index)
+
+    start_price = float(rng.uniform(5, 500))
+    returns = rng.normal(0.0004, rng.uniform(0.01, 0.04), n)
+    close = start_price * np.exp(np.cumsum(returns))
+
+    if rng.random() < split_rate and n > 20:
+        ratio = float(rng.choice([2, 3]))
+        at = int(rng.integers(10, n - 10))
+        close[:at] *= ratio
+
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n)))
+    volume = rng.lognormal(np.log(rng.uniform(1e5, 5e6)), 0.5, n).astype(np.int64)
+
+    df = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+    df.index.name = "Date"
+
+    if gap_rate > 0:
+        keep = rng.random(n) >= gap_rate
+        keep[-1] = True # Latest bar always present
+        df = df[keep]
+    return df
+
+class FakeTicker:
+    """The subset of yfinance.Ticker used by StockService."""
+    def __init__(self, market: "SyntheticMarket", symbol: str):
+        self.market = market
+        self.ticker = symbol
+        self._rng = np.random.default_rng(symbol_seed(symbol, market.seed + 1))
+
+    @property
+    def info(self):
+        rng = self._rng
+        return {
+            "symbol": self.ticker,
+            "longName": f"{self.ticker} Synthetic Corp",
+            "shortName": self.ticker,
+            "sector": str(rng.choice(["Technology", "Healthcare", "Financials", "Industrials", "Energy"])),
+            "industry": str(rng.choice(["Software", "Biotech", "Banks", "Machinery", "Oil & Gas"])),
+            "marketCap": float(rng.uniform(1e8, 1e12)),
+            "forwardPE": float(rng.uniform(5, 60)),
+            "trailingPE": float(rng.uniform(5, 80)),
+            "priceToBook": float(rng.uniform(0.5, 20)),
+            "dividendYield": float(rng.uniform(0, 0.05)),
+            "returnOnEquity": float(rng.uniform(-0.2, 0.4)),
+            "revenueGrowth": float(rng.uniform(-0.1, 0.5)),
+            "ebitda": float(rng.uniform(1e6, 1e10)),
+            "targetMeanPrice": float(rng.uniform(5, 500)),
+            "fiftyTwoWeekHigh": float(rng.uniform(100, 500)),
+            "fiftyTwoWeekLow": float(rng.uniform(5, 100)),
+        }
+
+    @property
+    def fast_info(self):
+        return {"lastPrice": float(self.market.frame(self.ticker)["Close"].iloc[-1])}
+
+    @property
+    def calendar(self):
+        next_date = (datetime.now() + timedelta(days=int(self._rng.integers(1, 90)))).date()
+        return {"Earnings Date": [next_date]}
+
+    @property
+    def earnings_dates(self):
+        now = pd.Timestamp.now().normalize()
+        dates = [now + pd.Timedelta(days=int(d)) for d in (-270, -180, -90, 0 + int(self._rng.integers(1, 90)))]
+        return pd.DataFrame({"EPS Estimate": [1.0] * len(dates)}, index=pd.DatetimeIndex(dates, name="Earnings Date"))
+
+    @property
+    def sec_filings(self):
+        return []
+
+    @property
+    def news(self):
+        return []
+
+class SyntheticMarket:
+    """
+    Deterministic universe of symbols. Frames are generated lazily and cached,
+    so repeated downloads of the same symbol return the same data.
+    """
+    def __init__(self, years: float = 2, seed: int = 0, split_rate: float = 0.2, gap_rate: float = 0.01):
+        self.years = years
+        self.seed = seed
+        self.split_rate = split_rate
+        self.gap_rate = gap_rate
+        self.end = (pd.Timestamp.today().normalize() - pd.offsets.BDay(1)).strftime("%Y-%m-%d")
+        self._frames = {}
+        self.download_calls = 0
+
+    @staticmethod
+    def symbols(n: int):
+        return [f"SYN{i:05d}" for i in range(n)]
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        df = self._frames.get(symbol)
+        if df is None:
+            df = generate_ohlcv(symbol, self.years, self.seed, self.end, self.split_rate, self.gap_rate)
+            self._frames[symbol] = df
+        return df
+
+    def download(self, tickers, period="2y", interval="1d", start=None, end=None, **kwargs):
+        """yf.download: single ticker -> flat columns, several -> (Price, Ticker) MultiIndex."""
+        self.download_calls += 1
+        names = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for sym in names:
+            df = self.frame(sym)
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            elif period in PERIOD_DAYS:
+                df = df[df.index >= df.index[-1] - pd.Timedelta(days=PERIOD_DAYS[period])]
+            if interval == "1wk":
+                df = df.resample("W-MON", label="left", closed="left").agg(
+                    {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+                ).dropna()
+            elif interval == "1mo":
+                df = df.resample("MS").agg(
+                    {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+                ).dropna()
+            frames[sym] = df.copy()
+        if len(names) == 1:
+            return frames[names[0]]
+        combined = pd.concat(frames, axis=1)
+        combined.columns = combined.columns.swaplevel(0, 1)
+        combined.columns.names = ["Price", "Ticker"]
+        return combined
+
+    def Ticker(self, symbol: str) -> FakeTicker:
+        return FakeTicker(self, symbol)
+
+@contextmanager
+def use_synthetic_market(market: SyntheticMarket):
+    """
+    Route StockService's yfinance calls to `market`, stub the SEC filing lookup
+    and disable the per-symbol rate-limit sleep in UpdateManager. StockService's
+    parquet cache (bars, daily closes) goes to a temp dir, never the user's DATA_DIR.
+    """
+    from ..services import stock_service as stock_service_module
+    from ..services import update_manager as update_manager_module
+
+    fake_yf = SimpleNamespace(download=market.download, Ticker=market.Ticker)
+
+    sec_stub = types.ModuleType("sec_filer_retriever")
+    class SecFilerRetriever:
+        def __init__(self, *args, **kwargs):
+            pass
+        def get_most_recent_filing(self, symbol, date_str):
+            return None
+    sec_stub.SecFilerRetriever = SecFilerRetriever
+
+    no_sleep_time = SimpleNamespace(sleep=lambda *_: None, monotonic=time.monotonic, time=time.time)
+    with tempfile.TemporaryDirectory(prefix="synthetic_market_") as data_dir, \
+         patch.object(stock_service_module, "DATA_DIR", data_dir), \
+         patch.object(stock_service_module, "yf", fake_yf), \
+         patch.object(update_manager_module, "time", no_sleep_time), \
+         patch.dict(sys.modules, {"sec_filer_retriever": sec_stub}):
+        yield market
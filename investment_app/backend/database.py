@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, create_engine, Field, Session
+from sqlalchemy import Index, UniqueConstraint, or_
 from typing import Optional
 from datetime import datetime, date
 
@@ -38,8 +39,20 @@ print(f"DEBUG: SQLite URL: {sqlite_url}")
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, connect_args=connect_args)
 
+# Indexes added to tables that already exist in deployed databases
+# (create_all only creates indexes together with a new table)
+EXTRA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_stock_updated_at ON stock (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_stock_asset_type_hidden ON stock (asset_type, is_hidden)", # /screen base filter
+    "CREATE INDEX IF NOT EXISTS ix_stockgroupmember_group_id ON stockgroupmember (group_id)",
+]
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        for stmt in EXTRA_INDEXES:
+            conn.execute(text(stmt))
 
 def get_session():
     with Session(engine) as session:
@@ -90,6 +103,9 @@ class Stock(SQLModel, table=True):
     rs_20d: Optional[float] = None
     rs_50d: Optional[float] = None
     rs_200d: Optional[float] = None
+    # Universe-wide percentile of the weighted period returns (services/rs_rank.py), 1-99
+    rs_rank: Optional[int] = None
+    rs_score: Optional[float] = None
 
     is_in_uptrend: Optional[bool] = Field(default=False)
     asset_type: Optional[str] = Field(default="stock") # stock, index
@@ -123,9 +139,12 @@ class Stock(SQLModel, table=True):
     
     # Hide from Dashboard/Update
     is_hidden: bool = Field(default=False)
+    # Background enrichment of newly added symbols (services/enrichment.py):
+    # "pending" until info/bars/metrics are in, "failed" if that did not work, None when ready
+    enrichment_status: Optional[str] = Field(default=None)
 
     first_import_date: Optional[datetime] = Field(default=None)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True) # Watermark for /stocks/changes
 
     # Manual Analysis File Link
     analysis_file_path: Optional[str] = Field(default=None)
@@ -148,6 +167,73 @@ class Stock(SQLModel, table=True):
 
 
 
+# Stock.enrichment_status of a symbol the background enrichment has not validated yet
+ENRICHMENT_PENDING = "pending"
+
+def stock_is_listed():
+    """
+    Filter for stocks shown in lists, heatmap and screener and processed by update runs:
+    auto-registered / newly added symbols appear once enrichment has validated them.
+    """
+    return or_(Stock.enrichment_status.is_(None), Stock.enrichment_status != ENRICHMENT_PENDING)
+
+class StockDailySnapshot(SQLModel, table=True):
+    """
+    Append-only daily copy of the screening metrics UpdateManager overwrites on Stock.
+    One row per (bar date, symbol); signals are packed into signal_mask
+    (bit order: services/metric_snapshots.SIGNAL_BITS).
+    """
+    __table_args__ = (
+        Index("ix_stockdailysnapshot_symbol_date", "symbol", "snapshot_date"),
+    )
+
+    snapshot_date: date = Field(primary_key=True)
+    symbol: str = Field(primary_key=True)
+    close: Optional[float] = None
+    change_percentage_1d: Optional[float] = None
+    change_percentage_5d: Optional[float] = None
+    volume_increase_pct: Optional[float] = None
+    deviation_5ma_pct: Optional[float] = None
+    deviation_20ma_pct: Optional[float] = None
+    deviation_50ma_pct: Optional[float] = None
+    deviation_200ma_pct: Optional[float] = None
+    slope_5ma: Optional[float] = None
+    slope_20ma: Optional[float] = None
+    slope_50ma: Optional[float] = None
+    slope_200ma: Optional[float] = None
+    rs_5d: Optional[float] = None
+    rs_20d: Optional[float] = None
+    rs_50d: Optional[float] = None
+    rs_200d: Optional[float] = None
+    rs_rating: Optional[int] = None
+    composite_rating: Optional[int] = None
+    atr_14: Optional[float] = None
+    predicted_price_next: Optional[float] = None
+    predicted_price_today: Optional[float] = None
+    is_in_uptrend: Optional[bool] = None
+    # Filled in after the run's RS-rank stage (metric_snapshots.record_ranks)
+    rs_rank: Optional[int] = None
+    rs_score: Optional[float] = None
+    signal_mask: int = Field(default=0)
+
+class StockTombstone(SQLModel, table=True):
+    """Deleted symbols, so /stocks/changes can tell delta-syncing clients to drop them."""
+    symbol: str = Field(primary_key=True)
+    deleted_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class FailedTicker(SQLModel, table=True):
+    """
+    Negative cache of provider lookups that came back empty (services/negative_cache.py).
+    While expires_at is in the future, fetch paths skip the provider for this symbol.
+    """
+    symbol: str = Field(primary_key=True)
+    reason: str # "unknown_symbol" (no info) / "no_data" (no bars, ticker not confirmed unknown)
+    detail: Optional[str] = None
+    failure_count: int = 1 # Consecutive failures with this reason; drives the TTL
+    first_failed_at: datetime = Field(default_factory=datetime.utcnow)
+    last_failed_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
 class StockNews(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     symbol: str = Field(index=True)
@@ -159,6 +245,21 @@ class StockNews(SQLModel, table=True):
     thumbnail_url: Optional[str] = None
     related_tickers_json: str = Field(default="[]")
 
+class NewsFetchState(SQLModel, table=True):
+    """Per-symbol watermark for the last successful news fetch."""
+    symbol: str = Field(primary_key=True)
+    last_fetched_at: datetime = Field(default_factory=datetime.utcnow)
+    item_count: int = Field(default=0)
+
+class NewsSummaryCache(SQLModel, table=True):
+    """Gemini news summaries keyed by hash(prompt template + normalized headline list)."""
+    content_hash: str = Field(primary_key=True)
+    summary: str
+    headline_count: int = Field(default=0)
+    hit_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow)
+
 class StockAlert(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     symbol: str = Field(index=True)
@@ -248,3 +349,59 @@ class StockGroupMember(SQLModel, table=True):
     group_id: int = Field(foreign_key="stockgroup.id")
     symbol: str = Field(index=True)
     added_at: datetime = Field(default_factory=datetime.utcnow)
+
+class GroupSummary(SQLModel, table=True):
+    """
+    Precomputed /groups/{id}/summary payload (services/group_summaries.py).
+    Rebuilt for every group after each update run; membership changes drop the row
+    so the next request recomputes that group alone.
+    """
+    group_id: int = Field(primary_key=True, foreign_key="stockgroup.id")
+    member_count: int = 0
+    summary_json: str
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+class NightlyJob(SQLModel, table=True):
+    """
+    Persistent work queue for the nightly backfill (financials, news summaries).
+    Dequeue order is (priority asc, next_run_at asc) over pending rows.
+    """
+    __table_args__ = (
+        UniqueConstraint("job_type", "symbol", name="uq_nightlyjob_type_symbol"),
+        Index("ix_nightlyjob_dequeue", "status", "priority", "next_run_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_type: str # 'financials', 'news_summary'
+    symbol: str
+    priority: int = Field(default=100) # Lower runs first
+    status: str = Field(default="pending") # pending, running, done, failed
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    next_run_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class UpdateRun(SQLModel, table=True):
+    """One UpdateManager run (see UpdateRunSymbol for the per-symbol breakdown)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    status: str = Field(default="running") # running, completed, stopped, error
+    symbol_count: int = Field(default=0)
+    total_seconds: Optional[float] = None
+    profile_path: Optional[str] = None # cProfile stats file when run with profiling
+
+class UpdateRunSymbol(SQLModel, table=True):
+    """Per-symbol wall time of an update run, broken down by sub-step."""
+    __table_args__ = (
+        Index("ix_updaterunsymbol_run_seconds", "run_id", "total_seconds"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: int = Field(foreign_key="updaterun.id")
+    symbol: str
+    total_seconds: float
+    steps_json: str = Field(default="{}") # {"fetch": 0.81, "fundamentals.earnings_dates": 2.3, ...}
+    error: Optional[str] = None
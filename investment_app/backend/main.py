@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+import time as _time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .database import create_db_and_tables
@@ -7,6 +8,10 @@ from .routers import stocks, automation
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    from .services.job_queue import job_queue
+    job_queue.reset_stale_running()
+    from .services.enrichment import enrichment_queue
+    enrichment_queue.resume_pending()
     yield
 
 app = FastAPI(lifespan=lifespan, title="Investment Management System")
@@ -20,6 +25,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency / count metrics (exposed at /system/metrics)
+from .services.metrics import HTTP_REQUESTS, HTTP_LATENCY
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = _time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/stocks/{symbol}) rather than raw path to keep cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        HTTP_LATENCY.observe(_time.perf_counter() - start, method=request.method, path=path)
+        HTTP_REQUESTS.inc(method=request.method, path=path, status=status)
+
 app.include_router(stocks.router)
 app.include_router(automation.router)
 from backend.routers.system import router as system_router
@@ -34,6 +57,8 @@ from .routers.history import router as history_router
 app.include_router(history_router)
 from .routers import filters, system
 app.include_router(filters.router)
+from .routers import screener
+app.include_router(screener.router)
 app.include_router(system.router)
 from .routers import prompts
 app.include_router(prompts.router)
@@ -0,0 +1,27 @@
+from sqlmodel import create_engine, text
+import os
+
+# Adjust path to point to the correct DB location
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# current: backend/migrations
+# target: StockAnalysis/data
+DATA_DIR = os.path.join(BASE_DIR, "..", "..", "..", "data")
+DATA_DIR = os.path.abspath(DATA_DIR)
+sqlite_file_name = "investment_app.db"
+sqlite_url = f"sqlite:///{os.path.join(DATA_DIR, sqlite_file_name)}"
+
+engine = create_engine(sqlite_url)
+
+def run_migration():
+    with engine.connect() as connection:
+        # RS rank of the day, copied onto the daily snapshots after the rank stage
+        for col, col_type in [('rs_rank', 'INTEGER'), ('rs_score', 'FLOAT')]:
+            try:
+                connection.execute(text(f"ALTER TABLE stockdailysnapshot ADD COLUMN {col} {col_type}"))
+                print(f"Added column: {col}")
+            except Exception as e:
+                print(f"Skipped {col}: {e}")
+        connection.commit()
+
+if __name__ == "__main__":
+    run_migration()
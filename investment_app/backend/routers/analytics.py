@@ -9,9 +9,11 @@ import numpy as np
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from ..database import get_session, Stock, TradeHistory
+from ..database import get_session, Stock, TradeHistory, stock_is_listed
 from ..services.stock_service import stock_service
+from ..services.frame_dtypes import bar_value
 from ..services.signals import get_signal_functions
+from ..services.metrics import timed
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -40,6 +42,7 @@ class SignalResult(BaseModel):
     dev_ma200: Optional[float] = None
 
 @router.post("/historical-signal", response_model=List[SignalResult])
+@timed("analyze_historical_signals")
 def analyze_historical_signals(request: HistoricalSignalRequest, session: Session = Depends(get_session)):
     print(f"DEBUG: Received historical signal request: {request}")
     target_date_str = request.target_date
@@ -50,7 +53,7 @@ def analyze_historical_signals(request: HistoricalSignalRequest, session: Sessio
         raise HTTPException(status_code=400, detail="Invalid date format")
 
     # 1. Fetch Universe
-    query = select(Stock)
+    query = select(Stock).where(stock_is_listed())
     # Filter by universe if needed (TODO)
     stocks = session.exec(query).all()
     
@@ -128,8 +131,8 @@ def analyze_historical_signals(request: HistoricalSignalRequest, session: Sessio
             
             # Calculate Returns
             # Entry Price: Price at target_date
-            entry_price = past_data['Close'].iloc[-1]
-            if entry_price == 0: return None
+            entry_price = bar_value(past_data['Close'].iloc[-1])
+            if not entry_price: return None
 
             # Calc Data: Data available ON or BEFORE calc_end_date
             # We need to find the price at calc_end_date.
@@ -138,13 +141,15 @@ def analyze_historical_signals(request: HistoricalSignalRequest, session: Sessio
             if calc_data.empty: return None # Should not happen if past_data is not empty
 
             # Current Price: Price at calc_end_date (last available)
-            current_price = calc_data['Close'].iloc[-1]
+            closes = calc_data['Close'].dropna()
+            if closes.empty: return None
+            current_price = bar_value(closes.iloc[-1])
             
             # Extract additional metrics at target_date
             daily_change_pct = None
             if len(past_data) >= 2:
-                prev_close = past_data['Close'].iloc[-2]
-                if prev_close != 0:
+                prev_close = bar_value(past_data['Close'].iloc[-2])
+                if prev_close:
                     daily_change_pct = ((entry_price - prev_close) / prev_close) * 100
 
             # Get deviations (using .get to handle missing columns safely, though they are added by stock_service)
@@ -152,7 +157,7 @@ def analyze_historical_signals(request: HistoricalSignalRequest, session: Sessio
             def get_val(col):
                 if col in past_data.columns:
                     val = past_data[col].iloc[-1]
-                    if pd.notna(val): return float(val)
+                    if pd.notna(val): return bar_value(val)
                 return None
 
             dev_ma5 = get_val('Deviation_MA5')
@@ -170,11 +175,13 @@ def analyze_historical_signals(request: HistoricalSignalRequest, session: Sessio
             min_return_pct = return_pct # Default to current
             
             if not future_data.empty:
-                max_high = future_data['High'].max()
-                min_low = future_data['Low'].min()
+                max_high = bar_value(future_data['High'].max())
+                min_low = bar_value(future_data['Low'].min())
                 
-                max_return_pct = ((max_high - entry_price) / entry_price) * 100
-                min_return_pct = ((min_low - entry_price) / entry_price) * 100
+                if max_high is not None:
+                    max_return_pct = ((max_high - entry_price) / entry_price) * 100
+                if min_low is not None:
+                    min_return_pct = ((min_low - entry_price) / entry_price) * 100
 
             return SignalResult(
                 symbol=symbol,
@@ -229,3 +236,40 @@ def analyze_historical_signals(request: HistoricalSignalRequest, session: Sessio
         yield json.dumps(final_event) + "\n"
 
     return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+
+@router.get("/heatmap")
+def get_heatmap(asset_type: str = "stock", max_cap: Optional[float] = None, leaves: bool = True):
+    """
+    Sector -> industry tree with market-cap-weighted 1d/5d/20d change, breadth and
+    signal hit counts. Leaves are compact arrays (see leaf_columns).
+    Cached until the next update run finishes.
+    """
+    from ..services.heatmap import heatmap_cache
+    return heatmap_cache.get(asset_type, max_cap, leaves)
+
+# --- Daily metric snapshots (written by the update run) ---
+
+@router.get("/snapshots/dates")
+def get_snapshot_dates(limit: int = 60):
+    from ..services.metric_snapshots import metric_snapshots
+    return metric_snapshots.get_dates(limit)
+
+@router.get("/snapshots/signals")
+def get_snapshot_signal_symbols(on_date: date = Query(..., alias="date"), signals: List[str] = Query(...), match: str = "all"):
+    """Which symbols had the given signal(s) on `date` (match=all|any), from stored snapshots."""
+    from ..services.metric_snapshots import metric_snapshots
+    try:
+        symbols = metric_snapshots.symbols_with_signals(on_date, signals, match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"date": on_date.isoformat(), "signals": signals, "match": match, "symbols": symbols}
+
+@router.get("/snapshots/day")
+def get_snapshot_day(on_date: date = Query(..., alias="date")):
+    from ..services.metric_snapshots import metric_snapshots
+    return metric_snapshots.get_day(on_date)
+
+@router.get("/snapshots/{symbol}")
+def get_snapshot_history(symbol: str, days: int = 90):
+    from ..services.metric_snapshots import metric_snapshots
+    return metric_snapshots.get_history(symbol.upper(), days)
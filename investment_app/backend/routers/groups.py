@@ -4,6 +4,7 @@ from sqlmodel import Session, select
 from datetime import datetime
 from ..database import get_session, StockGroup, StockGroupMember, Stock
 from ..schemas import StockResponse
+from ..services.group_summaries import group_summaries
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
@@ -36,11 +37,24 @@ def delete_group(group_id: int, session: Session = Depends(get_session)):
     members = session.exec(select(StockGroupMember).where(StockGroupMember.group_id == group_id)).all()
     for m in members:
         session.delete(m)
+    group_summaries.invalidate(session, group_id)
         
     session.delete(group)
     session.commit()
     return {"status": "deleted", "id": group_id}
 
+@router.get("/{group_id}/summary")
+def get_group_summary(group_id: int, session: Session = Depends(get_session)):
+    """
+    Precomputed group metrics: holding value and weights, average/value-weighted
+    change per period, relative strength vs ^GSPC and signal counts.
+    Refreshed for all groups after each update run.
+    """
+    summary = group_summaries.get(session, group_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return summary
+
 # --- Member Management ---
 
 @router.get("/{group_id}/members", response_model=List[StockResponse])
@@ -102,6 +116,7 @@ def add_member(group_id: int, symbol: str, session: Session = Depends(get_sessio
         
     member = StockGroupMember(group_id=group_id, symbol=symbol)
     session.add(member)
+    group_summaries.invalidate(session, group_id)
     try:
         session.commit()
         session.refresh(member)
@@ -117,5 +132,6 @@ def remove_member(group_id: int, symbol: str, session: Session = Depends(get_ses
          raise HTTPException(status_code=404, detail="Member not found in group")
          
     session.delete(member)
+    group_summaries.invalidate(session, group_id)
     session.commit()
     return {"status": "removed", "group_id": group_id, "symbol": symbol}
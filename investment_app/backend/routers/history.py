@@ -1,56 +1,136 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select, SQLModel
-from ..database import get_session, TradeHistory
+from ..database import get_session, engine, Stock, TradeHistory
 from datetime import datetime
 from typing import List, Dict, Any
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+import concurrent.futures
+import copy
+import hashlib
+import json
+import os
+import threading
 
 router = APIRouter(prefix="/history", tags=["history"])
 
 from ..services.stock_service import stock_service
+from ..services.metrics import timed
+from ..services.equity_curve import equity_curve
 import pandas as pd
 import numpy as np
 
+# Forward returns reported per trade (trading days after the execution date)
+FORWARD_RETURN_DAYS = (1, 5, 20, 50)
+ANALYTICS_CACHE_SIZE = 8
+
+# symbol -> (file mtime, Close series); reread only when the stored closes change
+_closes_cache: Dict[str, Any] = {}
+# LRU of full analytics responses keyed by trade-set hash + last bar dates.
+# Callers get their own copy: the cached dict must not change under the next caller.
+_analytics_cache: "OrderedDict[str, dict]" = OrderedDict()
+_analytics_lock = threading.Lock()
+analytics_cache_stats = {"hits": 0, "misses": 0}
+
+def _load_closes(sym: str):
+    path = stock_service.get_closes_path(sym)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    cached = _closes_cache.get(sym)
+    if cached is not None and mtime is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        closes, read_mtime = stock_service.get_daily_closes(sym)
+    except Exception as e:
+        print(f"Error fetching data for {sym}: {e}")
+        return None
+    if closes.empty:
+        return None
+    index = pd.to_datetime(closes.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    closes.index = index.normalize()
+    if read_mtime is not None:
+        _closes_cache[sym] = (read_mtime, closes)
+    return closes
+
+def _load_market_data(symbols: List[str]) -> Dict[str, pd.Series]:
+    """Locally stored daily closes for the traded symbols (network only when missing or stale)"""
+    market_data = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        for sym, closes in zip(symbols, executor.map(_load_closes, symbols)):
+            if closes is not None:
+                market_data[sym] = closes
+    return market_data
+
+def forward_returns(closes: pd.Series, trade_dates: np.ndarray, prices: np.ndarray) -> Dict[int, np.ndarray]:
+    """
+    Percent return from each execution price to the close `d` trading days after
+    the trade date, for all of a symbol's trades at once. The trade date maps to
+    its own bar, or the next bar when it is not a trading day; trades outside the
+    stored range (or with a non-positive price) get NaN.
+    """
+    index = closes.index.values
+    close = closes.to_numpy(dtype=float)
+    n = len(close)
+    pos = np.searchsorted(index, trade_dates, side="left")
+    in_range = (trade_dates >= index[0]) & (trade_dates <= index[-1]) & (prices > 0)
+    result = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for days in FORWARD_RETURN_DAYS:
+            target = pos + days
+            valid = in_range & (target < n)
+            future = close[np.minimum(target, n - 1)]
+            result[days] = np.where(valid, (future - prices) / prices * 100.0, np.nan)
+    return result
+
+def _analytics_key(sorted_trades: List[TradeHistory], market_data: Dict[str, pd.Series], company_names: Dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for t in sorted_trades:
+        digest.update(json.dumps(t.dict(), default=str, sort_keys=True).encode("utf-8"))
+    last_bars = sorted((sym, str(closes.index[-1].date())) for sym, closes in market_data.items())
+    digest.update(json.dumps([last_bars, sorted(company_names.items())]).encode("utf-8"))
+    return digest.hexdigest()
+
+@timed("calculate_analytics")
 def calculate_analytics(trades: List[TradeHistory]):
     # Sort trades by date (oldest first)
     sorted_trades = sorted(trades, key=lambda x: x.trade_date)
     
-    # Pre-fetch Market Data for needed symbols
-    # Optimize: Fetch in parallel
     unique_symbols = list(set(t.symbol for t in trades))
-    market_data = {}
-    
-    import concurrent.futures
-
-    def fetch_data(sym):
-        try:
-            # Use 5y only if necessary, or determine max range?
-            # 5y is safe.
-            df = stock_service.get_stock_data(sym, period="5y", interval="1d")
-            if not df.empty:
-                df.index = pd.to_datetime(df.index).normalize()
-                return sym, df
-        except Exception as e:
-            print(f"Error fetching data for {sym}: {e}")
-        return sym, None
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        results = executor.map(fetch_data, unique_symbols)
-        
-    for sym, df in results:
-        if df is not None:
-            market_data[sym] = df
+    market_data = _load_market_data(unique_symbols)
             
     # Pre-fetch Company Names
     company_names = {}
     try:
-        # Optimization: Fetch all stocks and create a look-up map
-        all_stocks = stock_service.get_all_stocks()
-        for s in all_stocks:
-            company_names[s.symbol] = s.company_name
+        with Session(engine) as session:
+            rows = session.exec(select(Stock.symbol, Stock.company_name).where(Stock.symbol.in_(unique_symbols))).all()
+            company_names = {sym: name for sym, name in rows if name}
     except Exception as e:
         print(f"Error fetching company names: {e}")
 
+    # Same trades and same bars -> same response
+    cache_key = _analytics_key(sorted_trades, market_data, company_names)
+    with _analytics_lock:
+        cached = _analytics_cache.get(cache_key)
+        if cached is not None:
+            _analytics_cache.move_to_end(cache_key)
+            analytics_cache_stats["hits"] += 1
+            return copy.deepcopy(cached)
+        analytics_cache_stats["misses"] += 1
+
+    # Forward returns: one searchsorted per symbol over all of its trades
+    trade_returns = {}
+    positions_by_symbol = defaultdict(list)
+    for i, t in enumerate(sorted_trades):
+        positions_by_symbol[t.symbol].append(i)
+    for sym, positions in positions_by_symbol.items():
+        closes = market_data.get(sym)
+        if closes is None:
+            continue
+        dates = pd.to_datetime([sorted_trades[i].trade_date for i in positions]).normalize().values
+        prices = np.array([sorted_trades[i].price or 0.0 for i in positions], dtype=float)
+        returns = forward_returns(closes, dates, prices)
+        for j, i in enumerate(positions):
+            trade_returns[i] = {days: returns[days][j] for days in FORWARD_RETURN_DAYS}
 
     # Portfolio State per Symbol
     # { symbol: { qty: float, total_cost: float, avg_cost: float } }
@@ -68,7 +148,7 @@ def calculate_analytics(trades: List[TradeHistory]):
     weekly_pl = defaultdict(float)
     yearly_pl = defaultdict(float)
 
-    for t in sorted_trades:
+    for position, t in enumerate(sorted_trades):
         sym = t.symbol
         pf = portfolio[sym]
         
@@ -84,59 +164,11 @@ def calculate_analytics(trades: List[TradeHistory]):
 
         
         # --- Post-Trade Performance Metrics ---
-        # Calculate % change 1d, 5d, 20d, 50d after execution
-        # Base price = t.price (Execution Price)
-        
-        trade_data['return_1d'] = None
-        trade_data['return_5d'] = None
-        trade_data['return_20d'] = None
-        trade_data['return_50d'] = None
-
-        if sym in market_data:
-            df = market_data[sym]
-            t_date = pd.Timestamp(t.trade_date).normalize()
-            
-            # Find location of trade date in DF
-            # If exact match not found, find nearest NEXT trading day?
-            # Or just use nearest key.
-            # searchsorted works if sorted. DF index is sorted.
-            
-            try:
-                # Get integer location
-                # method='bfill' or 'ffill'? We want the trade day or immediately after.
-                # get_indexer returns -1 if not found with 'exact' (default for non-unique index, but Date index is unique)
-                # Let's use searchsorted to find position
-                
-                # Check if t_date is in range
-                if t_date >= df.index[0] and t_date <= df.index[-1]:
-                     # Use get_loc if exact, or searchsorted
-                    if t_date in df.index:
-                        idx = df.index.get_loc(t_date)
-                        # If get_loc returns slice/array (duplicates), take first
-                        if isinstance(idx, (slice, np.ndarray)):
-                             idx = idx.start if isinstance(idx, slice) else idx[0]
-                    else:
-                        # Find insertion point (next day)
-                        idx = df.index.searchsorted(t_date)
-                    
-                    # Convert idx to int just in case
-                    idx = int(idx)
-
-                    def get_forward_return(days_offset):
-                        target_idx = idx + days_offset
-                        if target_idx < len(df):
-                            future_price = df['Close'].iloc[target_idx]
-                            if t.price > 0:
-                                return ((future_price - t.price) / t.price) * 100.0
-                        return None
-
-                    trade_data['return_1d'] = get_forward_return(1)
-                    trade_data['return_5d'] = get_forward_return(5)
-                    trade_data['return_20d'] = get_forward_return(20)
-                    trade_data['return_50d'] = get_forward_return(50)
-            except Exception as e:
-                # print(f"Calc error: {e}") 
-                pass
+        # % change 1d, 5d, 20d, 50d after execution (base price = execution price)
+        returns = trade_returns.get(position, {})
+        for days in FORWARD_RETURN_DAYS:
+            value = returns.get(days)
+            trade_data[f'return_{days}d'] = None if value is None or np.isnan(value) else float(value)
 
         # Normalize trade type
         t_type = t.trade_type.replace('買い', 'Buy').replace('売り', 'Sell') 
@@ -196,7 +228,7 @@ def calculate_analytics(trades: List[TradeHistory]):
     
     win_rate = (winning_trades_count / total_trades_count * 100) if total_trades_count > 0 else 0.0
     
-    return {
+    result = {
         "stats": {
             "total_pl": total_pl,
             "win_rate": win_rate,
@@ -207,6 +239,11 @@ def calculate_analytics(trades: List[TradeHistory]):
         },
         "history": processed_history
     }
+    with _analytics_lock:
+        _analytics_cache[cache_key] = copy.deepcopy(result)
+        while len(_analytics_cache) > ANALYTICS_CACHE_SIZE:
+            _analytics_cache.popitem(last=False)
+    return result
 
 @router.get("/analytics")
 def get_history_analytics(session: Session = Depends(get_session)):
@@ -216,6 +253,21 @@ def get_history_analytics(session: Session = Depends(get_session)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/equity-curve")
+def get_equity_curve(session: Session = Depends(get_session)):
+    """
+    Daily mark-to-market P&L of the trade log as columnar series (dates, equity,
+    drawdown, market value, realized/unrealized, sector exposure).
+    """
+    try:
+        trades = session.exec(select(TradeHistory)).all()
+        symbols = sorted(set(t.symbol for t in trades))
+        sectors = dict(session.exec(select(Stock.symbol, Stock.sector).where(Stock.symbol.in_(symbols))).all())
+        result = equity_curve.get(trades, _load_market_data(symbols), sectors)
+        return {**result, "build": equity_curve.get_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 class TradeNoteUpdate(SQLModel):
     note: str
 
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session, select
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+import json
+from ..database import get_session, SavedFilter, Stock
+from ..services.screener import run_screen, ScreenError, DEFAULT_SORT
+
+router = APIRouter(prefix="/screen", tags=["screen"])
+
+class ScreenRequest(BaseModel):
+    criteria: Dict = {}
+    sort: str = DEFAULT_SORT
+    order: str = "desc"
+    limit: int = 100
+    cursor: Optional[str] = None
+    asset_type: Optional[str] = "stock"
+    include_rows: bool = False
+
+def _analysis_symbols(criteria: Dict) -> Optional[List[str]]:
+    # GDrive summaries are files, not rows; only scanned when the criteria ask for them
+    if not criteria.get("has_analysis"):
+        return None
+    from ..services.gdrive_loader import gdrive_loader
+    return list(gdrive_loader.get_latest_summaries().keys())
+
+def _screen(session: Session, criteria: Dict, sort: str, order: str, limit: int,
+            cursor: Optional[str], asset_type: Optional[str], include_rows: bool):
+    try:
+        result = run_screen(
+            session, criteria, sort=sort, order=order, limit=limit, cursor=cursor,
+            asset_type=asset_type, analysis_symbols=_analysis_symbols(criteria)
+        )
+    except ScreenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if include_rows and result["symbols"]:
+        # Same row shape as /stocks/?lite=true, in screen order
+        from .stocks import _build_stock_responses
+        stocks = session.exec(select(Stock).where(Stock.symbol.in_(result["symbols"]))).all()
+        by_symbol = {s.symbol: s for s in stocks}
+        ordered = [by_symbol[sym] for sym in result["symbols"] if sym in by_symbol]
+        result["rows"] = _build_stock_responses(ordered, session, lite=True)
+    return result
+
+@router.post("/")
+def screen(request: ScreenRequest, session: Session = Depends(get_session)):
+    """Evaluate ad-hoc criteria (FilterDialog JSON). Returns matching symbols and next_cursor."""
+    return _screen(session, request.criteria, request.sort, request.order, request.limit,
+                   request.cursor, request.asset_type, request.include_rows)
+
+@router.get("/{filter_id}")
+def screen_saved_filter(
+    filter_id: int,
+    sort: str = DEFAULT_SORT,
+    order: str = "desc",
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    asset_type: Optional[str] = "stock",
+    include_rows: bool = False,
+    session: Session = Depends(get_session)
+):
+    """Evaluate a SavedFilter's criteria server-side."""
+    saved = session.get(SavedFilter, filter_id)
+    if not saved:
+        raise HTTPException(status_code=404, detail="Filter not found")
+    try:
+        criteria = json.loads(saved.criteria_json or "{}")
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Saved criteria is not valid JSON")
+    result = _screen(session, criteria, sort, order, limit, cursor, asset_type, include_rows)
+    result["filter"] = {"id": saved.id, "name": saved.name}
+    return result
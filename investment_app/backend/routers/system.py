@@ -1,5 +1,11 @@
-from fastapi import APIRouter
+import asyncio
+import json
+import time
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from ..services.update_manager import update_manager
+from ..services.progress_stream import progress_stream
 
 router = APIRouter(prefix="/system", tags=["system"])
 
@@ -7,14 +13,115 @@ router = APIRouter(prefix="/system", tags=["system"])
 def get_system_status():
     return update_manager.get_status()
 
+@router.get("/jobs")
+def get_job_queue_stats():
+    from ..services.job_queue import job_queue
+    from ..services.summary_cache import summary_cache
+    return {
+        "draining": job_queue.is_draining(),
+        "jobs": job_queue.get_stats(),
+        "summary_cache": summary_cache.get_stats()
+    }
+
+@router.get("/driver_pool")
+def get_driver_pool_stats():
+    from ..services.gemini_service import gemini_service
+    return gemini_service.pool.get_stats()
+
+@router.get("/chart_cache")
+def get_chart_cache_stats():
+    from ..services.chart_generator import chart_generator
+    return chart_generator.get_cache_stats()
+
+@router.get("/stock_data")
+def get_stock_data_stats():
+    from ..services.stock_service import stock_service
+    return stock_service.get_singleflight_stats()
+
+@router.get("/failed-tickers")
+def get_failed_tickers():
+    """Negative cache of tickers the provider could not resolve (active = still skipped)."""
+    from ..services.negative_cache import negative_cache
+    return {"stats": negative_cache.get_stats(), "entries": negative_cache.list_entries()}
+
+@router.delete("/failed-tickers/{symbol}")
+def clear_failed_ticker(symbol: str):
+    from ..services.negative_cache import negative_cache
+    if not negative_cache.clear(symbol):
+        raise HTTPException(status_code=404, detail="Not in failed-ticker cache")
+    return {"status": "cleared", "symbol": symbol}
+
+@router.delete("/failed-tickers")
+def clear_failed_tickers(expired_only: bool = False):
+    from ..services.negative_cache import negative_cache
+    return {"status": "cleared", "count": negative_cache.clear_all(expired_only=expired_only)}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    from ..services.metrics import metrics
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+HEARTBEAT_SECONDS = 15
+
+@router.get("/stream")
+async def stream_progress(request: Request, rate: float = 2.0):
+    """
+    Server-Sent Events feed of background progress (update run, deep research).
+    - "progress": a source's state, sampled `rate` times per second and sent only when it changed
+    - "update.*" / "automation.*": discrete events (symbol errors, completion, logs), never dropped
+    Replaces polling /system/status.
+    """
+    interval = 1.0 / min(max(rate, 0.2), 10.0)
+    # Resume after a reconnect: EventSource resends the last event id it saw
+    last_event_id = request.headers.get("last-event-id")
+    start_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else progress_stream.last_seq
+
+    async def event_generator():
+        last_seq = start_seq
+        last_sent = {}
+        last_write = time.monotonic()
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            for seq, source, event, data in progress_stream.events_since(last_seq):
+                last_seq = seq
+                yield progress_stream.format_sse(f"{source}.{event}", data, event_id=seq)
+                last_write = time.monotonic()
+            for source, state in progress_stream.states().items():
+                encoded = json.dumps(state, sort_keys=True, default=str)
+                if last_sent.get(source) != encoded:
+                    last_sent[source] = encoded
+                    yield progress_stream.format_sse("progress", {"source": source, "state": state})
+                    last_write = time.monotonic()
+            if time.monotonic() - last_write >= HEARTBEAT_SECONDS:
+                yield ": heartbeat\n\n"
+                last_write = time.monotonic()
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/update/start")
-def start_update():
-    started = update_manager.start_update()
+def start_update(profile: bool = False):
+    started = update_manager.start_update(profile=profile)
     if started:
         return {"status": "started"}
     else:
         return {"status": "already_running"}
 
+@router.get("/update/runs")
+def get_update_runs(limit: int = 20):
+    from ..services.run_log import run_log
+    return run_log.get_runs(limit)
+
+@router.get("/update/slowest")
+def get_slowest_symbols(run_id: Optional[int] = None, limit: int = 20):
+    """Top-N slowest symbols and (symbol, step) pairs of an update run (latest by default)."""
+    from ..services.run_log import run_log
+    return run_log.top_slowest(run_id, limit)
+
 from pydantic import BaseModel
 import os
 
@@ -11,6 +11,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, ElementClickInterceptedException
 from ..services.stock_service import stock_service
+from ..services.progress_stream import progress_stream
 from ..database import Stock, engine
 from sqlmodel import Session, select
 
@@ -37,6 +38,12 @@ class GeminiAutomationService:
         self._stop_flag = False
         self._thread = None
 
+    def get_progress(self):
+        """get_status without the log tail (log lines are pushed as events)."""
+        status = self.get_status()
+        status.pop("logs", None)
+        return status
+
     def get_status(self):
         return {
             "is_running": self.is_running,
@@ -76,6 +83,7 @@ class GeminiAutomationService:
         entry = f"[{timestamp}] {message}"
         print(entry)
         self.logs.append(entry)
+        progress_stream.emit("automation", "log", {"message": entry})
 
     def _run_research_loop(self, symbols: List[str], prompt_template: str):
         self.log(f"Starting research for {len(symbols)} symbols")
@@ -135,6 +143,7 @@ class GeminiAutomationService:
             self.current_symbol = None
             self.status_message = "Completed" if not self._stop_flag else "Stopped"
             self.log("Research loop finished")
+            progress_stream.emit("automation", "completed" if not self._stop_flag else "stopped", self.get_progress())
             # Do NOT quit driver as it is the user's main browser
 
     def _prepare_prompt(self, symbol: str, template: str) -> str:
@@ -202,7 +211,7 @@ class GeminiAutomationService:
                 # Convert Date to string
                 # df_slice['Date'] (or index name) needs to be string
                 # Assuming 'Date' column exists after reset_index
-                csv_str = df_slice.to_csv(index=False)
+                csv_str = df_slice.to_csv(index=False, float_format="%.2f")
                 content = content.replace("%STOCKDATA%", csv_str)
             else:
                 content = content.replace("%STOCKDATA%", "No Data Available")
@@ -487,3 +496,4 @@ class GeminiAutomationService:
             return None
 
 automation_service = GeminiAutomationService()
+progress_stream.register_source("automation", automation_service.get_progress)
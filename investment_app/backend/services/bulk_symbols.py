@@ -0,0 +1,119 @@
+"""
+Set-based symbol management for /stocks/bulk/* (and the single-symbol delete),
+plus the Stock.updated_at / tombstone bookkeeping behind /stocks/changes.
+
+Every statement is a DELETE/UPDATE ... WHERE symbol IN (...) per table, chunked
+below SQLite's bound-parameter limit, and nothing is committed here: the caller
+commits once so a bulk operation is a single transaction.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from ..database import (
+    Stock, TradeHistory, StockNote, AnalysisResult, StockGroupMember, StockAlert,
+    StockNews, StockFinancials, NewsFetchState, StockDailySnapshot, NightlyJob,
+    StockTombstone, GroupSummary,
+)
+
+# Tables whose rows belong to a symbol and go with it (UpdateRunSymbol is run history and stays)
+SYMBOL_TABLES = [
+    TradeHistory, StockNote, AnalysisResult, StockGroupMember, StockAlert,
+    StockNews, StockFinancials, NewsFetchState, StockDailySnapshot,
+]
+MAX_BULK_SYMBOLS = 5000
+# Tombstones older than this are pruned; clients with an older watermark get a full resync
+TOMBSTONE_RETENTION_DAYS = 30
+# SQLite's default limit is 999 bound parameters per statement
+CHUNK_SIZE = 500
+
+def normalize_symbols(symbols: Iterable[str]) -> List[str]:
+    """Strip, drop empties and duplicates, keep order."""
+    seen = {}
+    for sym in symbols:
+        sym = (sym or "").strip()
+        if sym:
+            seen.setdefault(sym, None)
+    return list(seen)
+
+def _chunks(symbols: List[str]):
+    for i in range(0, len(symbols), CHUNK_SIZE):
+        yield symbols[i:i + CHUNK_SIZE]
+
+def set_hidden(session: Session, symbols: List[str], hidden: bool) -> Dict:
+    """Hide/unhide the given stocks; rows already in that state are left alone."""
+    now = datetime.utcnow()
+    changed = 0
+    existing = set()
+    for chunk in _chunks(symbols):
+        existing.update(session.exec(select(Stock.symbol).where(Stock.symbol.in_(chunk))).all())
+        result = session.execute(
+            update(Stock)
+            .where(Stock.symbol.in_(chunk))
+            .where(Stock.is_hidden != hidden)
+            .values(is_hidden=hidden, updated_at=now)
+        )
+        changed += result.rowcount
+    return {"changed": changed, "not_found": [s for s in symbols if s not in existing]}
+
+def touch_stocks(session: Session, symbols: Iterable[str]) -> int:
+    """
+    Bump Stock.updated_at for stocks whose list row changed through another table
+    (trades, notes, analyses), so /stocks/changes sends them again.
+    """
+    symbols = normalize_symbols(symbols)
+    now = datetime.utcnow()
+    touched = 0
+    for chunk in _chunks(symbols):
+        result = session.execute(update(Stock).where(Stock.symbol.in_(chunk)).values(updated_at=now))
+        touched += result.rowcount
+    return touched
+
+def has_symbol_rows(session: Session, symbol: str) -> bool:
+    """Whether anything besides the Stock row references the symbol (trades, notes, groups, ...)."""
+    return any(
+        session.exec(select(model.symbol).where(model.symbol == symbol).limit(1)).first() is not None
+        for model in SYMBOL_TABLES
+    )
+
+def prune_tombstones(session: Session, retention_days: int = TOMBSTONE_RETENTION_DAYS) -> int:
+    """Drop tombstones older than the retention (run after an update run)."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    return session.execute(delete(StockTombstone).where(StockTombstone.deleted_at < cutoff)).rowcount
+
+def delete_symbols(session: Session, symbols: List[str]) -> Dict:
+    """
+    Delete the stocks and all of their per-symbol rows. Tombstones are written for
+    deleted Stock rows (/stocks/changes) and the stored summaries of affected groups
+    are dropped. Returns deleted row counts per table.
+    """
+    counts = {}
+    existing = []
+    group_ids = set()
+    for chunk in _chunks(symbols):
+        existing.extend(session.exec(select(Stock.symbol).where(Stock.symbol.in_(chunk))).all())
+        group_ids.update(session.exec(
+            select(StockGroupMember.group_id).where(StockGroupMember.symbol.in_(chunk)).distinct()
+        ).all())
+        for model in SYMBOL_TABLES:
+            result = session.execute(delete(model).where(model.symbol.in_(chunk)))
+            counts[model.__tablename__] = counts.get(model.__tablename__, 0) + result.rowcount
+        # Queued nightly work for these symbols; a running job finishes on its own
+        result = session.execute(delete(NightlyJob).where(NightlyJob.symbol.in_(chunk)).where(NightlyJob.status != "running"))
+        counts[NightlyJob.__tablename__] = counts.get(NightlyJob.__tablename__, 0) + result.rowcount
+        result = session.execute(delete(Stock).where(Stock.symbol.in_(chunk)))
+        counts[Stock.__tablename__] = counts.get(Stock.__tablename__, 0) + result.rowcount
+
+    if existing:
+        now = datetime.utcnow()
+        stmt = sqlite_insert(StockTombstone.__table__)
+        session.execute(
+            stmt.on_conflict_do_update(index_elements=["symbol"], set_={"deleted_at": stmt.excluded.deleted_at}),
+            [{"symbol": sym, "deleted_at": now} for sym in existing],
+        )
+    if group_ids:
+        session.execute(delete(GroupSummary).where(GroupSummary.group_id.in_(list(group_ids))))
+    return {"deleted": existing, "rows": counts}
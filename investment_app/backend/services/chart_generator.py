@@ -3,18 +3,68 @@ import mplfinance as mpf
 import pandas as pd
 import os
 import logging
+import hashlib
+import shutil
+import threading
 import uuid
+from collections import OrderedDict
 
 # Configuration
 CHART_DIR = r"C:\Users\uchida\.gemini\temp_charts"
 os.makedirs(CHART_DIR, exist_ok=True)
 
+# Rendered charts are cached on disk by content key; least recently used files are evicted.
+# Charts referenced by a saved analysis are copied to <chart_dir>/analyses, which is never evicted.
+CHART_CACHE_MAX_FILES = 500
+CHART_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Bump when the rendering code below changes so old images are not reused
+CHART_STYLE = "charles-v1"
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ChartGeneratorService:
-    def __init__(self):
-        pass
+    def __init__(self, chart_dir: str = CHART_DIR, max_files: int = CHART_CACHE_MAX_FILES, max_bytes: int = CHART_CACHE_MAX_BYTES,
+                 analysis_dir: str = None):
+        self.chart_dir = chart_dir
+        self.analysis_dir = analysis_dir or os.path.join(chart_dir, "analyses")
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None # OrderedDict[path, size], oldest first
+
+    def _load_index(self):
+        """Build the LRU index from files on disk (ordered by mtime) on first use."""
+        if self._index is not None:
+            return
+        entries = []
+        try:
+            for name in os.listdir(self.chart_dir):
+                if not name.endswith('.png'):
+                    continue
+                path = os.path.join(self.chart_dir, name)
+                try:
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, path, st.st_size))
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        entries.sort()
+        self._index = OrderedDict((path, size) for _, path, size in entries)
+
+    def chart_cache_key(self, symbol: str, df: pd.DataFrame, period_label: str) -> str:
+        """Key from (symbol, last bar date, last close, period label, style)."""
+        last_date = pd.Timestamp(df.index[-1]).strftime('%Y-%m-%d')
+        last_close = float(df['Close'].iloc[-1]) if 'Close' in df.columns else 0.0
+        raw = f"{symbol}|{last_date}|{last_close:.4f}|{period_label}|{CHART_STYLE}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+    def _cache_path(self, symbol: str, key: str) -> str:
+        safe_symbol = "".join(c if c.isalnum() or c in "-_." else "_" for c in symbol)
+        return os.path.join(self.chart_dir, f"{safe_symbol}_{key}.png")
 
     def generate_chart_image(self, symbol: str, df: pd.DataFrame, period_label: str = "Daily") -> str:
         """
@@ -35,6 +85,23 @@ class ChartGeneratorService:
             # Or 6 months? 100-150 candles is usually good for pattern recognition.
             plot_df = df.tail(150).copy()
 
+            # File Path (content-addressed; reuse an identical render if cached)
+            key = self.chart_cache_key(symbol, plot_df, period_label)
+            filepath = self._cache_path(symbol, key)
+            with self._lock:
+                self._load_index()
+                if filepath in self._index and os.path.exists(filepath):
+                    self._index.move_to_end(filepath)
+                    self.hits += 1
+                    try:
+                        os.utime(filepath, None) # Keep on-disk LRU order after restart
+                    except OSError:
+                        pass
+                    logger.info(f"Chart cache hit for {symbol} at {filepath}")
+                    return filepath
+                self._index.pop(filepath, None)
+                self.misses += 1
+
             # MAs
             # We assume MAs are already calculated in df as 'Close_MA5', etc. but mplfinance needs 'mav' argument or addplot.
             # Using make_addplot is more flexible.
@@ -48,29 +115,38 @@ class ChartGeneratorService:
                     # Filter out NaN at start to avoid plotting issues
                     addplots.append(mpf.make_addplot(plot_df[ma], color=colors[i], width=0.8))
 
-            # File Path
-            filename = f"{symbol}_{uuid.uuid4().hex[:8]}.png"
-            filepath = os.path.join(CHART_DIR, filename)
-
             # Style
             # 'yahoo' style is standard. 'charles' is also good (green/red).
             s = mpf.make_mpf_style(base_mpf_style='charles', rc={'font.size': 10})
 
-            # Plot
-            mpf.plot(
-                plot_df,
-                type='candle',
-                style=s,
-                title=f"{symbol} - {period_label}",
-                ylabel='Price',
-                volume=True,
-                addplot=addplots if addplots else None,
-                savefig=dict(fname=filepath, dpi=100, bbox_inches='tight'),
-                datetime_format='%Y-%m-%d',
-                xrotation=20,
-                figsize=(12, 8) 
-            )
-            
+            # Plot into a temp file and move it into place: two concurrent misses for the
+            # same key must not write the same path (the name does not end in .png, so
+            # _load_index never picks up a leftover)
+            tmp_path = os.path.join(self.chart_dir, f".{os.path.basename(filepath)}.{uuid.uuid4().hex[:8]}.tmp")
+            plot_kwargs = {'addplot': addplots} if addplots else {} # mplfinance rejects addplot=None
+            try:
+                mpf.plot(
+                    plot_df,
+                    type='candle',
+                    style=s,
+                    title=f"{symbol} - {period_label}",
+                    ylabel='Price',
+                    volume=True,
+                    savefig=dict(fname=tmp_path, format='png', dpi=100, bbox_inches='tight'),
+                    datetime_format='%Y-%m-%d',
+                    xrotation=20,
+                    figsize=(12, 8),
+                    **plot_kwargs
+                )
+                os.replace(tmp_path, filepath)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            with self._lock:
+                self._index[filepath] = os.path.getsize(filepath)
+            self.cleanup_old_charts()
+
             logger.info(f"Generated chart for {symbol} at {filepath}")
             return filepath
 
@@ -78,11 +154,71 @@ class ChartGeneratorService:
             logger.error(f"Failed to generate chart for {symbol}: {e}", exc_info=True)
             return None
 
+    def keep_for_analysis(self, symbol: str, chart_path: str) -> str:
+        """
+        Copy a cached chart to a permanent per-analysis file for AnalysisResult.file_path.
+        Cached files are shared by content key and evicted; saved analyses keep their own image.
+        """
+        os.makedirs(self.analysis_dir, exist_ok=True)
+        safe_symbol = "".join(c if c.isalnum() or c in "-_." else "_" for c in symbol)
+        path = os.path.join(self.analysis_dir, f"{safe_symbol}_{uuid.uuid4().hex[:8]}.png")
+        with self._lock: # Not evicted while copying
+            shutil.copyfile(chart_path, path)
+        return path
+
+    def delete_symbol_charts(self, symbols) -> int:
+        """
+        Remove the cached charts and saved-analysis copies of deleted symbols
+        (one directory scan each). Returns the number of files removed.
+        """
+        prefixes = {"".join(c if c.isalnum() or c in "-_." else "_" for c in s) for s in symbols}
+        def owned(name):
+            # <symbol>_<8 or 16 hex>.png; the symbol itself may contain '_'
+            if not name.endswith('.png'):
+                return False
+            stem, _, suffix = name[:-len('.png')].rpartition('_')
+            return stem in prefixes and len(suffix) in (8, 16)
+        removed = 0
+        with self._lock:
+            self._load_index()
+            for directory in (self.chart_dir, self.analysis_dir):
+                try:
+                    names = [name for name in os.listdir(directory) if owned(name)]
+                except OSError:
+                    continue
+                for name in names:
+                    path = os.path.join(directory, name)
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except OSError as e:
+                        logger.warning(f"Failed to delete chart {path}: {e}")
+                    self._index.pop(path, None)
+        return removed
+
     def cleanup_old_charts(self):
         """
-        Optional: Cleanup old charts to save space.
+        Evict least recently used charts until the cache is within its file-count and size caps.
         """
-        # Implementation skipped for now.
-        pass
+        with self._lock:
+            self._load_index()
+            total = sum(self._index.values())
+            while self._index and (len(self._index) > self.max_files or total > self.max_bytes):
+                path, size = self._index.popitem(last=False)
+                total -= size
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Failed to evict chart {path}: {e}")
+
+    def get_cache_stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "files": len(self._index),
+                "bytes": sum(self._index.values())
+            }
 
 chart_generator = ChartGeneratorService()
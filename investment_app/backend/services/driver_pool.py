@@ -0,0 +1,167 @@
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class DriverUnavailable(Exception):
+    pass
+
+class PooledDriver:
+    def __init__(self, driver: Any, handle: Optional[str] = None):
+        self.driver = driver
+        self.handle = handle # Browser tab owned by this session
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.broken = False
+
+class _Timing:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "avg_seconds": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_seconds": round(self.max, 3),
+            "last_seconds": round(self.last, 3)
+        }
+
+class DriverPool:
+    """
+    Small pool of long-lived WebDriver sessions (one browser tab each).
+
+    Callers borrow a session with `with pool.borrow() as driver:`. Sessions are
+    created lazily by `factory` up to `size`, health-checked on checkout and
+    recycled when unhealthy, too old, used `max_uses` times, or when the borrower
+    raised. `factory` returns a PooledDriver (or None on failure) and `closer`
+    releases one, so tests can plug in fake drivers.
+    """
+    def __init__(self, factory: Callable[[], Optional[PooledDriver]], closer: Optional[Callable[[PooledDriver], None]] = None,
+                 size: int = 2, max_uses: int = 50, max_age_seconds: float = 3600,
+                 health_check: Optional[Callable[[PooledDriver], bool]] = None):
+        self.factory = factory
+        self.closer = closer
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_age_seconds = max_age_seconds
+        self.health_check = health_check or (lambda pd: True)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.recycled = 0
+        self.wait_time = _Timing()
+        self.latency = _Timing()
+
+    def _expired(self, pd: PooledDriver) -> bool:
+        if pd.uses >= self.max_uses:
+            return True
+        return (time.monotonic() - pd.created_at) >= self.max_age_seconds
+
+    def _discard(self, pd: PooledDriver):
+        with self._lock:
+            self._created -= 1
+            self.recycled += 1
+        if self.closer:
+            try:
+                self.closer(pd)
+            except Exception as e:
+                logger.warning(f"Failed to close pooled driver: {e}")
+
+    def _create(self) -> Optional[PooledDriver]:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            pd = self.factory()
+        except Exception as e:
+            logger.error(f"Driver factory failed: {e}")
+            pd = None
+        if pd is None:
+            with self._lock:
+                self._created -= 1
+            raise DriverUnavailable("Driver setup failed")
+        return pd
+
+    def _acquire(self, timeout: Optional[float]) -> PooledDriver:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                pd = self._idle.get_nowait()
+            except queue.Empty:
+                pd = self._create()
+                if pd is None:
+                    # Pool is at capacity: wait for a return. Poll so a discarded
+                    # session frees a slot for creation on the next pass.
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise DriverUnavailable("Timed out waiting for a browser session")
+                    try:
+                        pd = self._idle.get(timeout=1.0 if remaining is None else min(remaining, 1.0))
+                    except queue.Empty:
+                        continue
+
+            # Health check / recycle on checkout
+            healthy = False
+            if not self._expired(pd):
+                try:
+                    healthy = bool(self.health_check(pd))
+                except Exception:
+                    healthy = False
+            if healthy:
+                return pd
+            logger.info("Recycling pooled browser session")
+            self._discard(pd)
+
+    @contextmanager
+    def borrow(self, timeout: Optional[float] = None):
+        start = time.monotonic()
+        pd = self._acquire(timeout)
+        acquired = time.monotonic()
+        self.wait_time.record(acquired - start)
+        pd.uses += 1
+        try:
+            yield pd.driver
+        except Exception:
+            pd.broken = True
+            raise
+        finally:
+            self.latency.record(time.monotonic() - acquired)
+            if pd.broken or self._expired(pd):
+                self._discard(pd)
+            else:
+                self._idle.put(pd)
+
+    def close_all(self):
+        while True:
+            try:
+                pd = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pd)
+
+    def get_stats(self) -> dict:
+        return {
+            "size": self.size,
+            "open": self._created,
+            "idle": self._idle.qsize(),
+            "recycled": self.recycled,
+            "wait": self.wait_time.to_dict(),
+            "latency": self.latency.to_dict()
+        }
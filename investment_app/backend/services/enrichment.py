@@ -0,0 +1,151 @@
+import concurrent.futures
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from ..database import engine, Stock, ENRICHMENT_PENDING
+from .stock_service import stock_service, is_valid_info
+from .negative_cache import negative_cache, UNKNOWN_SYMBOL
+from .progress_stream import progress_stream
+from .update_manager import update_manager
+from . import bulk_symbols
+
+# yfinance is rate-sensitive; a few parallel symbols is plenty
+ENRICH_WORKERS = 3
+PENDING = ENRICHMENT_PENDING
+FAILED = "failed"
+
+class EnrichmentQueue:
+    """
+    Background enrichment of newly added symbols.
+
+    create_stock and the detail auto-registration insert the Stock row right away
+    with enrichment_status="pending" (not listed yet, see database.stock_is_listed)
+    and submit() it here. A small worker pool
+    fetches info (name/sector/industry/market cap), then runs the same per-symbol
+    refresh as the daily update (bars, metrics, RS, signals, fundamentals) and
+    clears the status. A symbol already queued or running is not submitted twice.
+    Clients are notified through progress_stream events on the "enrichment"
+    source ("queued", "ready", "failed").
+    """
+    def __init__(self, max_workers: int = ENRICH_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._inflight: Dict[str, str] = {}  # symbol -> source ("create" / "detail")
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.recent_failures = deque(maxlen=50)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="enrich")
+        return self._executor
+
+    def submit(self, symbol: str, source: str = "create") -> bool:
+        """Queue a symbol whose Stock row is committed. False if it is already queued."""
+        with self._lock:
+            if symbol in self._inflight:
+                self.coalesced += 1
+                return False
+            self._inflight[symbol] = source
+            executor = self._get_executor()
+        executor.submit(self._run, symbol, source)
+        progress_stream.emit("enrichment", "queued", {"symbol": symbol})
+        return True
+
+    def is_queued(self, symbol: str) -> bool:
+        with self._lock:
+            return symbol in self._inflight
+
+    def resume_pending(self) -> int:
+        """Re-queue rows left pending by a restart."""
+        with Session(engine) as session:
+            symbols = session.exec(select(Stock.symbol).where(Stock.enrichment_status == PENDING)).all()
+        return sum(self.submit(sym) for sym in symbols)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            pending: List[str] = sorted(self._inflight)
+        return {
+            "pending": pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "recent_failures": list(self.recent_failures)[-10:],
+        }
+
+    def _run(self, symbol: str, source: str):
+        try:
+            self._enrich(symbol, source)
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(symbol, FAILED, str(e))
+        finally:
+            with self._lock:
+                self._inflight.pop(symbol, None)
+
+    def _enrich(self, symbol: str, source: str):
+        info = stock_service.get_stock_info(symbol)
+        with Session(engine) as session:
+            stock = session.get(Stock, symbol)
+            if stock is None:
+                return  # Deleted while queued
+            unknown = (negative_cache.check(symbol) or {}).get("reason") == UNKNOWN_SYMBOL
+            if not is_valid_info(info) and (source == "detail" or unknown):
+                # Unknown ticker (typo, delisted) or an auto-registration we could not
+                # verify (get_stock_info also returns None on provider errors).
+                if bulk_symbols.has_symbol_rows(session, symbol):
+                    # Trades, notes etc. exist: keep everything, the next update retries
+                    self._finish(symbol, FAILED, "Unknown symbol")
+                    return
+                # Nothing attached: drop the bare Stock row again (never delete_symbols)
+                session.delete(stock)
+                session.commit()
+                with self._lock:
+                    self.failed += 1
+                self.recent_failures.append({"symbol": symbol, "error": "Unknown symbol"})
+                progress_stream.emit("enrichment", "failed", {"symbol": symbol, "error": "Unknown symbol", "removed": True})
+                return
+            if info:
+                stock.company_name = info.get('shortName') or info.get('longName') or symbol
+                stock.sector = info.get('sector', 'Unknown')
+                stock.industry = info.get('industry', 'Unknown')
+                stock.market_cap = info.get('marketCap')
+                session.add(stock)
+                session.commit()
+
+        # Same per-symbol work as the daily update
+        try:
+            update_manager.refresh_symbol(symbol)
+        except Exception as e:
+            print(f"Enrichment of {symbol} failed: {e}")
+            self._finish(symbol, FAILED, str(e))
+            return
+        self._finish(symbol, None)
+
+    def _finish(self, symbol: str, status, error: str = None):
+        with Session(engine) as session:
+            session.execute(
+                update(Stock).where(Stock.symbol == symbol).values(enrichment_status=status, updated_at=datetime.utcnow())
+            )
+            session.commit()
+        with self._lock:
+            if status == FAILED:
+                self.failed += 1
+            else:
+                self.completed += 1
+        if status == FAILED:
+            self.recent_failures.append({"symbol": symbol, "error": error})
+            progress_stream.emit("enrichment", "failed", {"symbol": symbol, "error": error})
+        else:
+            progress_stream.emit("enrichment", "ready", {"symbol": symbol})
+
+enrichment_queue = EnrichmentQueue()
+progress_stream.register_source("enrichment", enrichment_queue.get_stats)
@@ -0,0 +1,278 @@
+"""
+Daily mark-to-market equity curve of the trade log.
+
+TradeHistory is replayed per symbol with the same average-cost accounting as
+history.calculate_analytics (fees ignored), then each symbol's position state is
+spread over the trading-day calendar with one searchsorted and multiplied by the
+forward-filled closes. Output is columnar: one list per series plus the dates.
+
+The engine keeps the computed arrays and the per-symbol state as of the last
+curve day. When only new trades (dated on/after that day) or new bars arrive,
+it recomputes from the last day onward instead of replaying everything; edits
+to older trades, sector changes or rewritten past bars (split adjustment) fall
+back to a full rebuild.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SERIES = ["market_value", "cost_basis", "realized_pl", "unrealized_pl"]
+UNKNOWN_SECTOR = "Unknown"
+
+def _direction(trade_type: str) -> int:
+    """+1 buy, -1 sell, 0 other (same normalization as calculate_analytics)."""
+    t_type = (trade_type or "").replace('買い', 'Buy').replace('売り', 'Sell')
+    if 'Buy' in t_type or 'BUY' in t_type.upper():
+        return 1
+    if 'Sell' in t_type or 'SELL' in t_type.upper():
+        return -1
+    return 0
+
+def _trade_key(t) -> tuple:
+    return (t.id, t.symbol, t.trade_type, float(t.quantity or 0), float(t.price or 0), str(t.trade_date))
+
+def replay(trades: List, carry=(0.0, 0.0, 0.0)) -> np.ndarray:
+    """
+    Average-cost replay of one symbol's trades (oldest first), starting from
+    carry = (qty, cost_basis, realized_pl). Returns the state after each trade,
+    shape (n_trades, 3).
+    """
+    qty, cost, realized = carry
+    out = np.empty((len(trades), 3))
+    for i, t in enumerate(trades):
+        direction = _direction(t.trade_type)
+        quantity = t.quantity or 0.0
+        price = t.price or 0.0
+        if direction > 0:
+            qty += quantity
+            cost += price * quantity
+        elif direction < 0:
+            basis = (cost / qty if qty > 0 else 0.0) * quantity
+            realized += price * quantity - basis
+            qty = max(0.0, qty - quantity)
+            cost = 0.0 if qty == 0 else cost - basis
+        out[i] = (qty, cost, realized)
+    return out
+
+def max_drawdown(equity: np.ndarray) -> Dict:
+    """Largest peak-to-trough fall of the P&L curve (the curve starts at 0)."""
+    if len(equity) == 0:
+        return {"value": 0.0, "peak_index": None, "trough_index": None}
+    peak = np.maximum(np.maximum.accumulate(equity), 0.0)
+    drawdown = equity - peak
+    trough = int(np.argmin(drawdown))
+    if drawdown[trough] >= 0:
+        return {"value": 0.0, "peak_index": None, "trough_index": None}
+    before = equity[:trough + 1]
+    peak_index = int(np.argmax(before)) if before.max() > 0 else None
+    return {"value": float(drawdown[trough]), "peak_index": peak_index, "trough_index": trough}
+
+class EquityCurveEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[Dict] = None
+        self._result: Optional[Dict] = None
+        self.last_build: Dict = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._state = None
+            self._result = None
+
+    def get(self, trades: List, closes: Dict[str, pd.Series], sectors: Dict[str, str]) -> Dict:
+        """
+        trades: TradeHistory rows; closes: symbol -> daily Close series (tz-naive
+        DatetimeIndex); sectors: symbol -> sector. Returns the columnar curve.
+        """
+        start = time.perf_counter()
+        sorted_trades = sorted(trades, key=lambda t: (t.trade_date, t.id or 0))
+        keys = [_trade_key(t) for t in sorted_trades]
+        trade_dates = pd.to_datetime([t.trade_date for t in sorted_trades]).normalize().values
+        sectors = {sym: sectors.get(sym) or UNKNOWN_SECTOR for sym in {t.symbol for t in sorted_trades}}
+        bars = {sym: (s.index[-1], float(s.iloc[-1])) for sym, s in closes.items() if len(s)}
+
+        with self._lock:
+            state = self._state
+            if state is not None and state["keys"] == keys and state["bars"] == bars and state["sectors"] == sectors:
+                self.last_build = {"mode": "cached", "ms": round((time.perf_counter() - start) * 1000, 2)}
+                return self._result
+
+            mode = "full"
+            if state is not None and self._can_extend(state, keys, trade_dates, closes, sectors):
+                mode = "incremental"
+                state = self._build(sorted_trades, keys, trade_dates, closes, sectors, previous=state)
+            else:
+                state = self._build(sorted_trades, keys, trade_dates, closes, sectors)
+            state["bars"] = bars
+            self._state = state
+            self._result = self._to_response(state)
+            self.last_build = {
+                "mode": mode,
+                "days_computed": state["days_computed"],
+                "ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            return self._result
+
+    def _can_extend(self, state, keys, trade_dates, closes, sectors) -> bool:
+        old_keys = state["keys"]
+        resume = state["resume"]
+        if resume is None or len(keys) < len(old_keys) or keys[:len(old_keys)] != old_keys:
+            return False
+        # Only trades dated on/after the resume day may be added
+        if (trade_dates[len(old_keys):] < resume).any():
+            return False
+        if any(state["sectors"].get(sym, sector) != sector for sym, sector in sectors.items()):
+            return False
+        # Past bars must be unchanged (a refetch after a split rewrites history)
+        for sym, anchor in state["anchors"].items():
+            series = closes.get(sym)
+            pos = series.index.searchsorted(resume) - 1 if series is not None else -1
+            if pos < 0 or not np.isclose(float(series.iloc[pos]), anchor):
+                return False
+        return True
+
+    def _build(self, sorted_trades, keys, trade_dates, closes, sectors, previous: Optional[Dict] = None) -> Dict:
+        if previous is not None:
+            resume = previous["resume"]
+            carry = previous["carry"]
+        else:
+            resume = trade_dates.min() if len(trade_dates) else None
+            carry = {}
+        if resume is None:
+            return self._empty(keys, sectors)
+        resume = np.datetime64(resume, "ns")
+
+        # Only trades dated on/after the resume day are replayed; earlier ones are in carry
+        first = int(np.searchsorted(trade_dates, resume, side="left"))
+        by_symbol = defaultdict(list)
+        for i in range(first, len(sorted_trades)):
+            by_symbol[sorted_trades[i].symbol].append(i)
+
+        # Trading-day calendar from the resume day: every stored bar, plus trade
+        # dates after the newest bar so today's fills show up before its close.
+        bar_dates = [s.index.values[s.index.searchsorted(resume):] for s in closes.values()]
+        calendar = np.unique(np.concatenate(bar_dates)) if bar_dates else np.array([], dtype="datetime64[ns]")
+        # Next incremental run restarts at the newest bar (late trade days are provisional)
+        next_resume = calendar[-1] if len(calendar) else resume
+        late = trade_dates[first:][trade_dates[first:] > next_resume]
+        if len(late) or not len(calendar):
+            calendar = np.union1d(calendar, late if len(calendar) else trade_dates[first:])
+        n_days = len(calendar)
+        day_range = np.arange(n_days)
+
+        totals = {name: np.zeros(n_days) for name in SERIES}
+        exposure = defaultdict(lambda: np.zeros(n_days))
+        new_carry, anchors = {}, {}
+
+        for sym in set(by_symbol) | set(carry):
+            positions = by_symbol.get(sym, [])
+            start_state = carry.get(sym, (0.0, 0.0, 0.0))
+            after = replay([sorted_trades[i] for i in positions], start_state)
+            sym_dates = trade_dates[positions]
+            trade_days = np.searchsorted(calendar, sym_dates, side="left")
+
+            # State in effect at the close of each day: after the last trade on or before it
+            last = np.searchsorted(trade_days, day_range, side="right") - 1
+            if len(after):
+                state = np.where((last >= 0)[:, None], after[np.maximum(last, 0)], np.array(start_state))
+            else:
+                state = np.tile(np.array(start_state), (n_days, 1))
+            qty, cost, realized = state[:, 0], state[:, 1], state[:, 2]
+
+            # Close as of each day (forward-filled); no bar yet -> valued at cost
+            price = np.full(n_days, np.nan)
+            series = closes.get(sym)
+            if series is not None and len(series):
+                values = series.to_numpy(dtype=float)
+                pos = np.searchsorted(series.index.values, calendar, side="right") - 1
+                price = np.where(pos >= 0, values[np.maximum(pos, 0)], np.nan)
+                before = series.index.searchsorted(next_resume) - 1
+                if before >= 0:
+                    anchors[sym] = float(values[before])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                price = np.where(np.isnan(price), np.where(qty > 0, cost / np.where(qty > 0, qty, 1), 0.0), price)
+            value = qty * price
+
+            totals["market_value"] += value
+            totals["cost_basis"] += cost
+            totals["realized_pl"] += realized
+            totals["unrealized_pl"] += np.where(qty > 0, value - cost, 0.0)
+            exposure[sectors.get(sym, UNKNOWN_SECTOR)] += value
+
+            # Carry for the next incremental run: state after the trades dated before next_resume
+            done = int(np.searchsorted(sym_dates, next_resume, side="left"))
+            new_carry[sym] = tuple(after[done - 1]) if done else start_state
+
+        dates = pd.DatetimeIndex(calendar)
+        if previous is not None:
+            keep = int(previous["dates"].searchsorted(resume))
+            dates = previous["dates"][:keep].append(dates)
+            totals = {name: np.concatenate([previous["series"][name][:keep], totals[name]]) for name in SERIES}
+            exposure = {
+                name: np.concatenate([
+                    previous["exposure"].get(name, np.zeros(keep))[:keep],
+                    exposure.get(name, np.zeros(n_days)),
+                ])
+                for name in set(previous["exposure"]) | set(exposure)
+            }
+
+        return {
+            "keys": keys,
+            "sectors": dict(sectors),
+            "dates": dates,
+            "resume": next_resume,
+            "series": totals,
+            "exposure": dict(exposure),
+            "carry": new_carry,
+            "anchors": anchors,
+            "days_computed": n_days,
+        }
+
+    def _empty(self, keys, sectors) -> Dict:
+        return {
+            "keys": keys, "sectors": dict(sectors), "dates": pd.DatetimeIndex([]), "resume": None,
+            "series": {name: np.zeros(0) for name in SERIES}, "exposure": {},
+            "carry": {}, "anchors": {}, "days_computed": 0,
+        }
+
+    def _to_response(self, state: Dict) -> Dict:
+        series = state["series"]
+        equity = series["realized_pl"] + series["unrealized_pl"]
+        peak = np.maximum(np.maximum.accumulate(equity), 0.0) if len(equity) else equity
+        dd = max_drawdown(equity)
+        dates = state["dates"].strftime("%Y-%m-%d").tolist()
+
+        def column(values):
+            return np.round(values, 2).tolist()
+
+        exposure = sorted(state["exposure"].items(), key=lambda kv: -kv[1][-1] if len(kv[1]) else 0)
+        last = (lambda name: float(series[name][-1]) if len(dates) else 0.0)
+        return {
+            "dates": dates,
+            "equity": column(equity),
+            "drawdown": column(equity - peak),
+            **{name: column(values) for name, values in series.items()},
+            "exposure": {
+                "sectors": [name for name, _ in exposure],
+                "values": [column(values) for _, values in exposure],
+            },
+            "summary": {
+                "days": len(dates),
+                "total_pl": round(last("realized_pl") + last("unrealized_pl"), 2),
+                "realized_pl": round(last("realized_pl"), 2),
+                "unrealized_pl": round(last("unrealized_pl"), 2),
+                "market_value": round(last("market_value"), 2),
+                "max_drawdown": round(dd["value"], 2),
+                "max_drawdown_peak": dates[dd["peak_index"]] if dd["peak_index"] is not None else None,
+                "max_drawdown_trough": dates[dd["trough_index"]] if dd["trough_index"] is not None else None,
+            },
+        }
+
+    def get_stats(self) -> Dict:
+        return dict(self.last_build)
+
+equity_curve = EquityCurveEngine()
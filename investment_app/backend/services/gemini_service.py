@@ -18,10 +18,73 @@ os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
 import subprocess
 from selenium import webdriver
+from .driver_pool import DriverPool, PooledDriver, DriverUnavailable
+
+# Number of long-lived browser tabs shared by Gemini requests
+DRIVER_POOL_SIZE = 2
+# Results the internals return instead of raising; the tab that produced them is recycled
+SESSION_ERROR_PREFIXES = ("Error:", "Scraping error:", "Research Timed Out")
+
+class SessionFailed(Exception):
+    """Raised inside pool.borrow() so the pool discards the tab; carries the caller's result."""
+    def __init__(self, result: str):
+        super().__init__(result)
+        self.result = result
 
 class GeminiService:
     def __init__(self):
-        self.driver = None
+        self.pool = DriverPool(
+            factory=self._create_session,
+            closer=self._close_session,
+            health_check=self._is_session_healthy,
+            size=DRIVER_POOL_SIZE,
+            max_uses=50,
+            max_age_seconds=3600
+        )
+
+    def _create_session(self):
+        """Attach to the running Chrome and open a dedicated tab for this pooled session."""
+        driver = self._setup_driver()
+        if not driver:
+            return None
+        driver.switch_to.new_window('tab')
+        return PooledDriver(driver, driver.current_window_handle)
+
+    def _is_session_healthy(self, session: PooledDriver) -> bool:
+        handles = session.driver.window_handles
+        if session.handle not in handles:
+            return False
+        session.driver.switch_to.window(session.handle)
+        return True
+
+    def _close_session(self, session: PooledDriver):
+        # Close only our own tab. Do NOT quit driver as it closes the persistent browser instance.
+        try:
+            handles = session.driver.window_handles
+            if session.handle in handles and len(handles) > 1:
+                session.driver.switch_to.window(session.handle)
+                session.driver.close()
+        finally:
+            # Each session attached through its own chromedriver process: stop it
+            # (the browser keeps running), or every recycle leaks one
+            service = getattr(session.driver, "service", None)
+            if service is not None:
+                service.stop()
+
+    def _run_pooled(self, func, *args) -> str:
+        """
+        Run func(driver, *args) on a pooled tab. The internals return "Error: ..."
+        strings instead of raising, so such a result is raised as SessionFailed inside
+        borrow() and the (possibly dead or hung) tab is recycled instead of reused.
+        """
+        try:
+            with self.pool.borrow() as driver:
+                result = func(driver, *args)
+                if isinstance(result, str) and result.startswith(SESSION_ERROR_PREFIXES):
+                    raise SessionFailed(result)
+                return result
+        except SessionFailed as e:
+            return e.result
 
     def _setup_driver(self):
         try:
@@ -46,10 +109,12 @@ class GeminiService:
         Run Gemini Deep Research for the symbol.
         Returns the result text or status.
         """
-        driver = self._setup_driver()
-        if not driver:
+        try:
+            return self._run_pooled(self._analyze_stock, symbol, prompt)
+        except DriverUnavailable:
             return "Failed to initialize driver (Cookie error?)"
-        
+
+    def _analyze_stock(self, driver, symbol: str, prompt: str):
         result_text = "Analysis Failed"
         
         try:
@@ -153,10 +218,12 @@ class GeminiService:
         Generate content using Gemini (standard chat).
         Returns the generated text.
         """
-        driver = self._setup_driver()
-        if not driver:
+        try:
+            return self._run_pooled(self._generate_content, prompt)
+        except DriverUnavailable:
             return "Error: Driver setup failed"
-        
+
+    def _generate_content(self, driver, prompt: str) -> str:
         result_text = ""
         max_retries = 3
         
@@ -276,10 +343,12 @@ class GeminiService:
         """
         Generate content using Gemini with an image attachment (Multimodal).
         """
-        driver = self._setup_driver()
-        if not driver:
+        try:
+            return self._run_pooled(self._generate_content_with_image, prompt, image_path)
+        except DriverUnavailable:
             return "Error: Driver setup failed"
-        
+
+    def _generate_content_with_image(self, driver, prompt: str, image_path: str) -> str:
         result_text = ""
         max_retries = 3
         for attempt in range(max_retries):
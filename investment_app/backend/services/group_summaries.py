@@ -0,0 +1,150 @@
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from ..database import engine, Stock, StockGroup, StockGroupMember, GroupSummary
+from .screener import holdings_subquery
+from .metric_snapshots import SIGNAL_BITS
+
+CHANGE_PERIODS = {"1d": "change_percentage_1d", "5d": "change_percentage_5d", "20d": "change_percentage_20d",
+                  "50d": "change_percentage_50d", "200d": "change_percentage_200d"}
+# Per-stock return minus ^GSPC over the same period (set by UpdateManager)
+RS_PERIODS = {"5d": "rs_5d", "20d": "rs_20d", "50d": "rs_50d", "200d": "rs_200d"}
+SIGNAL_COLUMNS = [f"signal_{name}" for name in SIGNAL_BITS]
+HOLDING_EPSILON = 0.0001
+
+def _round(value, digits=2):
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+def _averages(values: pd.Series, weights: np.ndarray) -> Dict:
+    """Equal-weighted mean over members with a value, and holding-value-weighted mean."""
+    valid = values.notna().to_numpy()
+    w = weights[valid]
+    return {
+        "average": _round(values.mean()),
+        "weighted": _round(np.dot(w, values.to_numpy()[valid]) / w.sum()) if w.sum() > 0 else None,
+    }
+
+def _summarize(group: StockGroup, df: pd.DataFrame) -> Dict:
+    qty = df["qty"].fillna(0.0).clip(lower=0.0)
+    qty = qty.where(qty > HOLDING_EPSILON, 0.0)
+    value = (qty * df["current_price"].fillna(0.0)).to_numpy()
+    total = float(value.sum())
+
+    members = [
+        {
+            "symbol": sym,
+            "company_name": name,
+            "quantity": _round(q, 4),
+            "value": _round(v),
+            "weight": _round(v / total * 100) if total > 0 else None,
+        }
+        for sym, name, q, v in zip(df["symbol"], df["company_name"], qty, value)
+    ]
+    members.sort(key=lambda m: (-(m["value"] or 0), m["symbol"]))
+
+    hits = df[SIGNAL_COLUMNS].fillna(0).astype(bool).sum()
+    return {
+        "group_id": group.id,
+        "name": group.name,
+        "group_type": group.group_type,
+        "member_count": int(len(df)),
+        "held_count": int((qty > 0).sum()),
+        "total_value": round(total, 2),
+        "members": members,
+        "changes": {period: _averages(df[col], value) for period, col in CHANGE_PERIODS.items()},
+        "relative_strength": {period: _averages(df[col], value) for period, col in RS_PERIODS.items()},
+        "rs_rank_average": _round(df["rs_rank"].mean(), 1),
+        "signals": {col[len("signal_"):]: int(n) for col, n in hits.items() if n},
+        "computed_at": datetime.utcnow().isoformat() + "Z",
+    }
+
+class GroupSummaryService:
+    """
+    Aggregate metrics per StockGroup for /groups/{id}/summary.
+
+    summarize() loads every member of the requested groups with the metric columns
+    and the holdings aggregate in one SELECT and groups in pandas. refresh_all()
+    runs it for all groups after an update and stores the payloads, so the
+    portfolio/watchlist tabs read one row instead of recomputing.
+    """
+    def __init__(self):
+        self.last_refresh: Dict = {}
+
+    def summarize(self, session: Session, group_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        groups_query = select(StockGroup)
+        if group_ids is not None:
+            groups_query = groups_query.where(StockGroup.id.in_(list(group_ids)))
+        groups = session.exec(groups_query).all()
+        if not groups:
+            return {}
+
+        holdings = holdings_subquery()
+        metric_columns = ["current_price", *CHANGE_PERIODS.values(), *RS_PERIODS.values(), "rs_rank", *SIGNAL_COLUMNS]
+        query = (
+            select(StockGroupMember.group_id, StockGroupMember.symbol, Stock.company_name,
+                   *[getattr(Stock, c) for c in metric_columns], holdings.c.qty)
+            # Members may reference symbols that were never registered: keep them, without metrics
+            .outerjoin(Stock, Stock.symbol == StockGroupMember.symbol)
+            .outerjoin(holdings, holdings.c.symbol == StockGroupMember.symbol)
+            .where(StockGroupMember.group_id.in_([g.id for g in groups]))
+        )
+        names = ["group_id", "symbol", "company_name", *metric_columns, "qty"]
+        df = pd.DataFrame.from_records(session.exec(query).all(), columns=names)
+        for col in ["current_price", "qty", "rs_rank", *CHANGE_PERIODS.values(), *RS_PERIODS.values()]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+        members_by_group = {gid: part for gid, part in df.groupby("group_id", sort=False)}
+        empty = df.iloc[0:0]
+        return {g.id: _summarize(g, members_by_group.get(g.id, empty)) for g in groups}
+
+    def refresh_all(self) -> Dict:
+        """Recompute and store the summary of every group in one transaction."""
+        start = time.perf_counter()
+        with Session(engine) as session:
+            summaries = self.summarize(session)
+            session.execute(delete(GroupSummary))
+            now = datetime.utcnow()
+            session.add_all([
+                GroupSummary(group_id=gid, member_count=s["member_count"], summary_json=json.dumps(s), computed_at=now)
+                for gid, s in summaries.items()
+            ])
+            session.commit()
+        self.last_refresh = {"groups": len(summaries), "seconds": round(time.perf_counter() - start, 4)}
+        print(f"[GroupSummary] {self.last_refresh}")
+        return self.last_refresh
+
+    def get(self, session: Session, group_id: int) -> Optional[Dict]:
+        """Stored summary, computed (and stored) on demand when missing. None if no such group."""
+        row = session.get(GroupSummary, group_id)
+        if row is not None:
+            return json.loads(row.summary_json)
+        summary = self.summarize(session, [group_id]).get(group_id)
+        if summary is None:
+            return None
+        session.merge(GroupSummary(group_id=group_id, member_count=summary["member_count"], summary_json=json.dumps(summary)))
+        session.commit()
+        return summary
+
+    def invalidate(self, session: Session, group_id: int):
+        """Drop a group's stored summary (membership changed); caller commits."""
+        session.execute(delete(GroupSummary).where(GroupSummary.group_id == group_id))
+
+    def invalidate_symbols(self, session: Session, symbols: Iterable[str]):
+        """
+        Drop the stored summaries of every group holding one of the symbols; caller commits.
+        Trades were written for them, so quantities, values and weights are stale.
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return
+        groups = select(StockGroupMember.group_id).where(StockGroupMember.symbol.in_(symbols))
+        session.execute(delete(GroupSummary).where(GroupSummary.group_id.in_(groups)))
+
+group_summaries = GroupSummaryService()
@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, select, func
+
+from ..database import engine, Stock, TradeHistory, stock_is_listed
+from .screener import holdings_subquery
+from .metric_snapshots import SIGNAL_BITS
+
+CHANGE_COLUMNS = {"1d": "change_percentage_1d", "5d": "change_percentage_5d", "20d": "change_percentage_20d"}
+SIGNAL_COLUMNS = [f"signal_{name}" for name in SIGNAL_BITS]
+# Leaf columns, sent once per response instead of as keys on every leaf
+LEAF_COLUMNS = ["symbol", "company_name", "market_cap", "change_1d", "change_5d", "change_20d", "held"]
+HOLDING_EPSILON = 0.0001
+
+def _round(value, digits=2):
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+def _aggregate(group: pd.DataFrame) -> Dict:
+    """Aggregates of one sector/industry: cap-weighted changes, breadth, signal hits."""
+    result = {
+        "count": int(len(group)),
+        "market_cap": float(group["market_cap"].sum()),
+    }
+    for period, col in CHANGE_COLUMNS.items():
+        valid = group[col].notna()
+        weight = group.loc[valid, "market_cap"].to_numpy()
+        total = weight.sum()
+        result[f"change_{period}"] = _round(np.dot(weight, group.loc[valid, col].to_numpy()) / total) if total > 0 else None
+    change = group["change_percentage_1d"]
+    result["advancers"] = int((change > 0).sum())
+    result["decliners"] = int((change < 0).sum())
+    result["breadth_pct"] = _round(result["advancers"] / len(group) * 100, 1) if len(group) else None
+    hits = group[SIGNAL_COLUMNS].fillna(0).astype(bool).sum()
+    result["signals"] = {col[len("signal_"):]: int(n) for col, n in hits.items() if n}
+    return result
+
+class HeatmapCache:
+    """
+    Sector/industry aggregates for /analytics/heatmap.
+
+    One SELECT (Stock columns + outer-joined trade aggregate for the held flag),
+    one pandas groupby. Results are kept until UpdateManager finishes its next run
+    (invalidate()) or the data version changes: every Stock write (PUT, hide,
+    create, enrichment, trade import) bumps Stock.updated_at, deletes change the
+    row count and trade imports the trade count. The version probe is two indexed
+    aggregates, far cheaper than a rebuild.
+    """
+    def __init__(self):
+        self._cache: Dict[tuple, Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _version(self) -> tuple:
+        with Session(engine) as session:
+            stocks = session.exec(select(func.max(Stock.updated_at), func.count(Stock.symbol))).one()
+            trades = session.exec(select(func.count(TradeHistory.id))).one()
+        return (stocks[0], stocks[1], trades)
+
+    def get(self, asset_type: str = "stock", max_cap: Optional[float] = None, leaves: bool = True) -> Dict:
+        key = (asset_type, max_cap, leaves)
+        version = self._version()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        result = self._build(asset_type, max_cap, leaves)
+        with self._lock:
+            self._cache[key] = (version, result)
+        return result
+
+    def get_stats(self) -> Dict:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def _load_frame(self, asset_type: str, max_cap: Optional[float]) -> pd.DataFrame:
+        holdings = holdings_subquery()
+        columns = [Stock.symbol, Stock.company_name, Stock.sector, Stock.industry, Stock.market_cap] + \
+                  [getattr(Stock, c) for c in CHANGE_COLUMNS.values()] + \
+                  [getattr(Stock, c) for c in SIGNAL_COLUMNS] + [holdings.c.qty]
+        query = (
+            select(*columns)
+            .outerjoin(holdings, holdings.c.symbol == Stock.symbol)
+            .where(Stock.is_hidden == False)
+            .where(stock_is_listed())
+            .where(Stock.sector.is_not(None))
+            .where(Stock.market_cap > 0)
+        )
+        if asset_type:
+            query = query.where(Stock.asset_type == asset_type)
+        if max_cap:
+            query = query.where(Stock.market_cap <= max_cap)
+        with Session(engine) as session:
+            rows = session.exec(query).all()
+        names = ["symbol", "company_name", "sector", "industry", "market_cap"] + \
+                list(CHANGE_COLUMNS.values()) + SIGNAL_COLUMNS + ["qty"]
+        df = pd.DataFrame.from_records(rows, columns=names)
+        df["industry"] = df["industry"].fillna("Unknown")
+        for col in ["market_cap", "qty"] + list(CHANGE_COLUMNS.values()):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        return df
+
+    def _build(self, asset_type: str, max_cap: Optional[float], leaves: bool) -> Dict:
+        start = time.perf_counter()
+        df = self._load_frame(asset_type, max_cap)
+        sectors = []
+        for sector, sector_df in df.groupby("sector", sort=False):
+            node = {"name": sector, **_aggregate(sector_df), "industries": []}
+            for industry, industry_df in sector_df.groupby("industry", sort=False):
+                child = {"name": industry, **_aggregate(industry_df)}
+                if leaves:
+                    child["leaves"] = [
+                        [r.symbol, r.company_name, float(r.market_cap), _round(r.change_percentage_1d),
+                         _round(r.change_percentage_5d), _round(r.change_percentage_20d),
+                         bool((r.qty or 0) > HOLDING_EPSILON)]
+                        for r in industry_df.sort_values("market_cap", ascending=False).itertuples(index=False)
+                    ]
+                node["industries"].append(child)
+            node["industries"].sort(key=lambda n: n["market_cap"], reverse=True)
+            sectors.append(node)
+        sectors.sort(key=lambda n: n["market_cap"], reverse=True)
+
+        return {
+            "total": _aggregate(df) if len(df) else {"count": 0},
+            "sectors": sectors,
+            "leaf_columns": LEAF_COLUMNS if leaves else None,
+            "built_in_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+heatmap_cache = HeatmapCache()
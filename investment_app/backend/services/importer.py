@@ -6,6 +6,8 @@ from sqlmodel import Session, select
 from ..database import engine, Stock, TradeHistory
 from .stock_service import stock_service
 from .signals import get_signal_functions
+from . import bulk_symbols
+from .group_summaries import group_summaries
 
 class Importer:
     def __init__(self):
@@ -259,6 +261,7 @@ class Importer:
         # "売買方向","銘柄コード","銘柄名","価格","数量","約定日時"
         
         imported_count = 0
+        imported_symbols = set()
         with Session(engine) as session:
             # Encoding check - Japanese Windows CSV often Shift-JIS
             try:
@@ -389,11 +392,15 @@ class Importer:
                         trade_date=trade_date
                     )
                     session.add(trade)
+                    imported_symbols.add(symbol)
                     imported_count += 1
                 except Exception as e:
                     print(f"Error importing row: {e}")
                     continue
             
+            # Holdings/P&L in the list rows changed (/stocks/changes)
+            bulk_symbols.touch_stocks(session, imported_symbols)
+            group_summaries.invalidate_symbols(session, imported_symbols)
             session.commit()
         return imported_count
 
@@ -0,0 +1,373 @@
+"""
+Declarative technical indicators.
+
+Each indicator declares its output column, its inputs and its window. An
+IndicatorRegistry computes its indicators for a whole frame with vectorized
+pandas (the reference results), or seeds rolling state from the bars before a
+given position and appends further bars at O(1) per indicator: running sums for
+moving averages, a monotonic deque for rolling highs, the previous value for
+slopes. StockService uses the latter to re-enrich a refetched frame whose
+history is unchanged by computing only the new / changed tail bars; rebase()
+handles a window whose start moved.
+"""
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NAN = float("nan")
+
+def _div(a: float, b: float) -> float:
+    """a / b with pandas semantics (x/0 -> +-inf, 0/0 -> NaN)."""
+    if b == 0:
+        if a == 0 or math.isnan(a):
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+def _warm_up(values: np.ndarray, bars: int) -> np.ndarray:
+    """values with the first `bars` set to NaN (not enough history yet)."""
+    out = values.copy()
+    out[:bars] = NAN
+    return out
+
+class _Window:
+    """Last `window` values with a running sum and NaN count."""
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+
+    def push(self, x: float):
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+        self.values.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+
+    @classmethod
+    def from_values(cls, window: int, values: np.ndarray) -> "_Window":
+        """State after pushing `values` (at most `window` of them), without the per-value loop."""
+        state = cls(window)
+        state.values = deque(values.tolist())
+        nan_mask = np.isnan(values)
+        state.nans = int(nan_mask.sum())
+        state.total = float(values[~nan_mask].sum())
+        return state
+
+    def mean(self) -> float:
+        # rolling(window).mean(): NaN until the window is full of non-NaN values
+        if len(self.values) < self.window or self.nans:
+            return NAN
+        return self.total / self.window
+
+class _MaxWindow:
+    """Rolling max over the last `window` values via a monotonic (decreasing) deque."""
+    def __init__(self, window: int):
+        self.window = window
+        self.count = 0
+        self.candidates = deque() # (position, value), values decreasing
+        self.nan_positions = deque()
+
+    def push(self, x: float):
+        pos = self.count
+        self.count += 1
+        start = pos - self.window + 1
+        while self.candidates and self.candidates[0][0] < start:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] < start:
+            self.nan_positions.popleft()
+        if math.isnan(x):
+            self.nan_positions.append(pos)
+            return
+        while self.candidates and self.candidates[-1][1] <= x:
+            self.candidates.pop()
+        self.candidates.append((pos, x))
+
+    @classmethod
+    def from_values(cls, window: int, values: np.ndarray, end: int) -> "_MaxWindow":
+        """State after pushing bars [end - len(values), end) (at most `window` of them)."""
+        state = cls(window)
+        state.count = end
+        offset = end - len(values)
+        nan_mask = np.isnan(values)
+        state.nan_positions = deque((np.flatnonzero(nan_mask) + offset).tolist())
+        # Candidates: values strictly greater than everything after them
+        filled = np.where(nan_mask, -np.inf, values)
+        later_max = np.concatenate([np.maximum.accumulate(filled[::-1])[::-1][1:], [-np.inf]])
+        keep = np.flatnonzero(~nan_mask & (filled > later_max))
+        state.candidates = deque(zip((keep + offset).tolist(), values[keep].tolist()))
+        return state
+
+    def max(self) -> float:
+        if self.count < self.window or self.nan_positions or not self.candidates:
+            return NAN
+        return self.candidates[0][1]
+
+class SMA:
+    """Simple moving average of `source` over `window` bars."""
+    def __init__(self, name: str, source: str, window: int):
+        self.name, self.source, self.window = name, source, window
+        self.inputs = (source,)
+
+    def batch(self, data: pd.DataFrame) -> pd.Series:
+        return data[self.source].rolling(window=self.window).mean()
+
+    def new_state(self):
+        return _Window(self.window)
+
+    def update(self, state: _Window, row: Dict[str, float]) -> float:
+        state.push(row[self.source])
+        return state.mean()
+
+    def seed(self, cols: Dict[str, np.ndarray], end: int) -> _Window:
+        return _Window.from_values(self.window, cols[self.source][max(0, end - self.window):end])
+
+    def rebase(self, cols: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        return _warm_up(cols[self.name][:n], self.window - 1)
+
+class RollingMax:
+    """Highest `source` over the last `window` bars."""
+    def __init__(self, name: str, source: str, window: int):
+        self.name, self.source, self.window = name, source, window
+        self.inputs = (source,)
+
+    def batch(self, data: pd.DataFrame) -> pd.Series:
+        return data[self.source].rolling(window=self.window).max()
+
+    def new_state(self):
+        return _MaxWindow(self.window)
+
+    def update(self, state: _MaxWindow, row: Dict[str, float]) -> float:
+        state.push(row[self.source])
+        return state.max()
+
+    def seed(self, cols: Dict[str, np.ndarray], end: int) -> _MaxWindow:
+        return _MaxWindow.from_values(self.window, cols[self.source][max(0, end - self.window):end], end)
+
+    def rebase(self, cols: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        return _warm_up(cols[self.name][:n], self.window - 1)
+
+class Deviation:
+    """(Close - MA) / MA * 100 for an MA declared earlier in the registry."""
+    window = 1
+    def __init__(self, name: str, ma: str, price: str = "Close"):
+        self.name, self.ma, self.price = name, ma, price
+        self.inputs = (price, ma)
+
+    def batch(self, data: pd.DataFrame) -> pd.Series:
+        return ((data[self.price] - data[self.ma]) / data[self.ma]) * 100
+
+    def new_state(self):
+        return None
+
+    def update(self, state, row: Dict[str, float]) -> float:
+        return _div(row[self.price] - row[self.ma], row[self.ma]) * 100
+
+    def seed(self, cols: Dict[str, np.ndarray], end: int):
+        return None
+
+    def rebase(self, cols: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        price, ma = cols[self.price][:n], cols[self.ma][:n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (price - ma) / ma * 100
+
+class Slope:
+    """Daily change of an MA relative to the price: (MA - MA[-1]) / Close * 10000."""
+    window = 2
+    def __init__(self, name: str, ma: str, price: str = "Close"):
+        self.name, self.ma, self.price = name, ma, price
+        self.inputs = (price, ma)
+
+    def batch(self, data: pd.DataFrame) -> pd.Series:
+        return ((data[self.ma] - data[self.ma].shift(1)) / data[self.price]) * 10000
+
+    def new_state(self):
+        return [NAN] # previous MA value
+
+    def update(self, state: List[float], row: Dict[str, float]) -> float:
+        value = _div(row[self.ma] - state[0], row[self.price]) * 10000
+        state[0] = row[self.ma]
+        return value
+
+    def seed(self, cols: Dict[str, np.ndarray], end: int) -> List[float]:
+        return [float(cols[self.ma][end - 1]) if end else NAN]
+
+    def rebase(self, cols: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        ma, price = cols[self.ma][:n], cols[self.price][:n]
+        prev = np.concatenate([[NAN], ma[:-1]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (ma - prev) / price * 10000
+
+class ATR:
+    """Average true range over `window` bars (high/low vs previous close)."""
+    def __init__(self, name: str, window: int):
+        self.name, self.window = name, window
+        self.inputs = ("High", "Low", "Close")
+
+    def batch(self, data: pd.DataFrame) -> pd.Series:
+        prev_close = data["Close"].shift(1)
+        tr = pd.concat([
+            data["High"] - data["Low"],
+            (data["High"] - prev_close).abs(),
+            (data["Low"] - prev_close).abs(),
+        ], axis=1).max(axis=1)
+        return tr.rolling(window=self.window).mean()
+
+    def new_state(self):
+        return {"prev_close": NAN, "window": _Window(self.window)}
+
+    def update(self, state, row: Dict[str, float]) -> float:
+        high, low, prev = row["High"], row["Low"], state["prev_close"]
+        # DataFrame.max(axis=1) skips NaN
+        parts = [v for v in (high - low, abs(high - prev), abs(low - prev)) if not math.isnan(v)]
+        state["window"].push(max(parts) if parts else NAN)
+        state["prev_close"] = row["Close"]
+        return state["window"].mean()
+
+    def seed(self, cols: Dict[str, np.ndarray], end: int):
+        lo = max(0, end - self.window)
+        high, low, close = (cols[c][lo:end] for c in ("High", "Low", "Close"))
+        prev_close = np.concatenate([[cols["Close"][lo - 1] if lo else NAN], close[:-1]])
+        # fmax skips NaN like DataFrame.max(axis=1)
+        tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        return {"prev_close": float(close[-1]) if end else NAN, "window": _Window.from_values(self.window, tr)}
+
+    def rebase(self, cols: Dict[str, np.ndarray], n: int) -> np.ndarray:
+        out = _warm_up(cols[self.name][:n], self.window - 1)
+        if n >= self.window:
+            # The first full window has no close before its first bar any more
+            high, low, close = (cols[c][:self.window] for c in ("High", "Low", "Close"))
+            prev_close = np.concatenate([[NAN], close[:-1]])
+            tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+            out[self.window - 1] = tr.mean()
+        return out
+
+class IndicatorState:
+    """Rolling state of every indicator of a registry, advanced one bar at a time."""
+    def __init__(self, registry: "IndicatorRegistry"):
+        self.registry = registry
+        self.states = [ind.new_state() for ind in registry.indicators]
+
+    def append(self, bar: Dict[str, float]) -> Dict[str, float]:
+        """Feed one bar (input columns -> value); returns the indicator values for it."""
+        row = {col: float(bar[col]) for col in self.registry.sources}
+        for ind, state in zip(self.registry.indicators, self.states):
+            row[ind.name] = ind.update(state, row)
+        return {ind.name: row[ind.name] for ind in self.registry.indicators}
+
+class IndicatorRegistry:
+    """
+    Ordered set of indicators; an indicator may use the output of one declared
+    before it (Deviation / Slope of an SMA).
+    """
+    def __init__(self, indicators):
+        self.indicators = list(indicators)
+        names = {ind.name for ind in self.indicators}
+        self.sources = sorted({col for ind in self.indicators for col in ind.inputs if col not in names})
+        self.columns = self.sources + self.names()
+        # Bars of history that fully determine the state (the widest window plus the slope lag)
+        self.lookback = max((ind.window for ind in self.indicators), default=0) + 1
+
+    def names(self) -> List[str]:
+        return [ind.name for ind in self.indicators]
+
+    def usable(self, data: pd.DataFrame) -> "IndicatorRegistry":
+        """The indicators whose inputs are present (e.g. no Volume MAs without Volume)."""
+        available = set(data.columns)
+        kept = []
+        for ind in self.indicators:
+            if all(col in available for col in ind.inputs):
+                kept.append(ind)
+                available.add(ind.name)
+        return self if len(kept) == len(self.indicators) else IndicatorRegistry(kept)
+
+    def compute(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Add every indicator column to the frame (vectorized, full history)."""
+        for ind in self.indicators:
+            data[ind.name] = ind.batch(data)
+        return data
+
+    def block(self, enriched: pd.DataFrame) -> np.ndarray:
+        """Inputs and outputs of an enriched frame as one float array (columns: self.columns)."""
+        return enriched[self.columns].to_numpy(dtype=float)
+
+    def seed(self, enriched, end: Optional[int] = None) -> IndicatorState:
+        """
+        State after bar end-1 (default: the last bar) of an enriched frame (or its
+        block()). Only the trailing `lookback` bars are read.
+        """
+        block = self.block(enriched) if isinstance(enriched, pd.DataFrame) else enriched
+        end = len(block) if end is None else end
+        lo = max(0, end - self.lookback)
+        cols = dict(zip(self.columns, block[lo:end].T))
+        state = IndicatorState(self)
+        state.states = [ind.seed(cols, end - lo) for ind in self.indicators]
+        for st in state.states:
+            if isinstance(st, _MaxWindow) and lo:
+                # Rolling-max positions are absolute
+                st.count += lo
+                st.nan_positions = deque(p + lo for p in st.nan_positions)
+                st.candidates = deque((p + lo, v) for p, v in st.candidates)
+        return state
+
+    def rebase(self, block: np.ndarray) -> np.ndarray:
+        """
+        block() of a frame whose oldest bars were dropped (a fixed-period refetch a day
+        later), with the values of the first `lookback` bars reset to what compute()
+        gives for the shortened frame: those bars no longer have the history before
+        them. Later bars keep their values.
+        """
+        n = min(self.lookback, len(block))
+        block = block.copy()
+        if n and self.indicators:
+            cols = dict(zip(self.columns, block[:n].T))
+            for ind in self.indicators:
+                cols[ind.name] = ind.rebase(cols, n)
+            block[:n, len(self.sources):] = np.column_stack([cols[name] for name in self.names()])
+        return block
+
+    def extend(self, enriched, raw: pd.DataFrame, start: int) -> pd.DataFrame:
+        """
+        `raw` with this registry's columns, where raw's first `start` bars are the
+        same as those of `enriched` (a frame or its block()): those rows are copied
+        and only rows [start:] computed, O(1) per bar and indicator.
+        """
+        previous = self.block(enriched) if isinstance(enriched, pd.DataFrame) else enriched
+        state = self.seed(previous, start)
+        names = self.names()
+        out = np.empty((len(raw), len(names)))
+        out[:start] = previous[:start, len(self.sources):]
+        for i, values in enumerate(raw[self.sources].to_numpy(dtype=float)[start:], start):
+            row = state.append(dict(zip(self.sources, values)))
+            out[i] = [row[name] for name in names]
+        stale = [name for name in names if name in raw.columns]
+        if stale:
+            raw = raw.drop(columns=stale)
+        return pd.concat([raw, pd.DataFrame(out, index=raw.index, columns=names)], axis=1)
+
+# Columns StockService adds to every OHLCV frame (signals, charts, deviation/slope metrics)
+PRICE_INDICATORS = IndicatorRegistry(
+    [SMA(f"Close_MA{w}", "Close", w) for w in (5, 20, 50, 200)]
+    + [Deviation(f"Deviation_MA{w}", f"Close_MA{w}") for w in (5, 20, 50, 200)]
+    + [Slope(f"Slope_MA{w}", f"Close_MA{w}") for w in (5, 20, 50, 200)]
+    + [SMA(f"Volume_MA{w}", "Volume", w) for w in (50, 200)]
+)
+
+# Chart moving averages per interval (mini charts, /stocks/{symbol}/chart)
+CHART_SMA_PERIODS = {"1d": [5, 20, 50, 100, 200], "1wk": [4, 10, 20, 40]}
+
+def chart_smas(interval: str = "1d", prefix: str = "SMA") -> IndicatorRegistry:
+    return IndicatorRegistry([SMA(f"{prefix}{p}", "Close", p) for p in CHART_SMA_PERIODS.get(interval, [])])
+
+# UpdateManager's atr_14 column
+ATR_14 = ATR("ATR14", 14)
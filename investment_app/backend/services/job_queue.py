@@ -0,0 +1,214 @@
+import threading
+import logging
+import traceback
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from sqlmodel import Session, select, text
+from ..database import engine, NightlyJob
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """
+    Persistent prioritized job queue backed by the NightlyJob table.
+
+    Handlers are registered per job_type with a concurrency limit. A handler
+    receives the symbol and raises on failure; failed jobs are retried with
+    exponential backoff until max_attempts is reached.
+    """
+    def __init__(self, backoff_base_seconds: int = 60):
+        self.handlers: Dict[str, Callable[[str], None]] = {}
+        self.limits: Dict[str, int] = {}
+        self.active: Dict[str, int] = {}
+        self.backoff_base_seconds = backoff_base_seconds
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+
+    def register(self, job_type: str, handler: Callable[[str], None], concurrency: int = 1):
+        self.handlers[job_type] = handler
+        self.limits[job_type] = max(1, concurrency)
+        self.active.setdefault(job_type, 0)
+
+    # --- Enqueue ---
+
+    def enqueue(self, job_type: str, symbols: List[str], priority: int = 100, max_attempts: int = 3) -> int:
+        """
+        Add jobs for symbols. Existing (job_type, symbol) rows are left untouched.
+        Returns the number of new jobs.
+        """
+        if not symbols:
+            return 0
+        now = datetime.utcnow()
+        rows = [{
+            "job_type": job_type, "symbol": sym, "priority": priority,
+            "max_attempts": max_attempts, "now": now
+        } for sym in symbols]
+        with Session(engine) as session:
+            result = session.exec(text("""
+                INSERT INTO nightlyjob (job_type, symbol, priority, status, attempts, max_attempts, next_run_at, created_at, updated_at)
+                VALUES (:job_type, :symbol, :priority, 'pending', 0, :max_attempts, :now, :now, :now)
+                ON CONFLICT(job_type, symbol) DO NOTHING
+            """), params=rows)
+            session.commit()
+            return result.rowcount if result.rowcount and result.rowcount > 0 else 0
+
+    def enqueue_query(self, job_type: str, symbol_sql: str, priority: int = 100, max_attempts: int = 3, params: Optional[dict] = None) -> int:
+        """
+        Seed jobs from a SQL query returning a single `symbol` column, in one statement.
+        """
+        now = datetime.utcnow()
+        bind = {"job_type": job_type, "priority": priority, "max_attempts": max_attempts, "now": now}
+        bind.update(params or {})
+        with Session(engine) as session:
+            result = session.exec(text(f"""
+                INSERT INTO nightlyjob (job_type, symbol, priority, status, attempts, max_attempts, next_run_at, created_at, updated_at)
+                SELECT :job_type, q.symbol, :priority, 'pending', 0, :max_attempts, :now, :now, :now
+                FROM ({symbol_sql}) AS q
+                WHERE 1
+                ON CONFLICT(job_type, symbol) DO NOTHING
+            """), params=bind)
+            session.commit()
+            return result.rowcount if result.rowcount and result.rowcount > 0 else 0
+
+    def purge_finished(self, older_than: timedelta):
+        """Delete done/failed jobs older than the given age so they can be re-seeded."""
+        cutoff = datetime.utcnow() - older_than
+        with Session(engine) as session:
+            session.exec(text(
+                "DELETE FROM nightlyjob WHERE status IN ('done', 'failed') AND updated_at < :cutoff"
+            ), params={"cutoff": cutoff})
+            session.commit()
+
+    def reset_stale_running(self):
+        """Jobs left 'running' by a crashed process go back to pending."""
+        with Session(engine) as session:
+            session.exec(text("UPDATE nightlyjob SET status = 'pending' WHERE status = 'running'"))
+            session.commit()
+
+    # --- Dequeue / Completion ---
+
+    def dequeue(self) -> Optional[NightlyJob]:
+        """
+        Claim the highest-priority runnable job whose type still has a free worker slot.
+        Uses the (status, priority, next_run_at) index.
+        """
+        with self._lock:
+            free_types = [t for t in self.handlers if self.active.get(t, 0) < self.limits[t]]
+            if not free_types:
+                return None
+            now = datetime.utcnow()
+            with Session(engine) as session:
+                job = session.exec(
+                    select(NightlyJob)
+                    .where(NightlyJob.status == "pending")
+                    .where(NightlyJob.next_run_at <= now)
+                    .where(NightlyJob.job_type.in_(free_types))
+                    .order_by(NightlyJob.priority.asc(), NightlyJob.next_run_at.asc())
+                    .limit(1)
+                ).first()
+                if not job:
+                    return None
+                job.status = "running"
+                job.attempts += 1
+                job.updated_at = now
+                session.add(job)
+                session.commit()
+                session.refresh(job)
+                session.expunge(job)
+            self.active[job.job_type] = self.active.get(job.job_type, 0) + 1
+            return job
+
+    def complete(self, job: NightlyJob):
+        self._finish(job, "done", None)
+
+    def fail(self, job: NightlyJob, error: str):
+        if job.attempts >= job.max_attempts:
+            self._finish(job, "failed", error)
+        else:
+            delay = self.backoff_base_seconds * (2 ** (job.attempts - 1))
+            self._finish(job, "pending", error, next_run_at=datetime.utcnow() + timedelta(seconds=delay))
+
+    def _finish(self, job: NightlyJob, status: str, error: Optional[str], next_run_at: Optional[datetime] = None):
+        with Session(engine) as session:
+            db_job = session.get(NightlyJob, job.id)
+            if db_job:
+                db_job.status = status
+                db_job.last_error = error[:500] if error else None
+                db_job.updated_at = datetime.utcnow()
+                if next_run_at:
+                    db_job.next_run_at = next_run_at
+                session.add(db_job)
+                session.commit()
+        with self._lock:
+            self.active[job.job_type] = max(0, self.active.get(job.job_type, 0) - 1)
+
+    def run_job(self, job: NightlyJob):
+        handler = self.handlers.get(job.job_type)
+        try:
+            if handler is None:
+                raise Exception(f"No handler for job type '{job.job_type}'")
+            handler(job.symbol)
+            self.complete(job)
+        except Exception as e:
+            logger.error(f"[JobQueue] {job.job_type} {job.symbol} failed (attempt {job.attempts}/{job.max_attempts}): {e}")
+            logger.debug(traceback.format_exc())
+            self.fail(job, str(e))
+
+    # --- Workers ---
+
+    def drain(self, deadline: Optional[datetime] = None, idle_wait: float = 1.0) -> int:
+        """
+        Run jobs with bounded concurrency until the queue has nothing runnable
+        or the deadline (naive local time) passes. Returns the number of jobs run.
+        Only one drain runs at a time; concurrent calls return 0 immediately.
+        """
+        if not self._drain_lock.acquire(blocking=False):
+            return 0
+        processed = 0
+        stop_event = threading.Event()
+        counter_lock = threading.Lock()
+
+        def worker():
+            nonlocal processed
+            idle_rounds = 0
+            while not stop_event.is_set():
+                if deadline and datetime.now() >= deadline:
+                    return
+                job = self.dequeue()
+                if job is None:
+                    # Another worker may still be running a job type that blocks ours; wait a bit before giving up
+                    if not any(self.active.values()) or idle_rounds >= 3:
+                        return
+                    idle_rounds += 1
+                    stop_event.wait(idle_wait)
+                    continue
+                idle_rounds = 0
+                self.run_job(job)
+                with counter_lock:
+                    processed += 1
+
+        try:
+            max_workers = sum(self.limits.values()) or 1
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for _ in range(max_workers):
+                    executor.submit(worker)
+        finally:
+            stop_event.set()
+            self._drain_lock.release()
+        return processed
+
+    def is_draining(self) -> bool:
+        return self._drain_lock.locked()
+
+    def get_stats(self) -> dict:
+        with Session(engine) as session:
+            rows = session.exec(text(
+                "SELECT job_type, status, COUNT(*) FROM nightlyjob GROUP BY job_type, status"
+            )).all()
+        stats = {}
+        for job_type, status, cnt in rows:
+            stats.setdefault(job_type, {})[status] = cnt
+        return stats
+
+job_queue = JobQueue()
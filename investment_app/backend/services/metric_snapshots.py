@@ -0,0 +1,154 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, func
+from ..database import engine, Stock, StockDailySnapshot
+
+# Bit i of StockDailySnapshot.signal_mask = Stock.signal_<SIGNAL_BITS[i]>.
+# Append only: reordering would change the meaning of stored masks.
+SIGNAL_BITS = (
+    "higher_200ma", "near_200ma", "over_50ma", "higher_50ma_than_200ma",
+    "uptrand_200ma", "sameslope_50_200", "newhigh", "newhigh_200days",
+    "newhigh_100days", "newhigh_50days", "high_volume", "price_up",
+    "break_atr", "high_slope5ma", "rebound_5ma", "base_formation",
+)
+SIGNAL_BIT = {name: 1 << i for i, name in enumerate(SIGNAL_BITS)}
+
+# Stock columns copied as-is into the snapshot
+METRIC_COLUMNS = (
+    "change_percentage_1d", "change_percentage_5d", "volume_increase_pct",
+    "deviation_5ma_pct", "deviation_20ma_pct", "deviation_50ma_pct", "deviation_200ma_pct",
+    "slope_5ma", "slope_20ma", "slope_50ma", "slope_200ma",
+    "rs_5d", "rs_20d", "rs_50d", "rs_200d", "rs_rating", "composite_rating", "atr_14",
+    "predicted_price_next", "predicted_price_today", "is_in_uptrend",
+)
+
+def pack_signals(stock) -> int:
+    mask = 0
+    for name, bit in SIGNAL_BIT.items():
+        if getattr(stock, f"signal_{name}", 0):
+            mask |= bit
+    return mask
+
+def unpack_signals(mask: int) -> List[str]:
+    return [name for name, bit in SIGNAL_BIT.items() if mask & bit]
+
+def _signal_mask_for(signals: Iterable[str]) -> int:
+    mask = 0
+    for name in signals:
+        name = name[len("signal_"):] if name.startswith("signal_") else name
+        if name not in SIGNAL_BIT:
+            raise ValueError(f"Unknown signal: {name}")
+        mask |= SIGNAL_BIT[name]
+    return mask
+
+class MetricSnapshotStore:
+    """
+    Daily history of per-symbol screening metrics.
+
+    UpdateManager calls record(stock, bar_date) after a symbol is updated and
+    flush(session) before each chunk commit, so snapshots are written with the
+    same transaction as the Stock rows. Re-running on the same bar date replaces
+    that day's row (upsert on the (snapshot_date, symbol) primary key).
+
+    rs_rank/rs_score need every symbol's returns, so they are only known after
+    the run's RS-rank stage: record_ranks() then copies them onto the snapshots
+    flushed since the run started (begin_run()).
+    """
+    def __init__(self):
+        self._pending: Dict[tuple, dict] = {}
+        self._flushed: Dict[str, date] = {} # symbol -> bar date, this run
+
+    def record(self, stock: Stock, bar_date: date):
+        row = {"snapshot_date": bar_date, "symbol": stock.symbol, "close": stock.current_price,
+               "signal_mask": pack_signals(stock)}
+        for col in METRIC_COLUMNS:
+            row[col] = getattr(stock, col, None)
+        self._pending[(bar_date, stock.symbol)] = row
+
+    def flush(self, session: Session):
+        if not self._pending:
+            return
+        rows = list(self._pending.values())
+        self._pending = {}
+        self._flushed.update((row["symbol"], row["snapshot_date"]) for row in rows)
+        stmt = sqlite_insert(StockDailySnapshot)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["snapshot_date", "symbol"],
+            set_={c: stmt.excluded[c] for c in rows[0] if c not in ("snapshot_date", "symbol")}
+        )
+        session.execute(stmt, rows)
+
+    def begin_run(self):
+        self._flushed = {}
+
+    def record_ranks(self) -> int:
+        """Copy the current Stock.rs_rank/rs_score onto this run's snapshots."""
+        flushed, self._flushed = self._flushed, {}
+        if not flushed:
+            return 0
+        with Session(engine) as session:
+            ranks = session.exec(select(Stock.symbol, Stock.rs_rank, Stock.rs_score)).all()
+            params = [
+                {"b_date": flushed[sym], "b_symbol": sym, "b_rank": rank, "b_score": score}
+                for sym, rank, score in ranks if sym in flushed
+            ]
+            if params:
+                table = StockDailySnapshot.__table__
+                session.execute(
+                    update(table)
+                    .where(table.c.snapshot_date == bindparam("b_date"))
+                    .where(table.c.symbol == bindparam("b_symbol"))
+                    .values(rs_rank=bindparam("b_rank"), rs_score=bindparam("b_score")),
+                    params
+                )
+                session.commit()
+        return len(params)
+
+    def symbols_with_signals(self, on_date: date, signals: Iterable[str], match: str = "all") -> List[str]:
+        """Symbols whose snapshot on `on_date` has all (or any) of `signals`."""
+        mask = _signal_mask_for(signals)
+        masked = StockDailySnapshot.signal_mask.op("&")(mask)
+        condition = (masked == mask) if match == "all" else (masked != 0)
+        with Session(engine) as session:
+            return list(session.exec(
+                select(StockDailySnapshot.symbol)
+                .where(StockDailySnapshot.snapshot_date == on_date)
+                .where(condition)
+                .order_by(StockDailySnapshot.symbol)
+            ).all())
+
+    def get_day(self, on_date: date) -> List[dict]:
+        with Session(engine) as session:
+            rows = session.exec(select(StockDailySnapshot).where(StockDailySnapshot.snapshot_date == on_date)).all()
+            return [self._to_dict(r) for r in rows]
+
+    def get_history(self, symbol: str, days: int = 90) -> List[dict]:
+        since = date.today() - timedelta(days=days)
+        with Session(engine) as session:
+            rows = session.exec(
+                select(StockDailySnapshot)
+                .where(StockDailySnapshot.symbol == symbol)
+                .where(StockDailySnapshot.snapshot_date >= since)
+                .order_by(StockDailySnapshot.snapshot_date)
+            ).all()
+            return [self._to_dict(r) for r in rows]
+
+    def get_dates(self, limit: int = 60) -> List[dict]:
+        with Session(engine) as session:
+            rows = session.exec(
+                select(StockDailySnapshot.snapshot_date, func.count())
+                .group_by(StockDailySnapshot.snapshot_date)
+                .order_by(StockDailySnapshot.snapshot_date.desc())
+                .limit(limit)
+            ).all()
+            return [{"date": d.isoformat(), "symbols": n} for d, n in rows]
+
+    @staticmethod
+    def _to_dict(row: StockDailySnapshot) -> dict:
+        data = row.dict()
+        data["signals"] = unpack_signals(row.signal_mask or 0)
+        return data
+
+metric_snapshots = MetricSnapshotStore()
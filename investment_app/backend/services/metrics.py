@@ -0,0 +1,160 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Sequence, Tuple
+
+# Default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _label_str(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        idx = bisect_left(self.buckets, seconds)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = row
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += seconds
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], dict]:
+        with self._lock:
+            return {key: {"sum": row[-2], "count": row[-1]} for key, row in self._values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(row)) for key, row in self._values.items())
+        for key, row in items:
+            cumulative = 0
+            for bound, cnt in zip(self.buckets, row):
+                cumulative += cnt
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {row[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {row[-2]}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {row[-1]}")
+        return lines
+
+class StageTimer:
+    """
+    Lap timer for sequential code: `mark(stage)` charges the time since the
+    previous mark to `stage`. Repeated stages accumulate, and `finish()` records
+    one observation per stage into the histogram.
+    """
+    def __init__(self, histogram: Optional[Histogram] = None):
+        self.histogram = histogram
+        self.totals: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def reset(self):
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self) -> Dict[str, float]:
+        if self.histogram:
+            for stage, seconds in self.totals.items():
+                self.histogram.observe(seconds, stage=stage)
+        return self.totals
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# --- Shared metrics ---
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route and status.", ("method", "path", "status"))
+HTTP_LATENCY = metrics.histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "path"))
+UPDATE_STAGE_SECONDS = metrics.histogram(
+    "update_stage_duration_seconds", "Per-symbol time spent in each UpdateManager stage.", ("stage",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+UPDATE_SYMBOLS = metrics.counter("update_symbols_total", "Symbols processed by UpdateManager by result.", ("result",))
+FUNCTION_SECONDS = metrics.histogram("function_duration_seconds", "Wall time of instrumented functions.", ("function",))
+
+def timed(function_name: str):
+    """Decorator recording the wrapped function's wall time in FUNCTION_SECONDS."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with FUNCTION_SECONDS.time(function=function_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,153 @@
+"""
+Persistent negative cache for tickers the provider cannot resolve (typos, delisted).
+
+StockService records a FailedTicker row when yfinance returns no info or no bars and
+consults it before calling out again, so the detail view, the historical-signal
+max-period retry and the update run's retry list all stop hitting the provider for
+the same dead symbol. The TTL grows with consecutive failures; any successful fetch
+clears the entry, and /system/failed-tickers lets an admin clear entries by hand.
+
+Entries are mirrored in memory (checked on every fetch); writes go straight to the DB.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from ..database import engine, FailedTicker
+from .metrics import metrics
+
+UNKNOWN_SYMBOL = "unknown_symbol"
+NO_DATA = "no_data"
+# TTL by consecutive failure count (the last one repeats). Only UNKNOWN_SYMBOL, which the
+# provider confirmed, escalates. NO_DATA is an empty download of a ticker that was not
+# confirmed unknown (yfinance also returns empty frames on network errors and rate limits),
+# so it only blocks for a few minutes: the update run's 10-minute retry always gets
+# another attempt.
+TTL_SCHEDULE = {
+    NO_DATA: [timedelta(minutes=5)],
+    UNKNOWN_SYMBOL: [timedelta(hours=6), timedelta(days=1), timedelta(days=7), timedelta(days=30)],
+}
+
+NEGATIVE_CACHE_LOOKUPS = metrics.counter(
+    "negative_cache_lookups_total", "Provider fetches checked against the failed-ticker cache.", ("result",)
+)
+
+class NegativeCache:
+    def __init__(self):
+        self._entries: Optional[Dict[str, Dict]] = None # symbol -> FailedTicker fields
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Caller holds the lock."""
+        if self._entries is None:
+            try:
+                with Session(engine) as session:
+                    self._entries = {row.symbol: row.dict() for row in session.exec(select(FailedTicker)).all()}
+            except Exception as e:
+                print(f"Failed to load failed-ticker cache: {e}")
+                self._entries = {}
+        return self._entries
+
+    def check(self, symbol: str) -> Optional[Dict]:
+        """The active (unexpired) entry for the symbol, or None if it may be fetched."""
+        with self._lock:
+            entry = self._load().get(symbol)
+        if entry and entry["expires_at"] > datetime.utcnow():
+            NEGATIVE_CACHE_LOOKUPS.inc(result="blocked")
+            return dict(entry)
+        NEGATIVE_CACHE_LOOKUPS.inc(result="allowed")
+        return None
+
+    def record(self, symbol: str, reason: str, detail: str = None) -> Dict:
+        now = datetime.utcnow()
+        with self._lock:
+            previous = self._load().get(symbol)
+            count = previous["failure_count"] + 1 if previous and previous["reason"] == reason else 1
+            schedule = TTL_SCHEDULE[reason]
+            entry = {
+                "symbol": symbol,
+                "reason": reason,
+                "detail": detail,
+                "failure_count": count,
+                "first_failed_at": previous["first_failed_at"] if previous else now,
+                "last_failed_at": now,
+                "expires_at": now + schedule[min(count, len(schedule)) - 1],
+            }
+            self._entries[symbol] = entry
+        try:
+            with Session(engine) as session:
+                stmt = sqlite_insert(FailedTicker.__table__)
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=["symbol"],
+                    set_={k: stmt.excluded[k] for k in entry if k != "symbol"},
+                ), [entry])
+                session.commit()
+        except Exception as e:
+            print(f"Failed to store failed-ticker entry for {symbol}: {e}")
+        print(f"Negative cache: {symbol} {reason} x{count}, skipped until {entry['expires_at']:%Y-%m-%d %H:%M} UTC")
+        return dict(entry)
+
+    def resolve(self, symbol: str):
+        """A fetch succeeded: drop any entry (a dict lookup when there is none)."""
+        with self._lock:
+            known = symbol in self._load()
+        if known:
+            self.clear(symbol)
+
+    def clear(self, symbol: str) -> bool:
+        with self._lock:
+            removed = self._load().pop(symbol, None) is not None
+        with Session(engine) as session:
+            session.execute(delete(FailedTicker).where(FailedTicker.symbol == symbol))
+            session.commit()
+        return removed
+
+    def clear_many(self, symbols: List[str], chunk_size: int = 500) -> int:
+        """Drop the entries of many symbols (deleted stocks) with chunked DELETEs."""
+        symbols = list(symbols)
+        with self._lock:
+            entries = self._load()
+            removed = sum(entries.pop(sym, None) is not None for sym in symbols)
+        if removed:
+            with Session(engine) as session:
+                for i in range(0, len(symbols), chunk_size):
+                    session.execute(delete(FailedTicker).where(FailedTicker.symbol.in_(symbols[i:i + chunk_size])))
+                session.commit()
+        return removed
+
+    def clear_all(self, expired_only: bool = False) -> int:
+        now = datetime.utcnow()
+        with self._lock:
+            entries = self._load()
+            symbols = [s for s, e in entries.items() if not expired_only or e["expires_at"] <= now]
+            for sym in symbols:
+                entries.pop(sym)
+        with Session(engine) as session:
+            stmt = delete(FailedTicker)
+            if expired_only:
+                stmt = stmt.where(FailedTicker.expires_at <= now)
+            session.execute(stmt)
+            session.commit()
+        return len(symbols)
+
+    def list_entries(self) -> List[Dict]:
+        now = datetime.utcnow()
+        with self._lock:
+            entries = [dict(e) for e in self._load().values()]
+        for e in entries:
+            e["active"] = e["expires_at"] > now
+        return sorted(entries, key=lambda e: e["last_failed_at"], reverse=True)
+
+    def get_stats(self) -> Dict:
+        entries = self.list_entries()
+        by_reason: Dict[str, int] = {}
+        for e in entries:
+            if e["active"]:
+                by_reason[e["reason"]] = by_reason.get(e["reason"], 0) + 1
+        return {"entries": len(entries), "active": sum(by_reason.values()), "active_by_reason": by_reason}
+
+negative_cache = NegativeCache()
@@ -0,0 +1,114 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+from ..database import engine, StockNews, NewsFetchState
+from .stock_service import stock_service
+
+logger = logging.getLogger(__name__)
+
+# News older than this (by fetch watermark) is refreshed from the provider
+NEWS_TTL = timedelta(hours=6)
+# Rows per INSERT statement (8 bound params per row, keeps well under SQLite's variable limit)
+INSERT_CHUNK_SIZE = 500
+
+class NewsIngester:
+    """
+    Batch news ingestion.
+    Fetches news for many symbols concurrently (parsed by StockService.fetch_news),
+    writes them with INSERT ... ON CONFLICT(link) DO NOTHING and records a
+    per-symbol fetch watermark in NewsFetchState.
+    """
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+
+    def ingest(self, symbols: List[str], max_workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Fetch and store news for symbols. Returns {symbol: fetched_item_count}.
+        Symbols whose fetch failed (None or raised) are left without a new watermark so they are retried.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        def fetch(sym):
+            try:
+                return sym, stock_service.fetch_news(sym)
+            except Exception as e:
+                logger.error(f"News fetch failed for {sym}: {e}")
+                return sym, None
+
+        workers = max(1, min(max_workers or self.max_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fetch, symbols))
+
+        rows = []
+        seen_links = set()
+        counts = {}
+        for sym, items in results:
+            if items is None:
+                continue
+            counts[sym] = len(items)
+            for item in items:
+                link = item.get('link')
+                if not link or link in seen_links:
+                    continue
+                seen_links.add(link)
+                rows.append({
+                    'symbol': sym,
+                    'title': item['title'],
+                    'publisher': item.get('publisher') or 'Unknown',
+                    'link': link,
+                    'provider_publish_time': item['provider_publish_time'],
+                    'type': item.get('type') or 'STORY',
+                    'thumbnail_url': item.get('thumbnail_url'),
+                    'related_tickers_json': json.dumps(item.get('related_tickers') or []),
+                })
+
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+                stmt = sqlite_insert(StockNews).values(rows[i:i + INSERT_CHUNK_SIZE])
+                session.exec(stmt.on_conflict_do_nothing(index_elements=['link']))
+
+            if counts:
+                state_rows = [{'symbol': sym, 'last_fetched_at': now, 'item_count': cnt} for sym, cnt in counts.items()]
+                stmt = sqlite_insert(NewsFetchState).values(state_rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['symbol'],
+                    set_={'last_fetched_at': stmt.excluded.last_fetched_at, 'item_count': stmt.excluded.item_count}
+                )
+                session.exec(stmt)
+            session.commit()
+
+        return counts
+
+    def stale_symbols(self, symbols: List[str], max_age: timedelta = NEWS_TTL) -> List[str]:
+        """Return the subset of symbols whose news watermark is missing or older than max_age."""
+        if not symbols:
+            return []
+        cutoff = datetime.utcnow() - max_age
+        with Session(engine) as session:
+            fresh = set(session.exec(
+                select(NewsFetchState.symbol)
+                .where(NewsFetchState.symbol.in_(symbols))
+                .where(NewsFetchState.last_fetched_at >= cutoff)
+            ).all())
+        return [s for s in symbols if s not in fresh]
+
+    def ensure_fresh(self, symbols: List[str], max_age: timedelta = NEWS_TTL) -> Dict[str, int]:
+        """Ingest only the symbols whose watermark is stale."""
+        return self.ingest(self.stale_symbols(symbols, max_age))
+
+    def get_news(self, session: Session, symbol: str, limit: int = 50) -> List[StockNews]:
+        return session.exec(
+            select(StockNews)
+            .where(StockNews.symbol == symbol)
+            .order_by(StockNews.provider_publish_time.desc())
+            .limit(limit)
+        ).all()
+
+news_ingester = NewsIngester()
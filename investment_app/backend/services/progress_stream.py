@@ -0,0 +1,63 @@
+import json
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Discrete events (errors, completion, logs) kept for subscribers that are between ticks
+EVENT_BUFFER_SIZE = 500
+
+class ProgressStream:
+    """
+    Fan-out of background-task progress to Server-Sent Events subscribers.
+
+    Two kinds of data:
+    - State: each source registers a cheap callable returning its current status
+      (e.g. UpdateManager.get_progress). Subscribers sample it at a fixed rate and
+      only send it when it changed, so a fast update loop never floods clients.
+    - Events: discrete things that must not be coalesced away (per-symbol errors,
+      completion, log lines). Producers call emit(); events get a sequence number
+      and subscribers send everything newer than the last one they sent.
+    """
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self._sources: Dict[str, Callable[[], dict]] = {}
+        self._events = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def register_source(self, name: str, state_fn: Callable[[], dict]):
+        self._sources[name] = state_fn
+
+    def emit(self, source: str, event: str, data: Optional[dict] = None):
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, source, event, data or {}))
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def events_since(self, seq: int) -> List[Tuple[int, str, str, dict]]:
+        with self._lock:
+            if not self._events or self._events[-1][0] <= seq:
+                return []
+            return [e for e in self._events if e[0] > seq]
+
+    def states(self) -> Dict[str, dict]:
+        result = {}
+        for name, fn in list(self._sources.items()):
+            try:
+                result[name] = fn()
+            except Exception as e:
+                result[name] = {"error": str(e)}
+        return result
+
+    @staticmethod
+    def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+        lines = []
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        lines.append(f"event: {event}")
+        lines.append(f"data: {json.dumps(data, default=str)}")
+        return "\n".join(lines) + "\n\n"
+
+progress_stream = ProgressStream()
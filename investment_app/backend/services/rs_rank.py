@@ -0,0 +1,111 @@
+import time
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlmodel import Session, select
+
+from ..database import engine, Stock, stock_is_listed
+
+# Weighted composite of the stored period returns: the 50d and 200d horizons carry most
+# of the weight, the 20d return adds a smaller short-term tilt. The horizons overlap, so
+# the latest 20 days still enter all three terms. Rows missing a horizon use the
+# remaining weights, renormalized.
+RS_WEIGHTS = {
+    "change_percentage_20d": 0.2,
+    "change_percentage_50d": 0.4,
+    "change_percentage_200d": 0.4,
+}
+
+def compute_rs_ranks(returns: np.ndarray, weights: np.ndarray):
+    """
+    returns: (n_symbols, n_horizons) float array, NaN where unknown.
+    Returns (score, rank): weighted composite return and its 1-99 percentile rank
+    across all symbols with a score (NaN score -> rank 0).
+    """
+    valid = ~np.isnan(returns)
+    w = np.where(valid, weights, 0.0)
+    w_sum = w.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.where(w_sum > 0, (np.nan_to_num(returns) * w).sum(axis=1) / w_sum, np.nan)
+
+    rank = np.zeros(len(score), dtype=np.int64)
+    has_score = ~np.isnan(score)
+    scored = score[has_score]
+    n = len(scored)
+    if n == 1:
+        rank[has_score] = 99
+    elif n > 1:
+        # Share of other symbols this one beats (ties get the same rank)
+        below = np.searchsorted(np.sort(scored), scored, side="left")
+        rank[has_score] = 1 + np.floor(below / (n - 1) * 98).astype(np.int64)
+    return score, rank
+
+class RSRankService:
+    """
+    Universe-wide relative strength, run once after an update.
+
+    Loads the period returns of every visible stock in one SELECT, computes the
+    weighted composite and percentile ranks in one NumPy pass and writes only the
+    rows whose rank or score changed with one executemany UPDATE.
+    The imported IBD rs_rating is left untouched (rs_rank is our own ranking).
+    """
+    def __init__(self):
+        self.last_result: Dict = {}
+
+    def recompute(self) -> Dict:
+        start = time.perf_counter()
+        columns = list(RS_WEIGHTS.keys())
+        with Session(engine) as session:
+            rows = session.exec(
+                select(Stock.symbol, Stock.rs_rank, Stock.rs_score, *[getattr(Stock, c) for c in columns])
+                .where(Stock.asset_type == "stock")
+                .where(Stock.is_hidden == False)
+                .where(stock_is_listed())
+            ).all()
+            if not rows:
+                self.last_result = {"symbols": 0, "updated": 0, "seconds": 0.0}
+                return self.last_result
+
+            symbols = [r[0] for r in rows]
+            old_rank = np.array([r[1] if r[1] is not None else -1 for r in rows], dtype=np.int64)
+            old_score = np.array([r[2] if r[2] is not None else np.nan for r in rows], dtype=np.float64)
+            returns = np.array([[np.nan if v is None else v for v in r[3:]] for r in rows], dtype=np.float64)
+
+            score, rank = compute_rs_ranks(returns, np.array([RS_WEIGHTS[c] for c in columns]))
+            score = np.round(score, 4)
+
+            same_score = (score == old_score) | (np.isnan(score) & np.isnan(old_score))
+            changed = np.flatnonzero((rank != np.where(old_rank < 0, 0, old_rank)) | ~same_score)
+            now = datetime.utcnow()
+            params = [
+                {
+                    "b_symbol": symbols[i],
+                    "b_rank": int(rank[i]) or None,
+                    "b_score": None if np.isnan(score[i]) else float(score[i]),
+                    "b_now": now,
+                }
+                for i in changed
+            ]
+            if params:
+                table = Stock.__table__
+                stmt = (
+                    update(table)
+                    .where(table.c.symbol == bindparam("b_symbol"))
+                    # updated_at so /stocks/changes picks up the new ranks
+                    .values(rs_rank=bindparam("b_rank"), rs_score=bindparam("b_score"), updated_at=bindparam("b_now"))
+                )
+                session.execute(stmt, params)
+                session.commit()
+
+        self.last_result = {
+            "symbols": len(symbols),
+            "ranked": int((rank > 0).sum()),
+            "updated": len(params),
+            "seconds": round(time.perf_counter() - start, 4),
+        }
+        print(f"[RSRank] {self.last_result}")
+        return self.last_result
+
+rs_rank_service = RSRankService()
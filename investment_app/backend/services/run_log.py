@@ -0,0 +1,137 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlmodel import Session, select, text
+from ..database import engine, UpdateRun, UpdateRunSymbol
+
+# Only the most recent runs keep their per-symbol rows
+KEEP_RUNS = 20
+
+class UpdateRunLog:
+    """
+    Records per-symbol, per-step wall time of UpdateManager runs.
+
+    UpdateManager calls start_run() once, record() per symbol, flush(session)
+    before each chunk commit (rows are committed with the stock updates), and
+    finish_run() at the end.
+    """
+    def __init__(self):
+        self.run_id: Optional[int] = None
+        self._pending: List[dict] = []
+        self._count = 0
+
+    def start_run(self) -> int:
+        with Session(engine) as session:
+            run = UpdateRun()
+            session.add(run)
+            session.commit()
+            session.refresh(run)
+            self.run_id = run.id
+        self._pending = []
+        self._count = 0
+        self._prune()
+        return self.run_id
+
+    def record(self, symbol: str, steps: Dict[str, float], error: Optional[str] = None):
+        if self.run_id is None:
+            return
+        self._pending.append({
+            "symbol": symbol,
+            "total_seconds": round(sum(steps.values()), 4),
+            "steps": {k: round(v, 4) for k, v in steps.items()},
+            "error": error[:500] if error else None
+        })
+
+    def flush(self, session: Session):
+        """Add pending rows to the caller's session; they are committed with it."""
+        if self.run_id is None or not self._pending:
+            return
+        session.add_all([
+            UpdateRunSymbol(
+                run_id=self.run_id,
+                symbol=row["symbol"],
+                total_seconds=row["total_seconds"],
+                steps_json=json.dumps(row["steps"]),
+                error=row["error"]
+            ) for row in self._pending
+        ])
+        self._count += len(self._pending)
+        self._pending = []
+
+    def finish_run(self, status: str, started: datetime, profile_path: Optional[str] = None):
+        if self.run_id is None:
+            return
+        with Session(engine) as session:
+            self.flush(session)
+            run = session.get(UpdateRun, self.run_id)
+            if run:
+                run.finished_at = datetime.utcnow()
+                run.status = status
+                run.symbol_count = self._count
+                run.total_seconds = round((run.finished_at - started).total_seconds(), 2)
+                run.profile_path = profile_path
+                session.add(run)
+            session.commit()
+        self.run_id = None
+
+    def _prune(self):
+        with Session(engine) as session:
+            session.exec(text("""
+                DELETE FROM updaterunsymbol WHERE run_id NOT IN (
+                    SELECT id FROM updaterun ORDER BY id DESC LIMIT :keep
+                )
+            """), params={"keep": KEEP_RUNS})
+            session.commit()
+
+    # --- Reports ---
+
+    def get_runs(self, limit: int = 20) -> List[UpdateRun]:
+        with Session(engine) as session:
+            return session.exec(select(UpdateRun).order_by(UpdateRun.id.desc()).limit(limit)).all()
+
+    def top_slowest(self, run_id: Optional[int] = None, limit: int = 20) -> dict:
+        """Slowest symbols, slowest (symbol, step) pairs and per-step totals for a run (latest by default)."""
+        with Session(engine) as session:
+            if run_id is None:
+                run_id = session.exec(select(UpdateRun.id).order_by(UpdateRun.id.desc()).limit(1)).first()
+            if run_id is None:
+                return {"run": None, "symbols": [], "steps": [], "step_totals": []}
+            run = session.get(UpdateRun, run_id)
+
+            slow_symbols = session.exec(
+                select(UpdateRunSymbol)
+                .where(UpdateRunSymbol.run_id == run_id)
+                .order_by(UpdateRunSymbol.total_seconds.desc())
+                .limit(limit)
+            ).all()
+            all_steps = session.exec(
+                select(UpdateRunSymbol.symbol, UpdateRunSymbol.steps_json)
+                .where(UpdateRunSymbol.run_id == run_id)
+            ).all()
+
+        step_rows = []
+        step_totals: Dict[str, dict] = {}
+        for symbol, steps_json in all_steps:
+            for step, seconds in json.loads(steps_json or "{}").items():
+                step_rows.append({"symbol": symbol, "step": step, "seconds": seconds})
+                agg = step_totals.setdefault(step, {"step": step, "seconds": 0.0, "count": 0})
+                agg["seconds"] += seconds
+                agg["count"] += 1
+        step_rows.sort(key=lambda r: r["seconds"], reverse=True)
+        totals = sorted(step_totals.values(), key=lambda r: r["seconds"], reverse=True)
+        for agg in totals:
+            agg["seconds"] = round(agg["seconds"], 3)
+
+        return {
+            "run": run,
+            "symbols": [{
+                "symbol": r.symbol,
+                "total_seconds": r.total_seconds,
+                "steps": json.loads(r.steps_json or "{}"),
+                "error": r.error
+            } for r in slow_symbols],
+            "steps": step_rows[:limit],
+            "step_totals": totals
+        }
+
+run_log = UpdateRunLog()
@@ -1,176 +1,191 @@
 from ..database import Stock, StockFinancials, StockNews, Session, engine
 from sqlmodel import select
 from .stock_service import stock_service
-from .gemini_service import gemini_service
+from .gemini_service import gemini_service, DRIVER_POOL_SIZE
+from .job_queue import job_queue
+from .news_ingester import news_ingester
+from .summary_cache import summary_cache
 import logging
-import time
+import threading
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Job types handled by the nightly queue.
+# Financials are essential data and go first; news summaries are bounded by the browser tab pool.
+FINANCIALS_JOB = "financials"
+NEWS_SUMMARY_JOB = "news_summary"
+NIGHTLY_END_HOUR = 5
+
+NEWS_SUMMARY_PROMPT = """
+以下の銘柄の最新ニュースを基に、市場のセンチメントと重要な出来事を日本語で要約してください。
+銘柄: {symbol}
+
+【ニュース一覧】
+{news_text}
+
+【制約】
+- 日本語で出力すること
+- 300文字以内で簡潔にまとめること
+- 投資家にとって重要な情報を優先すること
+- "ニュースによると"などの前置きは省略し、要点から始めること
+- 追加の提案は不要です
+"""
+
 def run_nightly_cycle():
     """
     Called every minute between 2:00 and 5:00 AM.
-    Executes one small task per call to distribute load.
+    Seeds the persistent job queue and drains it with bounded concurrency
+    in a background thread until 5:00 AM or until nothing is runnable.
     """
-    with Session(engine) as session:
-        # Prioritize Financials (essential data)
-        if _run_financials_task(session):
-            return
+    if job_queue.is_draining():
+        return
 
-        # Then News Summary (enrichment)
-        if _run_news_summary_task(session):
-            return
+    _seed_nightly_jobs()
+
+    now = datetime.now()
+    deadline = now.replace(hour=NIGHTLY_END_HOUR, minute=0, second=0, microsecond=0)
+    if deadline <= now:
+        deadline = now + timedelta(minutes=1)
+
+    t = threading.Thread(target=_drain_nightly_queue, args=(deadline,), daemon=True)
+    t.start()
+
+def _drain_nightly_queue(deadline):
+    try:
+        _prefetch_news()
+        count = job_queue.drain(deadline=deadline)
+        if count:
+            logger.info(f"[Scheduled] Nightly queue processed {count} jobs. Stats: {job_queue.get_stats()}")
+    except Exception as e:
+        logger.error(f"[Scheduled] Nightly queue error: {e}")
 
-def _run_financials_task(session: Session) -> bool:
+def _seed_nightly_jobs():
+    """
+    Enqueue symbols needing work. Set-based INSERT ... SELECT with ON CONFLICT,
+    so re-seeding every minute is cheap and never duplicates jobs.
     """
-    Check for stocks missing financials.
-    Returns True if a task was executed.
+    # Allow finished jobs to be re-seeded after a week (e.g. financials still missing)
+    job_queue.purge_finished(timedelta(days=7))
+
+    job_queue.enqueue_query(
+        FINANCIALS_JOB,
+        "SELECT s.symbol AS symbol FROM stock s "
+        "LEFT JOIN (SELECT DISTINCT symbol FROM stockfinancials) f ON s.symbol = f.symbol "
+        "WHERE f.symbol IS NULL",
+        priority=10
+    )
+    job_queue.enqueue_query(
+        NEWS_SUMMARY_JOB,
+        "SELECT symbol FROM stock WHERE news_summary_jp IS NULL",
+        priority=20
+    )
+
+def _prefetch_news(batch_size: int = 200):
+    """
+    Fetch news for symbols waiting on a summary in one concurrent batch,
+    so summary jobs read from StockNews instead of calling out one by one.
     """
-    # Find stocks present in Stock but missing in StockFinancials
-    # SQLModel doesn't support NOT IN subquery easily in pythonic way, use raw SQL or loop?
-    # Or just select * from Stock and checking (slow for strict check).
-    # Better: Join with isouter=True and check null.
-    
-    # Simple strategy: Select stocks updated recently (active) but missing financials? 
-    # Or just any stock. Let's just try to find one.
-    
-    # Get all symbols (cached if possible, but db query is fine for small db)
-    # Optimized: SELECT s.symbol FROM stock s LEFT JOIN stockfinancials f ON s.symbol = f.symbol WHERE f.symbol IS NULL LIMIT 1
-    
     from sqlmodel import text
-    statement = text("SELECT symbol FROM stock WHERE symbol NOT IN (SELECT symbol FROM stockfinancials) LIMIT 1")
-    result = session.exec(statement).first()
-    
-    if result:
-        symbol = result[0]
-        logger.info(f"[Scheduled] Fetching missing financials for {symbol}")
-        try:
-            # Note: get_financials was hypothetical, stock_service usually has fetch_fundamentals and fetch_financial_history
-            # The router uses refresh_financials logic which calls fetch_fundamentals AND fetch_financial_history.
-            # We should replicate that or call a unified method.
-            # Let's call fetch_fundamentals AND fetch_financial_history.
-            
-            # 1. Fundamentals (Market Cap etc)
-            stock_service.fetch_fundamentals(symbol)
-             # Update Stock table? fetch_fundamentals returns dict. 
-             # We need to save it. 
-             # Since this function is lightweight, let's just use the router logic approach logic here?
-             # Or better: Just call fetch_financial_history which saves to StockFinancials, satisfying the NOT IN check.
-            
-            stock_service.fetch_financial_history(symbol)
-            # The fetch_financial_history returns data, doesn't save it effectively to DB unless we do it here.
-            # Wait, stock_service methods generally RETURN data, they don't save to DB (Service pattern usually pure?).
-            # In router `refresh_financials`:
-            #   metrics = stock_service.fetch_fundamentals(symbol)
-            #   update stock object...
-            #   history = stock_service.fetch_financial_history(symbol)
-            #   upsert StockFinancials...
-            
-            # I must IMPLEMENT the saving logic here.
-            
-            # A. Fundamentals
-            metrics = stock_service.fetch_fundamentals(symbol)
-            stock = session.get(Stock, symbol)
-            if stock and metrics:
-                 for key, val in metrics.items():
-                    if hasattr(stock, key) and val is not None:
-                        setattr(stock, key, val)
-                 stock.updated_at = datetime.utcnow()
-                 session.add(stock)
-
-            # B. History
-            history_data = stock_service.fetch_financial_history(symbol)
-            if history_data:
-                for rec in history_data:
-                    from ..database import StockFinancials
-                    # Upsert logic
-                    # Check existing?
-                    stmt = select(StockFinancials).where(
-                        StockFinancials.symbol == symbol,
-                        StockFinancials.report_date == rec['date'],
-                        StockFinancials.period == rec['period']
+    with Session(engine) as session:
+        rows = session.exec(text(
+            "SELECT symbol FROM nightlyjob WHERE job_type = :job_type AND status = 'pending' "
+            "ORDER BY priority, next_run_at LIMIT :limit"
+        ), params={"job_type": NEWS_SUMMARY_JOB, "limit": batch_size}).all()
+    symbols = [r[0] for r in rows]
+    if symbols:
+        counts = news_ingester.ensure_fresh(symbols)
+        if counts:
+            logger.info(f"[Scheduled] Prefetched news for {len(counts)} symbols")
+
+def _run_financials_task(symbol: str):
+    """
+    Fetch fundamentals and financial history for one symbol and save them.
+    Raises on failure so the queue can retry with backoff.
+    """
+    logger.info(f"[Scheduled] Fetching missing financials for {symbol}")
+    with Session(engine) as session:
+        # A. Fundamentals
+        metrics = stock_service.fetch_fundamentals(symbol)
+        stock = session.get(Stock, symbol)
+        if stock and metrics:
+            for key, val in metrics.items():
+                if hasattr(stock, key) and val is not None:
+                    setattr(stock, key, val)
+            stock.updated_at = datetime.utcnow()
+            session.add(stock)
+
+        # B. History (upsert on symbol, report_date, period)
+        history_data = stock_service.fetch_financial_history(symbol)
+        if history_data:
+            existing_rows = session.exec(select(StockFinancials).where(StockFinancials.symbol == symbol)).all()
+            existing_map = {(r.report_date, r.period): r for r in existing_rows}
+            for rec in history_data:
+                existing = existing_map.get((rec['date'], rec['period']))
+                if existing:
+                    existing.revenue = rec['revenue']
+                    existing.net_income = rec['net_income']
+                    existing.eps = rec['eps']
+                    session.add(existing)
+                else:
+                    new_rec = StockFinancials(
+                        symbol=symbol,
+                        report_date=rec['date'],
+                        period=rec['period'],
+                        revenue=rec['revenue'],
+                        net_income=rec['net_income'],
+                        eps=rec['eps']
                     )
-                    existing = session.exec(stmt).first()
-                    if existing:
-                        existing.revenue = rec['revenue']
-                        existing.net_income = rec['net_income']
-                        existing.eps = rec['eps']
-                        session.add(existing)
-                    else:
-                        new_rec = StockFinancials(
-                            symbol=symbol,
-                            report_date=rec['date'],
-                            period=rec['period'],
-                            revenue=rec['revenue'],
-                            net_income=rec['net_income'],
-                            eps=rec['eps']
-                        )
-                        session.add(new_rec)
-            
-            session.commit()
-            return True
-            
-        except Exception as e:
-            logger.error(f"[Scheduled] Error fetching financials for {symbol}: {e}")
-            return False
-            
-    return False
-
-def _run_news_summary_task(session: Session) -> bool:
+                    session.add(new_rec)
+                    existing_map[(rec['date'], rec['period'])] = new_rec
+
+        session.commit()
+
+def _run_news_summary_task(symbol: str):
     """
-    Check for stocks missing news summary.
-    Returns True if a task was executed.
+    Generate the Japanese news summary for one symbol.
+    Raises on failure so the queue can retry with backoff.
     """
-    statement = select(Stock).where(Stock.news_summary_jp == None).limit(1)
-    results = session.exec(statement).all()
-    
-    if not results:
-        return False
-        
-    stock = results[0]
-    symbol = stock.symbol
-    
     logger.info(f"[Scheduled] Generating news summary for {symbol}")
-    
-    try:
-        # 1. Fetch News
-        news_items = stock_service.fetch_news(symbol)
-        
+    with Session(engine) as session:
+        stock = session.get(Stock, symbol)
+        if not stock or stock.news_summary_jp is not None:
+            return
+
+        # 1. Fetch News (batch-prefetched into StockNews; refresh only if watermark is stale)
+        stale = news_ingester.stale_symbols([symbol])
+        fetched = news_ingester.ingest(stale)
+        news_items = [n.dict() for n in news_ingester.get_news(session, symbol, limit=10)]
+
         if not news_items:
+            if stale and symbol not in fetched:
+                # Provider error, not an empty feed: let the queue retry
+                raise Exception(f"News fetch failed for {symbol}")
             stock.news_summary_jp = "ニュースなし"
             session.add(stock)
             session.commit()
-            return True
-            
-        # 2. Generate Summary
-        # news_items is list of dicts. Keys match stock_service return.
-        # provider_publish_time might be datetime or string.
-        news_text = "\n".join([f"- {item.get('title')} ({item.get('provider_publish_time', '')})" for item in news_items[:10]])
-        
-        prompt = f"""
-以下の銘柄の最新ニュースを基に、市場のセンチメントと重要な出来事を日本語で要約してください。
-銘柄: {symbol}
+            return
 
-【ニュース一覧】
-{news_text}
+        # 2. Generate Summary (reuse cached summary when the headline set is unchanged)
+        # news_items are StockNews rows as dicts, newest first.
+        top_items = news_items[:10]
+        cache_key = summary_cache.make_key([item.get('title') for item in top_items], NEWS_SUMMARY_PROMPT)
+        summary = summary_cache.get(cache_key)
+        if summary is None:
+            news_text = "\n".join([f"- {item.get('title')} ({item.get('provider_publish_time', '')})" for item in top_items])
+            prompt = NEWS_SUMMARY_PROMPT.format(symbol=symbol, news_text=news_text)
+            summary = gemini_service.generate_content(prompt)
+            if not summary or summary.startswith("Error"):
+                raise Exception(summary or "Empty summary")
+            summary_cache.put(cache_key, summary, headline_count=len(top_items))
+        else:
+            logger.info(f"[Scheduled] Reusing cached news summary for {symbol}")
 
-【制約】
-- 日本語で出力すること
-- 300文字以内で簡潔にまとめること
-- 投資家にとって重要な情報を優先すること
-- "ニュースによると"などの前置きは省略し、要点から始めること
-- 追加の提案は不要です
-"""
-        summary = gemini_service.generate_content(prompt)
-        
         # 3. Save
         stock.news_summary_jp = summary
         session.add(stock)
         session.commit()
-        logger.info(f"[Scheduled] Summary generated for {symbol}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"[Scheduled] Error summarizing news for {symbol}: {e}")
-        return False
+        logger.info(f"[Scheduled] Summary saved for {symbol}")
+
+job_queue.register(FINANCIALS_JOB, _run_financials_task, concurrency=4)
+job_queue.register(NEWS_SUMMARY_JOB, _run_news_summary_task, concurrency=DRIVER_POOL_SIZE)
@@ -0,0 +1,196 @@
+"""
+Server-side evaluation of SavedFilter criteria.
+
+compile_criteria() turns the criteria JSON used by the dashboard's FilterDialog
+into SQLAlchemy conditions over Stock (bound parameters only), so a screen is a
+single SELECT instead of downloading /stocks/ and filtering in the browser.
+Semantics follow the client-side filter: missing numeric values count as 0,
+'Any'/'None'/empty strings and false booleans mean "no filter".
+"""
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, exists, func, literal, or_
+from sqlalchemy.types import Boolean, Float, Integer, Numeric, String
+from sqlmodel import Session, select
+
+from ..database import Stock, TradeHistory, StockNote, AnalysisResult, stock_is_listed
+
+# Criteria keys whose Stock column is not simply the key without min_/max_
+COLUMN_ALIASES = {
+    "atr": "atr_14",
+    "roe": "return_on_equity",
+}
+DEFAULT_SORT = "composite_rating"
+MAX_LIMIT = 2000
+# Same threshold the dashboard uses for "Holding"
+HOLDING_EPSILON = 0.0001
+
+class ScreenError(ValueError):
+    pass
+
+def _column(name: str):
+    name = COLUMN_ALIASES.get(name, name)
+    col = Stock.__table__.columns.get(name)
+    if col is None:
+        raise ScreenError(f"Unknown column: {name}")
+    return col
+
+def _is_numeric(col) -> bool:
+    return isinstance(col.type, (Integer, Float, Numeric)) and not isinstance(col.type, Boolean)
+
+def _is_active(value) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value not in ("", "Any", "None")
+    if isinstance(value, (list, tuple)):
+        return len(value) > 0
+    return True
+
+def holdings_subquery():
+    qty = func.sum(case(
+        (TradeHistory.trade_type == '買い', TradeHistory.quantity),
+        (TradeHistory.trade_type == '売り', -TradeHistory.quantity),
+        else_=0.0
+    ))
+    return (
+        select(TradeHistory.symbol.label("symbol"), qty.label("qty"), func.count().label("cnt"))
+        .group_by(TradeHistory.symbol)
+        .subquery("holdings")
+    )
+
+def compile_criteria(criteria: Dict, analysis_symbols: Optional[List[str]] = None) -> Tuple[list, Optional[object], List[str]]:
+    """
+    Returns (conditions, holdings, ignored_keys).
+    holdings: the per-symbol trade aggregate subquery when a status filter needs it
+    (the caller must outer-join it on symbol), otherwise None.
+    analysis_symbols: symbols with an external (GDrive) analysis, for has_analysis.
+    """
+    conditions = []
+    holdings = None
+    ignored = []
+
+    for key, value in (criteria or {}).items():
+        if not _is_active(value):
+            continue
+
+        if key.startswith("signal_"):
+            conditions.append(_column(key) == 1)
+        elif key.startswith("min_") or key.startswith("max_"):
+            col = _column(key[4:])
+            if not _is_numeric(col):
+                raise ScreenError(f"Range filter on non-numeric column: {col.name}")
+            value = float(value)
+            # The dashboard treats 0 as "not set" (falsy) for range filters
+            if value == 0:
+                continue
+            lhs = func.coalesce(col, 0)
+            conditions.append(lhs >= value if key.startswith("min_") else lhs <= value)
+        elif key in ("is_in_uptrend", "is_buy_candidate"):
+            conditions.append(_column(key) == True)
+        elif key in ("industry", "sector"):
+            conditions.append(_column(key) == value)
+        elif key in ("industries", "sectors"):
+            conditions.append(_column("industry" if key == "industries" else "sector").in_(list(value)))
+        elif key == "has_note":
+            conditions.append(exists().where(and_(StockNote.symbol == Stock.symbol, StockNote.content != "")))
+        elif key == "has_analysis":
+            alternatives = [
+                Stock.analysis_file_path.is_not(None),
+                exists().where(AnalysisResult.symbol == Stock.symbol),
+            ]
+            if analysis_symbols:
+                alternatives.append(Stock.symbol.in_(analysis_symbols))
+            conditions.append(or_(*alternatives))
+        elif key == "status":
+            if holdings is None:
+                holdings = holdings_subquery()
+            qty = func.coalesce(holdings.c.qty, 0.0)
+            cnt = func.coalesce(holdings.c.cnt, 0)
+            if value == "Holding":
+                conditions.append(qty > HOLDING_EPSILON)
+            elif value == "Past Trade":
+                conditions.append(and_(qty <= HOLDING_EPSILON, cnt > 0))
+            else:
+                raise ScreenError(f"Unknown status: {value}")
+        else:
+            ignored.append(key)
+
+    return conditions, holdings, ignored
+
+def _sort_key(sort: str, descending: bool):
+    col = _column(sort)
+    # Keyset pagination needs a total order without NULLs: NULLs sort last either way
+    if _is_numeric(col):
+        sentinel = -1e300 if descending else 1e300
+    elif isinstance(col.type, String):
+        sentinel = "" if descending else "\uffff"
+    else:
+        raise ScreenError(f"Cannot sort by column: {col.name}")
+    return func.coalesce(col, literal(sentinel))
+
+def encode_cursor(sort_value, symbol: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, symbol]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        sort_value, symbol = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, symbol
+    except Exception:
+        raise ScreenError("Invalid cursor")
+
+def run_screen(
+    session: Session,
+    criteria: Dict,
+    sort: str = DEFAULT_SORT,
+    order: str = "desc",
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    asset_type: Optional[str] = "stock",
+    include_hidden: bool = False,
+    analysis_symbols: Optional[List[str]] = None,
+) -> Dict:
+    """
+    One SELECT: criteria conditions + keyset condition, ordered by (sort key, symbol).
+    Pass the returned next_cursor to get the following page.
+    """
+    if order not in ("asc", "desc"):
+        raise ScreenError(f"Invalid order: {order}")
+    descending = order == "desc"
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    conditions, holdings, ignored = compile_criteria(criteria, analysis_symbols)
+    if asset_type:
+        conditions.append(Stock.asset_type == asset_type)
+    if not include_hidden:
+        conditions.append(Stock.is_hidden == False)
+    conditions.append(stock_is_listed())
+
+    key = _sort_key(sort, descending).label("sort_value")
+    query = select(Stock.symbol, key)
+    if holdings is not None:
+        query = query.outerjoin(holdings, holdings.c.symbol == Stock.symbol)
+
+    if conditions:
+        query = query.where(and_(*conditions))
+
+    if cursor:
+        after_value, after_symbol = decode_cursor(cursor)
+        beyond = key < after_value if descending else key > after_value
+        query = query.where(or_(beyond, and_(key == after_value, Stock.symbol > after_symbol)))
+
+    query = query.order_by(key.desc() if descending else key.asc(), Stock.symbol.asc()).limit(limit + 1)
+    rows = session.exec(query).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_more and rows else None
+    return {
+        "symbols": [r[0] for r in rows],
+        "next_cursor": next_cursor,
+        "ignored": ignored,
+    }
@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 
+def _missing(value):
+  # Indicators are NaN (not 0) until their window is filled
+  return pd.isna(value) or value == 0
+
 # --- Signal Functions ---
 
 def higher_200ma(data):
@@ -25,7 +29,7 @@ def uptrand_200ma(data):
   if data.empty or len(data) < 2: return 0
   ma200 = data['Close_MA200'].iloc[-1]
   ma200_prev = data['Close_MA200'].iloc[-2]
-  if ma200_prev == 0: return 0
+  if _missing(ma200_prev): return 0
   return 1 if ((ma200 - ma200_prev) / ma200_prev) * 1000 > 2 else 0
 
 def sameslope_50_200(data):
@@ -91,55 +95,55 @@ def close_ratio(info, data):
 def dev_200ma(info, data):
   close = data['Close'].iloc[-1]
   ma200 = data['Close_MA200'].iloc[-1]
-  if ma200 == 0: return 0
+  if _missing(ma200): return 0
   return round((close - ma200) / ma200 * 100, 1)
 
 def dev_50ma(info, data):
   close = data['Close'].iloc[-1]
   ma50 = data['Close_MA50'].iloc[-1]
-  if ma50 == 0: return 0
+  if _missing(ma50): return 0
   return round((close - ma50) / ma50 * 100, 1)
 
 def dev_20ma(info, data):
   close = data['Close'].iloc[-1]
   ma20 = data['Close_MA20'].iloc[-1]
-  if ma20 == 0: return 0
+  if _missing(ma20): return 0
   return round((close - ma20) / ma20 * 100, 1)
 
 def dev_5ma(info, data):
   close = data['Close'].iloc[-1]
   ma5 = data['Close_MA5'].iloc[-1]
-  if ma5 == 0: return 0
+  if _missing(ma5): return 0
   return round((close - ma5) / ma5 * 100, 1)
 
 def gain_volume(info, data):
   vol = data['Volume'].iloc[-1]
   ma50 = data['Volume_MA50'].iloc[-1]
-  if ma50 == 0: return 0
+  if _missing(ma50): return 0
   return round((vol - ma50) / ma50 * 100, 1)
 
 def slope_200ma(info, data):
   ma200 = data['Close_MA200'].iloc[-1]
   ma200_prev = data['Close_MA200'].iloc[-2]
-  if ma200_prev == 0: return 0
+  if _missing(ma200_prev): return 0
   return round((ma200 - ma200_prev) / ma200_prev * 1000, 1)
 
 def slope_50ma(info, data):
   ma50 = data['Close_MA50'].iloc[-1]
   ma50_prev = data['Close_MA50'].iloc[-2]
-  if ma50_prev == 0: return 0
+  if _missing(ma50_prev): return 0
   return round((ma50 - ma50_prev) / ma50_prev * 1000, 1)
 
 def slope_20ma(info, data):
   ma20 = data['Close_MA20'].iloc[-1]
   ma20_prev = data['Close_MA20'].iloc[-2]
-  if ma20_prev == 0: return 0
+  if _missing(ma20_prev): return 0
   return round((ma20 - ma20_prev) / ma20_prev * 1000, 1)
 
 def slope_5ma(info, data):
   ma5 = data['Close_MA5'].iloc[-1]
   ma5_prev = data['Close_MA5'].iloc[-2]
-  if ma5_prev == 0: return 0
+  if _missing(ma5_prev): return 0
   return round((ma5 - ma5_prev) / ma5_prev * 1000, 1)
 
 def atr_4w(info, data):
@@ -166,7 +170,7 @@ def calculate_atr(df, period):
     atr_val = target_df['TR'].tail(period).mean() # Average of TRs
     
     close = df['Close'].iloc[-1]
-    if close == 0: return 0
+    if _missing(close): return 0
     return round((atr_val / close) * 100, 2)
 
 
@@ -214,7 +218,7 @@ def rebound_5ma(data):
     ma5_t5 = data['Close_MA5'].iloc[-6]
     ma5_t6 = data['Close_MA5'].iloc[-7]
     
-    if ma5_t6 == 0: return 0
+    if _missing(ma5_t6): return 0
     
     slope_t5 = (ma5_t5 - ma5_t6) / ma5_t6 * 1000
     
@@ -237,7 +241,7 @@ def base_formation(data):
     max_close = last_10['Close'].max()
     min_close = last_10['Close'].min()
     
-    if min_close == 0: return 0
+    if _missing(min_close): return 0
     
     range_pct = (max_close - min_close) / min_close
     if range_pct > 0.05: return 0
@@ -2,19 +2,55 @@ import pandas as pd
 import yfinance as yf
 import lxml # Required for earnings_dates
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import date, timedelta, datetime
 import logging
+from .metrics import metrics
+from .negative_cache import negative_cache, UNKNOWN_SYMBOL, NO_DATA
+from .indicators import PRICE_INDICATORS
+from .frame_dtypes import compact_bars, widen
+import numpy as np
 
 # Configuration
 DATA_DIR = "../data/stocks"
 os.makedirs(DATA_DIR, exist_ok=True)
+# Trade analytics reread the stored closes until they are this old
+CLOSES_MAX_AGE_HOURS = 12
+# Last enriched frame per (symbol, period, interval), so a refetch only computes indicators for new/changed bars
+INDICATOR_CACHE_MB = 64
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STOCK_DATA_REQUESTS = metrics.counter(
+    "stock_data_requests_total", "get_stock_data calls; 'coalesced' joined an identical in-flight fetch.", ("result",)
+)
+INDICATOR_COMPUTES = metrics.counter(
+    "indicator_computes_total", "Indicator passes over a frame; 'incremental' reused a previous frame's rows.", ("mode",)
+)
+
+def is_valid_info(info) -> bool:
+    return bool(info) and ('symbol' in info or 'shortName' in info or 'longName' in info)
+
+class _Flight:
+    """One in-progress get_stock_data computation that concurrent callers wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
 class StockService:
     def __init__(self):
-        pass
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self.fetch_count = 0
+        self.coalesced_count = 0
+        self._enriched = OrderedDict() # key -> (index as int64, registry.block(), registry.columns)
+        self._enriched_bytes = 0
+        self._enriched_lock = threading.Lock()
 
     def get_stock_data_path(self, symbol, interval="1d"):
         return os.path.join(DATA_DIR, f"{symbol}_{interval}.parquet")
@@ -24,30 +60,74 @@ class StockService:
         try:
             # Delete for all common intervals
             intervals = ["1d", "1wk", "1mo"]
-            for interval in intervals:
-                path = self.get_stock_data_path(symbol, interval)
+            paths = [self.get_stock_data_path(symbol, interval) for interval in intervals] + [self.get_closes_path(symbol)]
+            for path in paths:
                 if os.path.exists(path):
                     os.remove(path)
                     logger.info(f"Deleted cache: {path}")
         except Exception as e:
             logger.error(f"Error deleting cache for {symbol}: {e}")
 
+    def delete_cache_many(self, symbols):
+        """
+        delete_cache for many symbols with one directory scan instead of
+        four existence checks per symbol, plus their in-memory indicator state.
+        Returns the number of files removed.
+        """
+        symbol_set = set(symbols)
+        with self._enriched_lock:
+            for key in [k for k in self._enriched if k[0] in symbol_set]:
+                index, block, _ = self._enriched.pop(key)
+                self._enriched_bytes -= index.nbytes + block.nbytes
+        names = set()
+        for symbol in symbols:
+            names.update(os.path.basename(self.get_stock_data_path(symbol, interval)) for interval in ["1d", "1wk", "1mo"])
+            names.add(os.path.basename(self.get_closes_path(symbol)))
+        removed = 0
+        try:
+            with os.scandir(DATA_DIR) as entries:
+                targets = [entry.path for entry in entries if entry.name in names]
+        except FileNotFoundError:
+            return 0
+        for path in targets:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                logger.error(f"Error deleting cache {path}: {e}")
+        logger.info(f"Deleted {removed} cache files for {len(symbols)} symbols")
+        return removed
+
     def get_stock_info(self, symbol):
+        """yfinance info dict, or None on error / for a ticker in the negative cache."""
+        if negative_cache.check(symbol):
+            return None
         try:
             ticker_symbol = symbol
             if symbol.isdigit() and len(symbol) == 4:
                 ticker_symbol = f"{symbol}.T"
             ticker = yf.Ticker(ticker_symbol)
-            return ticker.info
+            info = ticker.info
+            # Unknown tickers come back as a near-empty dict rather than an error
+            if is_valid_info(info):
+                negative_cache.resolve(symbol)
+            else:
+                negative_cache.record(symbol, UNKNOWN_SYMBOL, "No info from provider")
+            return info
         except Exception as e:
             logger.error(f"Error getting info for {symbol}: {e}")
             return None
 
-    def fetch_fundamentals(self, symbol):
+    def fetch_fundamentals(self, symbol, timer=None):
         """
         Fetch fundamental data: Market Cap, Earnings Dates.
         Returns dict with keys: market_cap, last_earnings_date, next_earnings_date
+        timer: optional metrics.StageTimer; sub-steps are marked as fundamentals.<step>
         """
+        def mark(step):
+            if timer:
+                timer.mark(f"fundamentals.{step}")
+
         try:
             ticker_symbol = symbol
             if symbol.isdigit() and len(symbol) == 4:
@@ -55,6 +135,7 @@ class StockService:
             
             ticker = yf.Ticker(ticker_symbol)
             info = ticker.info
+            mark("info")
             
             # Market Cap & Financials
             market_cap = info.get('marketCap')
@@ -122,6 +203,7 @@ class StockService:
                                     break
             except Exception as e:
                 logger.warning(f"Error fetching last earnings for {symbol}: {e}")
+            mark("sec_filings")
 
             # 2. Try Calendar for Next Earnings Date (Fast ~0.1s)
             try:
@@ -148,6 +230,7 @@ class StockService:
                              next_earnings = temp_next
             except Exception as e:
                 logger.warning(f"Error fetching calendar for {symbol}: {e}")
+            mark("calendar")
 
             # 3. Fallback: earnings_dates (Slow) - Only if missing data
             # Strict logic: enforce Last <= Now and Next >= Now
@@ -173,6 +256,7 @@ class StockService:
                 except Exception as e:
                      if not last_earnings or not next_earnings:
                         logger.warning(f"Error fetching earnings_dates fallback for {symbol}: {e}")
+                mark("earnings_dates")
 
             # Fallback for Last Earnings (if earnings_dates failed) - Use info 'mostRecentQuarter' only as last resort?
             # User specifically said 'mostRecentQuarter' is fiscal end, not report date.
@@ -194,7 +278,8 @@ class StockService:
     def fetch_news(self, symbol):
         """
         Fetch latest news from yfinance.
-        Returns list of dicts.
+        Returns list of dicts ([] when the symbol has no news), or None when the
+        fetch failed so callers do not record it as fetched.
         """
         try:
             ticker_symbol = symbol
@@ -261,7 +346,7 @@ class StockService:
             return results
         except Exception as e:
              logger.error(f"Error fetching news for {symbol}: {e}")
-             return []
+             return None
 
     def fetch_financial_history(self, symbol):
         """
@@ -356,6 +441,86 @@ class StockService:
     def get_stock_data(self, symbol, period="2y", interval="1d", force_refresh=False):
         """
         Get stock data, using cache if available and up-to-date.
+        Concurrent calls with the same (symbol, period, interval, force_refresh)
+        share one fetch; every caller gets its own copy of the DataFrame.
+        """
+        key = (symbol, period, interval, bool(force_refresh))
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.fetch_count += 1
+            else:
+                flight.waiters += 1
+                self.coalesced_count += 1
+        STOCK_DATA_REQUESTS.inc(result="fetched" if leader else "coalesced")
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result.copy()
+
+        try:
+            result = self._get_stock_data(symbol, period, interval, force_refresh)
+        except Exception as e:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.error = e
+            flight.done.set()
+            raise
+
+        # Unregister first so the waiter count is final before deciding whether to copy
+        with self._flights_lock:
+            self._flights.pop(key, None)
+            waiters = flight.waiters
+        flight.result = result
+        flight.done.set()
+        # Callers mutate the frame (add columns, reindex); keep the shared one pristine
+        return result.copy() if waiters else result
+
+    def get_closes_path(self, symbol):
+        return os.path.join(DATA_DIR, f"{symbol}_1d_close.parquet")
+
+    def get_daily_closes(self, symbol, max_age_hours=CLOSES_MAX_AGE_HOURS):
+        """
+        Long daily Close history (5y) kept on disk for trade analytics.
+        Read locally while the file is younger than max_age_hours, otherwise refetched
+        via get_stock_data and rewritten. Returns (closes, file_mtime or None).
+        """
+        path = self.get_closes_path(symbol)
+        if os.path.exists(path):
+            mtime = os.path.getmtime(path)
+            if time.time() - mtime < max_age_hours * 3600:
+                try:
+                    return pd.read_parquet(path)["Close"], mtime
+                except Exception as e:
+                    logger.error(f"Error reading closes for {symbol}: {e}")
+
+        df = self.get_stock_data(symbol, period="5y", interval="1d")
+        if not df.empty:
+            closes = widen(df["Close"].dropna())
+            try:
+                closes.to_frame("Close").to_parquet(path)
+                return closes, os.path.getmtime(path)
+            except Exception as e:
+                logger.error(f"Error writing closes for {symbol}: {e}")
+                return closes, None
+        if os.path.exists(path):
+            # Fetch failed (delisted, offline): stale bars beat none
+            return pd.read_parquet(path)["Close"], os.path.getmtime(path)
+        return pd.Series(dtype=float), None
+
+    def get_singleflight_stats(self):
+        with self._flights_lock:
+            in_flight = len(self._flights)
+        return {"fetched": self.fetch_count, "coalesced": self.coalesced_count, "in_flight": in_flight}
+
+    def _get_stock_data(self, symbol, period="2y", interval="1d", force_refresh=False):
+        """
+        Uncoalesced implementation of get_stock_data.
         Auto-detects splits by comparing latest price if cached.
         """
         # Weekly data needs longer period for meaningful chart
@@ -382,13 +547,18 @@ class StockService:
                     if interval == '1wk':
                         df = self._correct_weekly_candle(symbol, df)
                     
-                    df = self._add_technical_indicators(df)
+                    df = self._add_technical_indicators(df, key=(symbol, period, interval))
                     return df
                 
                 pass 
             except Exception as e:
                 logger.error(f"Error reading cache for {symbol}: {e}")
         
+        # Known-bad ticker: skip the provider until its negative cache entry expires
+        if negative_cache.check(symbol):
+            logger.info(f"Skipping fetch for {symbol}: in failed-ticker cache")
+            return pd.DataFrame()
+
         # Fetch data
         logger.info(f"Fetching data for {symbol} (interval={interval})...")
         
@@ -408,7 +578,14 @@ class StockService:
 
             if df.empty:
                 logger.warning(f"No data for {symbol}")
+                # yfinance also returns an empty frame on network errors and rate limits, and
+                # download() only logs the reason. Ask the info endpoint: an unknown ticker is
+                # recorded there (and escalates); anything else gets a short, flat backoff.
+                info = self.get_stock_info(symbol)
+                if info is None or is_valid_info(info):
+                    negative_cache.record(symbol, NO_DATA, f"Empty download (period={period}, interval={interval})")
                 return pd.DataFrame()
+            negative_cache.resolve(symbol)
 
             # Fix: Extract specific ticker if MultiIndex (yfinance thread-safety/state issue fix)
             if isinstance(df.columns, pd.MultiIndex):
@@ -439,13 +616,17 @@ class StockService:
                      df.columns = df.columns.get_level_values(0)
 
             # Enrich with indicators
-            df = self._add_technical_indicators(df)
+            df = self._add_technical_indicators(df, key=(symbol, period, interval))
             return df
         except Exception as e:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return pd.DataFrame()
 
-    def _add_technical_indicators(self, data):
+    def _add_technical_indicators(self, data, key=None):
+        """
+        Add the PRICE_INDICATORS columns; the result is compacted to float32 with NaN kept
+        (services/frame_dtypes.py). With a key, only bars that differ from the previous frame of that key are computed.
+        """
         if data.empty: 
             return data
             
@@ -465,39 +646,69 @@ class StockService:
             elif data.columns.nlevels > 1:
                  data.columns = data.columns.get_level_values(0)
         
-        # Calculate MAs
-        # Use proper column names (Title Case usually)
-        # yf 0.2+ returns Capitalized (Open, High...)
-        
+        # MAs, deviations, slopes, volume MAs (services/indicators.py)
         try:
-            data['Close_MA5'] = data['Close'].rolling(window=5).mean()
-            data['Close_MA20'] = data['Close'].rolling(window=20).mean()
-            data['Close_MA50'] = data['Close'].rolling(window=50).mean()
-            data['Close_MA200'] = data['Close'].rolling(window=200).mean()
-
-            # Calculate Deviations ((Close - MA) / MA * 100)
-            data['Deviation_MA5'] = ((data['Close'] - data['Close_MA5']) / data['Close_MA5']) * 100
-            data['Deviation_MA20'] = ((data['Close'] - data['Close_MA20']) / data['Close_MA20']) * 100
-            data['Deviation_MA50'] = ((data['Close'] - data['Close_MA50']) / data['Close_MA50']) * 100
-            data['Deviation_MA200'] = ((data['Close'] - data['Close_MA200']) / data['Close_MA200']) * 100
-            
-            # Calculate Slopes (Daily Change of MA)
-            # User Request: (Slope / Close) * 100 * 100 = (Slope / Close) * 10000
-            cols = [('Close_MA5', 'Slope_MA5'), ('Close_MA20', 'Slope_MA20'), ('Close_MA50', 'Slope_MA50'), ('Close_MA200', 'Slope_MA200')]
-            for ma_col, slope_col in cols:
-                # diff / close * 10000
-                data[slope_col] = ((data[ma_col] - data[ma_col].shift(1)) / data['Close']) * 10000
-
-            if 'Volume' in data.columns:
-                data['Volume_MA50'] = data['Volume'].rolling(window=50).mean()
-                data['Volume_MA200'] = data['Volume'].rolling(window=200).mean()
+            data = self._compute_indicators(data, PRICE_INDICATORS.usable(data), key)
         except KeyError as e:
             logger.error(f"Missing column for MA calc: {e}")
         
-        data = data.round(2)
-        data.fillna(0, inplace=True)
+        return compact_bars(data)
+
+    def _compute_indicators(self, data, registry, key=None):
+        if key is None or not registry.indicators:
+            INDICATOR_COMPUTES.inc(mode="full")
+            return registry.compute(data)
+        with self._enriched_lock:
+            previous = self._enriched.get(key)
+        aligned, start = self._align_previous(previous, data, registry) if previous else (None, 0)
+        if start > registry.lookback:
+            INDICATOR_COMPUTES.inc(mode="incremental")
+            data = registry.extend(aligned, data, start)
+        else:
+            INDICATOR_COMPUTES.inc(mode="full")
+            data = registry.compute(data)
+
+        entry = (data.index.asi8.copy(), registry.block(data), registry.columns)
+        size = entry[0].nbytes + entry[1].nbytes
+        with self._enriched_lock:
+            old = self._enriched.pop(key, None)
+            if old:
+                self._enriched_bytes -= old[0].nbytes + old[1].nbytes
+            self._enriched[key] = entry
+            self._enriched_bytes += size
+            while self._enriched_bytes > INDICATOR_CACHE_MB * 1024 * 1024 and len(self._enriched) > 1:
+                _, (index, block, _) = self._enriched.popitem(last=False)
+                self._enriched_bytes -= index.nbytes + block.nbytes
         return data
 
+    @staticmethod
+    def _align_previous(previous, data, registry):
+        """
+        The previous frame's block lined up with data by date, and the number of leading
+        bars (dates and inputs) the two share. A refetch of a fixed period ('2y') starts a
+        bar later each day, so data may begin inside the previous frame. Returns (block, 0)
+        when nothing can be reused.
+        """
+        index, block, columns = previous
+        if columns != registry.columns or len(data) == 0:
+            return None, 0
+        dates = data.index.asi8
+        offset = int(np.searchsorted(index, dates[0]))
+        if offset >= len(index) or index[offset] != dates[0]:
+            return None, 0
+        index, block = index[offset:], block[offset:]
+        n = min(len(index), len(data))
+        same = index[:n] == dates[:n]
+        a = block[:n, :len(registry.sources)]
+        b = data[registry.sources].to_numpy(dtype=float)[:n]
+        same &= ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+        changed = np.flatnonzero(~same)
+        start = int(changed[0]) if len(changed) else n
+        if offset and start > registry.lookback:
+            # The first bars lost the history before them
+            block = registry.rebase(block)
+        return block, start
+
     def _correct_weekly_candle(self, symbol, df):
         """
         Manually correct or append the last weekly candle using recent daily data.
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel import Session
+from ..database import engine, NewsSummaryCache
+
+_WS_RE = re.compile(r"\s+")
+
+def normalize_headline(title: str) -> str:
+    """NFKC, lowercase and collapse whitespace so trivial formatting changes hash the same."""
+    title = unicodedata.normalize("NFKC", title or "")
+    return _WS_RE.sub(" ", title).strip().lower()
+
+class SummaryCache:
+    """
+    Content-addressed cache for Gemini news summaries.
+    The key covers the prompt template and the normalized, de-duplicated, sorted
+    headline set, so unchanged news (or the same headlines on related tickers)
+    reuses the stored summary instead of opening a new browser request.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, headlines: List[str], template: str) -> str:
+        normalized = sorted({normalize_headline(h) for h in headlines if h})
+        payload = json.dumps({"template": template, "headlines": normalized}, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with Session(engine) as session:
+            row = session.get(NewsSummaryCache, key)
+            if row:
+                row.hit_count += 1
+                row.last_used_at = datetime.utcnow()
+                session.add(row)
+                session.commit()
+                with self._lock:
+                    self.hits += 1
+                return row.summary
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, summary: str, headline_count: int = 0):
+        with Session(engine) as session:
+            row = session.get(NewsSummaryCache, key)
+            if row:
+                row.summary = summary
+                row.last_used_at = datetime.utcnow()
+            else:
+                row = NewsSummaryCache(content_hash=key, summary=summary, headline_count=headline_count)
+            session.add(row)
+            session.commit()
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+summary_cache = SummaryCache()
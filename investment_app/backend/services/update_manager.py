@@ -1,15 +1,32 @@
+import os
 import time
+import cProfile
 import threading
 import traceback
 from datetime import datetime, timedelta
 import pytz
 from sqlmodel import Session, select
-from ..database import engine, Stock
+from ..database import engine, Stock, DATA_DIR, stock_is_listed
 from ..services.stock_service import stock_service
 from ..services.signals import get_signal_functions
+from ..services.metrics import StageTimer, UPDATE_STAGE_SECONDS, UPDATE_SYMBOLS
+from ..services.run_log import run_log
+from ..services.metric_snapshots import metric_snapshots
+from ..services.heatmap import heatmap_cache
+from ..services.rs_rank import rs_rank_service
+from ..services.group_summaries import group_summaries
+from ..services.progress_stream import progress_stream
+from ..services.negative_cache import negative_cache
+from ..services import bulk_symbols
+from ..services.indicators import chart_smas, ATR_14
+from ..services.frame_dtypes import bar_value, widen
 import pandas as pd
 
 JST = pytz.timezone('Asia/Tokyo')
+# refresh_symbol reuses the last ^GSPC changes for this long
+SP500_CACHE_SECONDS = 3600
+RETRY_WAIT_SECONDS = 600
+CHART_SMAS = chart_smas("1d")
 
 class UpdateManager:
     _instance = None
@@ -43,6 +60,9 @@ class UpdateManager:
                 
             cls._instance.is_stop_requested = False
             cls._instance.thread = None
+            cls._instance.profile = False
+            cls._instance._sp500_cache = None
+            cls._instance._reset_throughput()
         return cls._instance
 
     def get_status(self):
@@ -54,23 +74,100 @@ class UpdateManager:
             "last_completed": self.last_completed
         }
 
-    def start_update(self):
+    def _reset_throughput(self):
+        self.run_started = None
+        self.symbols_done = 0
+        self.stage_totals = {}
+
+    def _record_throughput(self, stage_seconds):
+        self.symbols_done += 1
+        for stage, seconds in stage_seconds.items():
+            self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+
+    def get_progress(self):
+        """get_status plus throughput of the current run (pushed by /system/stream)."""
+        status = self.get_status()
+        elapsed = (time.monotonic() - self.run_started) if self.run_started else 0.0
+        done = self.symbols_done
+        status["throughput"] = {
+            "elapsed_seconds": round(elapsed, 1),
+            "symbols_per_sec": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+            "stages": {
+                stage: {
+                    "avg_ms": round(total / done * 1000, 1),
+                    "symbols_per_sec": round(done / total, 1) if total > 0 else None
+                } for stage, total in self.stage_totals.items()
+            } if done else {}
+        }
+        return status
+
+    def start_update(self, profile: bool = False):
+        """
+        profile=True wraps the run in cProfile and dumps the stats file to
+        DATA_DIR/profiles (path is stored on the run, see /system/update/runs).
+        """
         if self.status in ["running", "waiting_retry"]:
             return False
         
         self.is_stop_requested = False
+        self.profile = profile
         self.thread = threading.Thread(target=self._run_loop)
         self.thread.start()
         return True
         
     def _run_loop(self):
+        started = datetime.utcnow()
+        run_id = None
+        try:
+            run_id = run_log.start_run()
+        except Exception as e:
+            print(f"Run log unavailable: {e}")
+
+        profiler = None
+        if self.profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            self._run_update()
+        finally:
+            profile_path = None
+            if profiler:
+                profiler.disable()
+                try:
+                    profile_dir = os.path.join(DATA_DIR, "profiles")
+                    os.makedirs(profile_dir, exist_ok=True)
+                    profile_path = os.path.join(profile_dir, f"update_run_{run_id or started.strftime('%Y%m%d_%H%M%S')}.prof")
+                    profiler.dump_stats(profile_path)
+                    print(f"[UpdateManager] Profile written to {profile_path}")
+                except Exception as e:
+                    print(f"Failed to write profile: {e}")
+            # Aggregates derived from Stock rows are rebuilt on next request
+            heatmap_cache.invalidate()
+            try:
+                with Session(engine) as session:
+                    bulk_symbols.prune_tombstones(session)
+                    session.commit()
+            except Exception as e:
+                print(f"Tombstone prune failed: {e}")
+            status = self.status if self.status in ("completed", "error") else "stopped"
+            try:
+                run_log.finish_run(status, started, profile_path)
+            except Exception as e:
+                print(f"Run log finish failed: {e}")
+
+    def _run_update(self):
         self.status = "running"
         self.message = "Initializing update..."
         self.progress = 0
+        self._reset_throughput()
+        self.run_started = time.monotonic()
+        metric_snapshots.begin_run()
+        progress_stream.emit("update", "started", {})
         
         try:
             with Session(engine) as session:
-                stocks = session.exec(select(Stock)).all()
+                # Pending symbols are refreshed by the enrichment worker
+                stocks = session.exec(select(Stock).where(stock_is_listed())).all()
                 self.total = len(stocks)
             
             # Identify stocks to update (Simple logic: just update all for now as requested "All stocks update logic")
@@ -80,6 +177,8 @@ class UpdateManager:
             
             # 1. Update Loop
             self._process_stocks(stocks, error_stocks)
+            self._rank_universe()
+            self._summarize_groups()
             
             # 2. Retry Loop
             while error_stocks and not self.is_stop_requested:
@@ -87,7 +186,7 @@ class UpdateManager:
                 self.message = f"Errors in {len(error_stocks)} stocks. Retrying in 10 minutes..."
                 
                 # Wait 10 mins (check stop every second)
-                for _ in range(600): 
+                for _ in range(RETRY_WAIT_SECONDS): 
                     if self.is_stop_requested: break
                     time.sleep(1)
                 
@@ -107,17 +206,23 @@ class UpdateManager:
                 # But to avoid refactoring helper, let's just pass the list.
                 # Note: `_process_stocks` handles session creation.
                 self._process_stocks(retry_targets, error_stocks)
+                self._rank_universe()
+                self._summarize_groups()
                 
             if not self.is_stop_requested:
                 self.status = "completed"
                 self.message = "All updates completed."
                 # Use UTC to match DB fallback logic
                 self.last_completed = datetime.utcnow().isoformat() + 'Z'
+                progress_stream.emit("update", "completed", self.get_progress())
+            else:
+                progress_stream.emit("update", "stopped", self.get_progress())
                 
         except Exception as e:
             self.status = "error"
             self.message = f"System error: {str(e)}"
             traceback.print_exc()
+            progress_stream.emit("update", "failed", {"message": self.message})
             
     def _process_stocks(self, stocks, error_list):
         count = 0 
@@ -130,30 +235,7 @@ class UpdateManager:
              # Safest is to extract symbols and re-fetch.
              symbols=[s.symbol if isinstance(s, Stock) else s for s in stocks]
 
-             # --- PRE-FETCH SP500 FOR RS CALCULATION ---
-             sp500_changes = {}
-             try:
-                 print("Fetching ^GSPC for RS comparison...")
-                 sp500_df = stock_service.get_stock_data('^GSPC', period='2y', interval='1d', force_refresh=True)
-                 if not sp500_df.empty:
-                     sp500_close = sp500_df['Close']
-                     sp500_curr = sp500_close.iloc[-1]
-                     
-                     def calc_sp_change(days):
-                        if len(sp500_close) > days:
-                            idx = -(days + 1)
-                            if abs(idx) <= len(sp500_close):
-                                prev = sp500_close.iloc[idx]
-                                if prev != 0: return ((sp500_curr - prev) / prev) * 100.0
-                        return None
-                        
-                     sp500_changes[5] = calc_sp_change(5)
-                     sp500_changes[20] = calc_sp_change(20)
-                     sp500_changes[50] = calc_sp_change(50)
-                     sp500_changes[200] = calc_sp_change(200)
-             except Exception as e:
-                 print(f"Failed to fetch SP500: {e}")
-             # ------------------------------------------
+             sp500_changes = self._fetch_sp500_changes()
              
              # Process in chunks to commit periodically
              chunk_size = 50
@@ -161,9 +243,11 @@ class UpdateManager:
                  if self.is_stop_requested: break
                  
                  chunk = symbols[i:i+chunk_size]
+                 updated = []
                  
                  for sym in chunk:
                      if self.is_stop_requested: break
+                     stages = None
                      try:
                          self.message = f"Updating {sym} ({self.progress + 1}/{self.total})..."
                          
@@ -173,263 +257,30 @@ class UpdateManager:
                          if stock.is_hidden:
                              # print(f"Skipping hidden stock {sym}")
                              self.progress += 1 # Count as processed
+                             UPDATE_SYMBOLS.inc(result="skipped")
+                             continue
+
+                         if negative_cache.check(sym):
+                             # Known-bad ticker (typo/delisted): no provider call, no retry
+                             self.progress += 1
+                             UPDATE_SYMBOLS.inc(result="skipped")
                              continue
                          
-                         # Data Fetch & Update Logic (From update_price_stats.py)
-                         # Use force_refresh=True to ensure we get latest if it's 9:30
-                         df = stock_service.get_stock_data(stock.symbol, period='2y', interval='1d', force_refresh=True)
-                         
-                         if df.empty or len(df) < 5:
-                            if df.empty: raise Exception("Empty data")
-                         
-                         # --- Fundamentals (Market Cap, Earnings) ---
-                         # Run this less frequently? Or every time? User requested "Update" so let's do it.
-                         try:
-                             # print(f"[DEBUG] Fetching fundamentals for {sym}...")
-                             funds = stock_service.fetch_fundamentals(stock.symbol)
-                             
-                             if 'market_cap' in funds and funds['market_cap']:
-                                 stock.market_cap = funds['market_cap']
-                                 
-                             # Allow clearing dates if None (to fix stale past dates)
-                             if 'next_earnings_date' in funds:
-                                 stock.next_earnings_date = funds['next_earnings_date']
-                                 
-                             if 'last_earnings_date' in funds:
-                                 stock.last_earnings_date = funds['last_earnings_date']
-                                 
-                         except Exception as e:
-                             print(f"Fundamentals fetch failed for {sym}: {e}")
-
-                         # --- Volume & Volume % ---
-                         try:
-                             # print(f"[DEBUG] Calculating volume for {sym}...")
-                             # Find last row with valid Volume
-                             # df['Volume'] might have NaNs (e.g. today's incomplete data)
-                             # We want the last actual trading volume.
-                             valid_vol_mask = df['Volume'].notna() & (df['Volume'] > 0)
-                             if valid_vol_mask.any():
-                                 current_volume = df.loc[valid_vol_mask, 'Volume'].iloc[-1]
-                                 stock.volume = float(current_volume)
-                                 # print(f"[DEBUG] {sym} Volume: {stock.volume}")
-                                 
-                                 # For increase %, compare with the volume BEFORE the last valid one
-                                 # We need the index of the last valid volume
-                                 last_valid_idx = df.index[valid_vol_mask][-1]
-                                 # Get position integer
-                                 pos = df.index.get_loc(last_valid_idx)
-                                 
-                                 if pos > 0:
-                                     # Previous volume is the one at pos-1? 
-                                     # Need to check if THAT one is valid? 
-                                     # Usually yes, but let's just take the row before.
-                                     # If there are gaps, we might want the last valid before that.
-                                     # Simplification: use shift on masked series?
-                                     valid_series = df.loc[valid_vol_mask, 'Volume']
-                                     if len(valid_series) >= 2:
-                                         prev_volume = valid_series.iloc[-2]
-                                         if prev_volume > 0:
-                                             stock.volume_increase_pct = ((current_volume - prev_volume) / prev_volume) * 100.0
-                                         else:
-                                             stock.volume_increase_pct = 0.0
-                                     else:
-                                         stock.volume_increase_pct = 0.0
-                                 else:
-                                     stock.volume_increase_pct = 0.0
-                             else:
-                                 # No valid volume in entire history??
-                                 stock.volume = None
-                                 stock.volume_increase_pct = None
-
-                         except Exception as e:
-                             print(f"Volume calc failed for {sym}: {e}")
-                             
-                         # Metadata Backfill (Sector/Industry)
-                         if not stock.sector or not stock.industry:
-                             try:
-                                 info = stock_service.get_stock_info(stock.symbol)
-                                 if info:
-                                     if not stock.sector: stock.sector = info.get('sector')
-                                     if not stock.industry: stock.industry = info.get('industry')
-                                     # Optional: Backfill company name if missing
-                                     if not stock.company_name:
-                                         stock.company_name = info.get('longName') or info.get('shortName')
-                             except Exception as e:
-                                 print(f"Metadata fetch failed for {sym}: {e}")
-
-                         close = df['Close']
-                         current_price = close.iloc[-1]
-                         
-                         # --- Chart Data Population ---
-                         # Extract last 40 days for mini chart
-                         # Columns needed: Open, High, Low, Close, Volume
-                         try:
-                             if not df.empty:
-                                 # Calculate SMAs for the whole df first
-                                 df['SMA5'] = df['Close'].rolling(window=5).mean()
-                                 df['SMA20'] = df['Close'].rolling(window=20).mean()
-                                 df['SMA50'] = df['Close'].rolling(window=50).mean()
-                                 df['SMA100'] = df['Close'].rolling(window=100).mean()
-                                 df['SMA200'] = df['Close'].rolling(window=200).mean()
-
-                                 chart_df = df.tail(40).copy()
-                                 
-                                 chart_data = []
-                                 for dt, row in chart_df.iterrows():
-                                     chart_data.append({
-                                         "d": dt.strftime('%Y-%m-%d'),
-                                         "o": float(row['Open']),
-                                         "h": float(row['High']),
-                                         "l": float(row['Low']),
-                                         "c": float(row['Close']),
-                                         "v": int(row['Volume']),
-                                         "sap": [ # SMAs Array
-                                             float(row['SMA5']) if pd.notna(row['SMA5']) else None,
-                                             float(row['SMA20']) if pd.notna(row['SMA20']) else None,
-                                             float(row['SMA50']) if pd.notna(row['SMA50']) else None,
-                                             float(row['SMA200']) if pd.notna(row['SMA200']) else None,
-                                             float(row['SMA100']) if pd.notna(row['SMA100']) else None
-                                         ]
-                                     })
-                                 import json
-                                 stock.daily_chart_data = json.dumps(chart_data)
-                         except Exception as e:
-                             print(f"Chart data error {sym}: {e}")
-                         # -----------------------------
-                         
-                         # Calcs
-                         def calc_change(days):
-                            if len(close) > days:
-                                idx = -(days + 1)
-                                if abs(idx) <= len(close):
-                                    prev = close.iloc[idx]
-                                    if prev != 0: return ((current_price - prev) / prev) * 100.0
-                            return None
-
-                         stock.change_percentage_1d = calc_change(1)
-                         stock.change_percentage_5d = calc_change(5)
-                         stock.change_percentage_20d = calc_change(20)
-                         stock.change_percentage_50d = calc_change(50)
-                         stock.change_percentage_200d = calc_change(200)
-
-                         # Save Current Price
-                         stock.current_price = float(current_price)
-                         
-                         # Calculate RS (Stock Change - SP500 Change)
-                         if stock.change_percentage_5d is not None and sp500_changes.get(5) is not None:
-                             stock.rs_5d = stock.change_percentage_5d - sp500_changes[5]
-                         if stock.change_percentage_20d is not None and sp500_changes.get(20) is not None:
-                             stock.rs_20d = stock.change_percentage_20d - sp500_changes[20]
-                         if stock.change_percentage_50d is not None and sp500_changes.get(50) is not None:
-                             stock.rs_50d = stock.change_percentage_50d - sp500_changes[50]
-                         if stock.change_percentage_200d is not None and sp500_changes.get(200) is not None:
-                             stock.rs_200d = stock.change_percentage_200d - sp500_changes[200]
-                         
-                         # ATR
-                         try:
-                            high = df['High']
-                            low = df['Low']
-                            prev_close = close.shift(1)
-                            tr1 = high - low
-                            tr2 = (high - prev_close).abs()
-                            tr3 = (low - prev_close).abs()
-                            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-                            atr = tr.rolling(window=14).mean()
-                            if len(atr) > 0 and pd.notna(atr.iloc[-1]):
-                                stock.atr_14 = float(atr.iloc[-1])
-                         except: pass
-
-                         # Signals
-                         try:
-                            sig_funcs = get_signal_functions()
-                            for name, func in sig_funcs.items():
-                                val = func(df)
-                                setattr(stock, f"signal_{name}", int(val))
-                         except: pass
-                         # Store Deviations
-                         try:
-                             if 'Deviation_MA5' in df.columns and pd.notna(df['Deviation_MA5'].iloc[-1]):
-                                 stock.deviation_5ma_pct = float(df['Deviation_MA5'].iloc[-1])
-                             if 'Deviation_MA20' in df.columns and pd.notna(df['Deviation_MA20'].iloc[-1]):
-                                 stock.deviation_20ma_pct = float(df['Deviation_MA20'].iloc[-1])
-                             if 'Deviation_MA50' in df.columns and pd.notna(df['Deviation_MA50'].iloc[-1]):
-                                 stock.deviation_50ma_pct = float(df['Deviation_MA50'].iloc[-1])
-                             if 'Deviation_MA200' in df.columns and pd.notna(df['Deviation_MA200'].iloc[-1]):
-                                 stock.deviation_200ma_pct = float(df['Deviation_MA200'].iloc[-1])
-                         except Exception as e:
-                             print(f"Deviation save error {sym}: {e}")
-
-                         # Store Slopes & Predictions
-                         try:
-                             slope_5ma = None
-                             slope_5ma_prev = None
-                             slope_5ma_prev2 = None
-                             close_minus_4 = None
-                             close_minus_5 = None
-                             
-                             # Helper to safely get value by index
-                             def get_val(series, idx):
-                                 try:
-                                     val = series.iloc[idx]
-                                     if pd.notna(val): return float(val)
-                                 except: pass
-                                 return None
-
-                             if 'Close_MA5' in df.columns:
-                                 ma5 = df['Close_MA5']
-                                 
-                                 if 'Slope_MA5' in df.columns:
-                                     slopes = df['Slope_MA5']
-                                     slope_5ma = get_val(slopes, -1) # T
-                                     slope_5ma_prev = get_val(slopes, -2) # T-1
-                                     slope_5ma_prev2 = get_val(slopes, -3) # T-2
-                                 
-                                 close_minus_4 = get_val(df['Close'], -5) 
-                                 close_minus_5 = get_val(df['Close'], -6) 
-
-                             if 'Slope_MA5' in df.columns and pd.notna(df['Slope_MA5'].iloc[-1]):
-                                 stock.slope_5ma = float(df['Slope_MA5'].iloc[-1])
-                             if 'Slope_MA20' in df.columns and pd.notna(df['Slope_MA20'].iloc[-1]):
-                                 stock.slope_20ma = float(df['Slope_MA20'].iloc[-1])
-                             if 'Slope_MA50' in df.columns and pd.notna(df['Slope_MA50'].iloc[-1]):
-                                 stock.slope_50ma = float(df['Slope_MA50'].iloc[-1])
-                             if 'Slope_MA200' in df.columns and pd.notna(df['Slope_MA200'].iloc[-1]):
-                                 stock.slope_200ma = float(df['Slope_MA200'].iloc[-1])
-                                 
-                             # --- Prediction Logic ---
-                             # 1. Predicted Price Next (Tomorrow, T+1)
-                             if ma5 is not None and len(ma5) >= 2 and close_minus_4 is not None:
-                                  ma5_t = get_val(ma5, -1)
-                                  ma5_t_1 = get_val(ma5, -2)
-                                  
-                                  if ma5_t is not None and ma5_t_1 is not None and slope_5ma is not None and slope_5ma_prev is not None:
-                                      if (slope_5ma * slope_5ma_prev) >= 0:
-                                          delta_ma = ma5_t - ma5_t_1
-                                          stock.predicted_price_next = 5 * delta_ma + close_minus_4
-                                      else:
-                                          stock.predicted_price_next = None 
-                                  else:
-                                       stock.predicted_price_next = None
-
-                             # 2. Predicted Price Today (Prior Prediction, T)
-                             if ma5 is not None and len(ma5) >= 3 and close_minus_5 is not None:
-                                  ma5_t_1 = get_val(ma5, -2)
-                                  ma5_t_2 = get_val(ma5, -3)
-                                  
-                                  if ma5_t_1 is not None and ma5_t_2 is not None and slope_5ma_prev is not None and slope_5ma_prev2 is not None:
-                                      if (slope_5ma_prev * slope_5ma_prev2) >= 0:
-                                           delta_ma_prev = ma5_t_1 - ma5_t_2
-                                           stock.predicted_price_today = 5 * delta_ma_prev + close_minus_5
-                                      else:
-                                          stock.predicted_price_today = None
-                                  else:
-                                       stock.predicted_price_today = None
-
-                         except Exception as e:
-                             print(f"Prediction/Slope save error {sym}: {e}")
-
-                         stock.updated_at = datetime.utcnow()
+                         # Per-stage timings (see /system/metrics)
+                         stages = StageTimer(UPDATE_STAGE_SECONDS)
+                         df = self._update_symbol_metrics(stock, sp500_changes, stages)
+
+                         # A symbol whose enrichment failed is complete once an update gets through
+                         stock.enrichment_status = None
+                         updated.append(stock)
                          session.add(stock)
+                         # Daily history of the metrics overwritten above (keyed by bar date)
+                         metric_snapshots.record(stock, df.index[-1].date())
+                         stages.mark("indicators")
+                         stage_seconds = stages.finish()
+                         run_log.record(sym, stage_seconds)
+                         self._record_throughput(stage_seconds)
+                         UPDATE_SYMBOLS.inc(result="ok")
                          
                          # Add delay to prevent rate limiting (yfinance is sensitive)
                          time.sleep(0.5)
@@ -438,13 +289,362 @@ class UpdateManager:
                          
                      except Exception as e:
                          print(f"Error updating {sym}: {e}")
-                         # Add to error list for retry
-                         if sym not in error_list:
+                         # Add to error list for retry, unless the failure put it in the
+                         # negative cache for longer than the retry wait
+                         blocked = negative_cache.check(sym)
+                         retry_at = datetime.utcnow() + timedelta(seconds=RETRY_WAIT_SECONDS)
+                         if sym not in error_list and not (blocked and blocked["expires_at"] > retry_at):
                              error_list.append(sym)
+                         UPDATE_SYMBOLS.inc(result="error")
+                         progress_stream.emit("update", "symbol_error", {"symbol": sym, "error": str(e)})
+                         if stages:
+                             stages.mark("error")
+                             run_log.record(sym, stages.finish(), error=str(e))
                  
-                 session.commit()
+                 # Stamp at commit time, not per symbol: /stocks/changes only re-reads a
+                 # short overlap before its watermark, and a chunk stays open for minutes
+                 now = datetime.utcnow()
+                 for stock in updated:
+                     stock.updated_at = now
+                 run_log.flush(session)
+                 metric_snapshots.flush(session)
+                 with UPDATE_STAGE_SECONDS.time(stage="commit"):
+                     session.commit()
                  
+    def _fetch_sp500_changes(self):
+        """^GSPC % change over 5/20/50/200 days, for the per-stock rs_* columns."""
+        sp500_changes = {}
+        try:
+            print("Fetching ^GSPC for RS comparison...")
+            sp500_df = stock_service.get_stock_data('^GSPC', period='2y', interval='1d', force_refresh=True)
+            if not sp500_df.empty:
+                sp500_close = widen(sp500_df['Close'].dropna())
+                sp500_curr = sp500_close.iloc[-1]
+
+                def calc_sp_change(days):
+                   if len(sp500_close) > days:
+                       idx = -(days + 1)
+                       if abs(idx) <= len(sp500_close):
+                           prev = sp500_close.iloc[idx]
+                           if prev != 0: return ((sp500_curr - prev) / prev) * 100.0
+                   return None
+
+                sp500_changes[5] = calc_sp_change(5)
+                sp500_changes[20] = calc_sp_change(20)
+                sp500_changes[50] = calc_sp_change(50)
+                sp500_changes[200] = calc_sp_change(200)
+        except Exception as e:
+            print(f"Failed to fetch SP500: {e}")
+        self._sp500_cache = (time.monotonic(), sp500_changes)
+        return sp500_changes
+
+    def refresh_symbol(self, symbol):
+        """
+        Full metric refresh of one stock outside a run (background enrichment of
+        newly added symbols). Raises when no bars could be fetched.
+        """
+        cached = self._sp500_cache
+        if cached and cached[1] and time.monotonic() - cached[0] < SP500_CACHE_SECONDS:
+            sp500_changes = cached[1]
+        else:
+            sp500_changes = self._fetch_sp500_changes()
+        with Session(engine) as session:
+            stock = session.get(Stock, symbol)
+            if not stock:
+                return None
+            stages = StageTimer(UPDATE_STAGE_SECONDS)
+            self._update_symbol_metrics(stock, sp500_changes, stages)
+            stages.finish()
+            stock.updated_at = datetime.utcnow()
+            session.add(stock)
+            session.commit()
+            session.refresh(stock)
+            return stock
+
+    def _update_symbol_metrics(self, stock, sp500_changes, stages):
+        """
+        Fetch bars and fundamentals for one stock and set every derived column on it
+        (volume, chart data, changes, RS, ATR, signals, deviations, slopes, predictions).
+        Raises when no bars could be fetched. Returns the bar frame.
+        """
+        sym = stock.symbol
+        # Data Fetch & Update Logic (From update_price_stats.py)
+        # Use force_refresh=True to ensure we get latest if it's 9:30
+        df = stock_service.get_stock_data(stock.symbol, period='2y', interval='1d', force_refresh=True)
+
+        if df.empty or len(df) < 5:
+           if df.empty: raise Exception("Empty data")
+        stages.mark("fetch")
+
+        # --- Fundamentals (Market Cap, Earnings) ---
+        # Run this less frequently? Or every time? User requested "Update" so let's do it.
+        try:
+            # print(f"[DEBUG] Fetching fundamentals for {sym}...")
+            funds = stock_service.fetch_fundamentals(stock.symbol, timer=stages)
+
+            if 'market_cap' in funds and funds['market_cap']:
+                stock.market_cap = funds['market_cap']
+
+            # Allow clearing dates if None (to fix stale past dates)
+            if 'next_earnings_date' in funds:
+                stock.next_earnings_date = funds['next_earnings_date']
+
+            if 'last_earnings_date' in funds:
+                stock.last_earnings_date = funds['last_earnings_date']
+
+        except Exception as e:
+            print(f"Fundamentals fetch failed for {sym}: {e}")
+        stages.mark("fundamentals")
+
+        # --- Volume & Volume % ---
+        try:
+            # print(f"[DEBUG] Calculating volume for {sym}...")
+            # Find last row with valid Volume
+            # df['Volume'] might have NaNs (e.g. today's incomplete data)
+            # We want the last actual trading volume.
+            valid_vol_mask = df['Volume'].notna() & (df['Volume'] > 0)
+            if valid_vol_mask.any():
+                current_volume = df.loc[valid_vol_mask, 'Volume'].iloc[-1]
+                stock.volume = float(current_volume)
+                # print(f"[DEBUG] {sym} Volume: {stock.volume}")
+
+                # For increase %, compare with the volume BEFORE the last valid one
+                # We need the index of the last valid volume
+                last_valid_idx = df.index[valid_vol_mask][-1]
+                # Get position integer
+                pos = df.index.get_loc(last_valid_idx)
+
+                if pos > 0:
+                    # Previous volume is the one at pos-1? 
+                    # Need to check if THAT one is valid? 
+                    # Usually yes, but let's just take the row before.
+                    # If there are gaps, we might want the last valid before that.
+                    # Simplification: use shift on masked series?
+                    valid_series = df.loc[valid_vol_mask, 'Volume']
+                    if len(valid_series) >= 2:
+                        prev_volume = valid_series.iloc[-2]
+                        if prev_volume > 0:
+                            stock.volume_increase_pct = ((current_volume - prev_volume) / prev_volume) * 100.0
+                        else:
+                            stock.volume_increase_pct = 0.0
+                    else:
+                        stock.volume_increase_pct = 0.0
+                else:
+                    stock.volume_increase_pct = 0.0
+            else:
+                # No valid volume in entire history??
+                stock.volume = None
+                stock.volume_increase_pct = None
+
+        except Exception as e:
+            print(f"Volume calc failed for {sym}: {e}")
+        stages.mark("indicators")
+
+        # Metadata Backfill (Sector/Industry)
+        if not stock.sector or not stock.industry:
+            try:
+                info = stock_service.get_stock_info(stock.symbol)
+                if info:
+                    if not stock.sector: stock.sector = info.get('sector')
+                    if not stock.industry: stock.industry = info.get('industry')
+                    # Optional: Backfill company name if missing
+                    if not stock.company_name:
+                        stock.company_name = info.get('longName') or info.get('shortName')
+            except Exception as e:
+                print(f"Metadata fetch failed for {sym}: {e}")
+        stages.mark("metadata")
+
+        close = widen(df['Close'].dropna())
+        current_price = close.iloc[-1]
+
+        # --- Chart Data Population ---
+        # Extract last 40 days for mini chart
+        # Columns needed: Open, High, Low, Close, Volume
+        try:
+            if not df.empty:
+                # Calculate SMAs (SMA5..SMA200) for the whole df first
+                df = CHART_SMAS.compute(df)
+
+                chart_df = df.tail(40).copy()
+
+                chart_data = []
+                for dt, row in chart_df.iterrows():
+                    chart_data.append({
+                        "d": dt.strftime('%Y-%m-%d'),
+                        "o": bar_value(row['Open']),
+                        "h": bar_value(row['High']),
+                        "l": bar_value(row['Low']),
+                        "c": bar_value(row['Close']),
+                        "v": int(row['Volume']),
+                        "sap": [ # SMAs Array
+                            bar_value(row['SMA5']),
+                            bar_value(row['SMA20']),
+                            bar_value(row['SMA50']),
+                            bar_value(row['SMA200']),
+                            bar_value(row['SMA100'])
+                        ]
+                    })
+                import json
+                stock.daily_chart_data = json.dumps(chart_data)
+        except Exception as e:
+            print(f"Chart data error {sym}: {e}")
+        stages.mark("chart_json")
+        # -----------------------------
+
+        # Calcs
+        def calc_change(days):
+           if len(close) > days:
+               idx = -(days + 1)
+               if abs(idx) <= len(close):
+                   prev = close.iloc[idx]
+                   if prev != 0: return ((current_price - prev) / prev) * 100.0
+           return None
+
+        stock.change_percentage_1d = calc_change(1)
+        stock.change_percentage_5d = calc_change(5)
+        stock.change_percentage_20d = calc_change(20)
+        stock.change_percentage_50d = calc_change(50)
+        stock.change_percentage_200d = calc_change(200)
+
+        # Save Current Price
+        stock.current_price = float(current_price)
+
+        # Calculate RS (Stock Change - SP500 Change)
+        if stock.change_percentage_5d is not None and sp500_changes.get(5) is not None:
+            stock.rs_5d = stock.change_percentage_5d - sp500_changes[5]
+        if stock.change_percentage_20d is not None and sp500_changes.get(20) is not None:
+            stock.rs_20d = stock.change_percentage_20d - sp500_changes[20]
+        if stock.change_percentage_50d is not None and sp500_changes.get(50) is not None:
+            stock.rs_50d = stock.change_percentage_50d - sp500_changes[50]
+        if stock.change_percentage_200d is not None and sp500_changes.get(200) is not None:
+            stock.rs_200d = stock.change_percentage_200d - sp500_changes[200]
+
+        # ATR
+        try:
+           atr = ATR_14.batch(df)
+           if len(atr) > 0 and pd.notna(atr.iloc[-1]):
+               stock.atr_14 = bar_value(atr.iloc[-1])
+        except: pass
+        stages.mark("indicators")
+
+        # Signals
+        try:
+           sig_funcs = get_signal_functions()
+           for name, func in sig_funcs.items():
+               val = func(df)
+               setattr(stock, f"signal_{name}", int(val))
+        except: pass
+        stages.mark("signals")
+        # Store Deviations
+        try:
+            if 'Deviation_MA5' in df.columns and pd.notna(df['Deviation_MA5'].iloc[-1]):
+                stock.deviation_5ma_pct = bar_value(df['Deviation_MA5'].iloc[-1])
+            if 'Deviation_MA20' in df.columns and pd.notna(df['Deviation_MA20'].iloc[-1]):
+                stock.deviation_20ma_pct = bar_value(df['Deviation_MA20'].iloc[-1])
+            if 'Deviation_MA50' in df.columns and pd.notna(df['Deviation_MA50'].iloc[-1]):
+                stock.deviation_50ma_pct = bar_value(df['Deviation_MA50'].iloc[-1])
+            if 'Deviation_MA200' in df.columns and pd.notna(df['Deviation_MA200'].iloc[-1]):
+                stock.deviation_200ma_pct = bar_value(df['Deviation_MA200'].iloc[-1])
+        except Exception as e:
+            print(f"Deviation save error {sym}: {e}")
+
+        # Store Slopes & Predictions
+        try:
+            slope_5ma = None
+            slope_5ma_prev = None
+            slope_5ma_prev2 = None
+            close_minus_4 = None
+            close_minus_5 = None
+
+            # Helper to safely get value by index
+            def get_val(series, idx):
+                try:
+                    val = series.iloc[idx]
+                    if pd.notna(val): return bar_value(val)
+                except: pass
+                return None
+
+            if 'Close_MA5' in df.columns:
+                ma5 = df['Close_MA5']
+
+                if 'Slope_MA5' in df.columns:
+                    slopes = df['Slope_MA5']
+                    slope_5ma = get_val(slopes, -1) # T
+                    slope_5ma_prev = get_val(slopes, -2) # T-1
+                    slope_5ma_prev2 = get_val(slopes, -3) # T-2
+
+                close_minus_4 = get_val(df['Close'], -5) 
+                close_minus_5 = get_val(df['Close'], -6) 
+
+            if 'Slope_MA5' in df.columns and pd.notna(df['Slope_MA5'].iloc[-1]):
+                stock.slope_5ma = bar_value(df['Slope_MA5'].iloc[-1])
+            if 'Slope_MA20' in df.columns and pd.notna(df['Slope_MA20'].iloc[-1]):
+                stock.slope_20ma = bar_value(df['Slope_MA20'].iloc[-1])
+            if 'Slope_MA50' in df.columns and pd.notna(df['Slope_MA50'].iloc[-1]):
+                stock.slope_50ma = bar_value(df['Slope_MA50'].iloc[-1])
+            if 'Slope_MA200' in df.columns and pd.notna(df['Slope_MA200'].iloc[-1]):
+                stock.slope_200ma = bar_value(df['Slope_MA200'].iloc[-1])
+
+            # --- Prediction Logic ---
+            # 1. Predicted Price Next (Tomorrow, T+1)
+            if ma5 is not None and len(ma5) >= 2 and close_minus_4 is not None:
+                 ma5_t = get_val(ma5, -1)
+                 ma5_t_1 = get_val(ma5, -2)
+
+                 if ma5_t is not None and ma5_t_1 is not None and slope_5ma is not None and slope_5ma_prev is not None:
+                     if (slope_5ma * slope_5ma_prev) >= 0:
+                         delta_ma = ma5_t - ma5_t_1
+                         stock.predicted_price_next = 5 * delta_ma + close_minus_4
+                     else:
+                         stock.predicted_price_next = None 
+                 else:
+                      stock.predicted_price_next = None
+
+            # 2. Predicted Price Today (Prior Prediction, T)
+            if ma5 is not None and len(ma5) >= 3 and close_minus_5 is not None:
+                 ma5_t_1 = get_val(ma5, -2)
+                 ma5_t_2 = get_val(ma5, -3)
+
+                 if ma5_t_1 is not None and ma5_t_2 is not None and slope_5ma_prev is not None and slope_5ma_prev2 is not None:
+                     if (slope_5ma_prev * slope_5ma_prev2) >= 0:
+                          delta_ma_prev = ma5_t_1 - ma5_t_2
+                          stock.predicted_price_today = 5 * delta_ma_prev + close_minus_5
+                     else:
+                         stock.predicted_price_today = None
+                 else:
+                      stock.predicted_price_today = None
+
+        except Exception as e:
+            print(f"Prediction/Slope save error {sym}: {e}")
+        return df
+
+    def _rank_universe(self):
+        """Post-update stage: percentile RS rank across all stocks (needs every symbol's returns)."""
+        if self.is_stop_requested:
+            return
+        self.message = "Ranking relative strength..."
+        try:
+            with UPDATE_STAGE_SECONDS.time(stage="rs_rank"):
+                rs_rank_service.recompute()
+                metric_snapshots.record_ranks()
+        except Exception as e:
+            print(f"RS rank failed: {e}")
+            traceback.print_exc()
+
+    def _summarize_groups(self):
+        """Post-update stage: refresh the stored summary of every group in one batched pass."""
+        if self.is_stop_requested:
+            return
+        self.message = "Summarizing groups..."
+        try:
+            with UPDATE_STAGE_SECONDS.time(stage="group_summary"):
+                group_summaries.refresh_all()
+        except Exception as e:
+            print(f"Group summary failed: {e}")
+            traceback.print_exc()
+
     def stop(self):
         self.is_stop_requested = True
 
 update_manager = UpdateManager()
+progress_stream.register_source("update", update_manager.get_progress)
@@ -0,0 +1,126 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, select
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import (Stock, TradeHistory, StockGroup, StockGroupMember, StockAlert,
+                                  StockNews, GroupSummary, StockTombstone)
+    from backend.services import bulk_symbols
+    from backend.services.stock_service import stock_service
+    from backend.services.negative_cache import NegativeCache, UNKNOWN_SYMBOL
+    from backend.services.chart_generator import ChartGeneratorService
+    from backend.routers.stocks import bulk_delete, BulkSymbolsRequest
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import (Stock, TradeHistory, StockGroup, StockGroupMember, StockAlert,
+                                  StockNews, GroupSummary, StockTombstone)
+    from backend.services import bulk_symbols
+    from backend.services.stock_service import stock_service
+    from backend.services.negative_cache import NegativeCache, UNKNOWN_SYMBOL
+    from backend.services.chart_generator import ChartGeneratorService
+    from backend.routers.stocks import bulk_delete, BulkSymbolsRequest
+
+
+def test_bulk_hide_and_delete_are_set_based(tmp_path):
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    now = datetime(2024, 1, 2)
+    symbols = [f"S{i:04d}" for i in range(1200)]  # more than one IN (...) chunk
+
+    with Session(test_engine) as session:
+        session.add_all([Stock(symbol=s, is_hidden=(s == "S0000")) for s in symbols])
+        session.add(StockGroup(id=1, name="g"))
+        session.add(GroupSummary(group_id=1, summary_json="{}"))
+        for s in symbols[:3]:
+            session.add(TradeHistory(symbol=s, trade_type='買い', quantity=1, price=1.0, trade_date=now))
+            session.add(StockGroupMember(group_id=1, symbol=s))
+            session.add(StockAlert(symbol=s, condition_json="{}"))
+            session.add(StockNews(symbol=s, title="t", publisher="p", link=f"http://x/{s}",
+                                  provider_publish_time=now, type="STORY"))
+        session.add(TradeHistory(symbol="KEEP", trade_type='買い', quantity=1, price=1.0, trade_date=now))
+        session.commit()
+
+        result = bulk_symbols.set_hidden(session, bulk_symbols.normalize_symbols([" S0000", "S0001", "S0001", "NOPE", ""]), True)
+        session.commit()
+        assert result == {"changed": 1, "not_found": ["NOPE"]}
+
+        result = bulk_symbols.delete_symbols(session, symbols[:1100])
+        session.commit()
+        assert len(result["deleted"]) == 1100
+        assert result["rows"]["stock"] == 1100
+        assert result["rows"]["tradehistory"] == 3
+        assert result["rows"]["stockgroupmember"] == 3
+        assert result["rows"]["stockalert"] == 3
+        assert result["rows"]["stocknews"] == 3
+
+        assert session.exec(select(Stock)).all().__len__() == 100
+        assert [t.symbol for t in session.exec(select(TradeHistory)).all()] == ["KEEP"]
+        assert session.get(GroupSummary, 1) is None
+        assert len(session.exec(select(StockTombstone)).all()) == 1100
+
+    for s in ("S0000", "S0001", "S1199"):
+        for suffix in ("_1d.parquet", "_1wk.parquet", "_1d_close.parquet"):
+            (tmp_path / f"{s}{suffix}").write_bytes(b"")
+    with patch('backend.services.stock_service.DATA_DIR', new=str(tmp_path)):
+        assert stock_service.delete_cache_many(["S0000", "S0001"]) == 6
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["S1199_1d.parquet", "S1199_1d_close.parquet", "S1199_1wk.parquet"]
+
+
+def test_bulk_delete_purges_charts_indicator_state_and_negative_cache(tmp_path):
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    data_dir, chart_dir = tmp_path / "stocks", tmp_path / "charts"
+    data_dir.mkdir()
+    (chart_dir / "analyses").mkdir(parents=True)
+    for name in ("GONE_1d.parquet", "KEEP_1d.parquet"):
+        (data_dir / name).write_bytes(b"")
+    for name in ("GONE_0123456789abcdef.png", "GONE_B_0123456789abcdef.png", "KEEP_0123456789abcdef.png",
+                 "analyses/GONE_01234567.png"):
+        (chart_dir / name).write_bytes(b"png")
+
+    charts = ChartGeneratorService(chart_dir=str(chart_dir))
+    failed = NegativeCache()
+    block = np.zeros((10, 2))
+    index = np.arange(10, dtype=np.int64)
+    with Session(test_engine) as session, \
+         patch('backend.services.stock_service.DATA_DIR', new=str(data_dir)), \
+         patch('backend.services.negative_cache.engine', new=test_engine), \
+         patch('backend.routers.stocks.negative_cache', new=failed), \
+         patch('backend.routers.stocks.chart_generator', new=charts), \
+         patch.dict(stock_service._enriched, clear=True):
+        session.add_all([Stock(symbol="GONE"), Stock(symbol="KEEP")])
+        session.commit()
+        failed.record("GONE", UNKNOWN_SYMBOL)
+        failed.record("KEEP", UNKNOWN_SYMBOL)
+        for sym in ("GONE", "KEEP"):
+            stock_service._enriched[(sym, "1y", "1d")] = (index, block, [])
+        enriched_bytes = stock_service._enriched_bytes
+        stock_service._enriched_bytes += 2 * (index.nbytes + block.nbytes)
+
+        result = bulk_delete(BulkSymbolsRequest(symbols=["GONE"]), session=session)
+        # Parquet + cached chart + the analysis copy; GONE_B is another symbol
+        assert result["deleted"] == ["GONE"] and result["cache_files"] == 3
+        assert list(stock_service._enriched) == [("KEEP", "1y", "1d")]
+        assert stock_service._enriched_bytes == enriched_bytes + index.nbytes + block.nbytes
+        stock_service._enriched_bytes = enriched_bytes
+        assert failed.check("GONE") is None and failed.check("KEEP") is not None
+        assert NegativeCache().check("GONE") is None  # reloaded from the DB
+
+    assert sorted(p.name for p in data_dir.iterdir()) == ["KEEP_1d.parquet"]
+    assert sorted(p.name for p in chart_dir.glob("*.png")) == ["GONE_B_0123456789abcdef.png", "KEEP_0123456789abcdef.png"]
+    assert list((chart_dir / "analyses").iterdir()) == []
@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.chart_generator import ChartGeneratorService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.chart_generator import ChartGeneratorService
+
+
+def _bars(n=200, end="2024-06-28", last_close=None):
+    close = 100 + np.arange(n) * 0.5
+    if last_close is not None:
+        close[-1] = last_close
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000},
+                        index=pd.bdate_range(end=end, periods=n))
+
+
+def _fake_plot(df, savefig, **kwargs):
+    with open(savefig["fname"], "wb") as f:
+        f.write(b"\0" * 1000)
+
+
+def test_chart_key_reused_for_the_same_bar_and_changed_by_a_new_one(tmp_path):
+    service = ChartGeneratorService(chart_dir=str(tmp_path))
+    with patch('backend.services.chart_generator.mpf.plot', side_effect=_fake_plot) as plot:
+        first = service.generate_chart_image("AAA", _bars())
+        assert service.generate_chart_image("AAA", _bars()) == first
+        assert plot.call_count == 1
+
+        # New bar, intraday close change, other period label or symbol: new image
+        others = {
+            service.generate_chart_image("AAA", _bars(end="2024-07-01")),
+            service.generate_chart_image("AAA", _bars(last_close=250.0)),
+            service.generate_chart_image("AAA", _bars(), period_label="Weekly"),
+            service.generate_chart_image("BBB", _bars()),
+        }
+        assert first not in others and len(others) == 4
+        assert plot.call_count == 5
+
+    stats = service.get_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 5 and stats["files"] == 5
+
+    # The key covers the style: a rendering change does not reuse old images
+    key = service.chart_cache_key("AAA", _bars().tail(150), "Daily")
+    assert first.endswith(f"AAA_{key}.png")
+    with patch('backend.services.chart_generator.CHART_STYLE', "charles-v2"):
+        assert service.chart_cache_key("AAA", _bars().tail(150), "Daily") != key
+
+
+def test_cleanup_evicts_least_recently_used_over_the_size_bound(tmp_path):
+    service = ChartGeneratorService(chart_dir=str(tmp_path), max_files=100, max_bytes=2500)
+    with patch('backend.services.chart_generator.mpf.plot', side_effect=_fake_plot):
+        a = service.generate_chart_image("AAA", _bars())
+        b = service.generate_chart_image("BBB", _bars())
+        assert service.generate_chart_image("AAA", _bars()) == a  # AAA is now the most recent
+        c = service.generate_chart_image("CCC", _bars())
+
+    # 3 x 1000 bytes > 2500: BBB (least recently used) goes
+    assert os.path.exists(a) and os.path.exists(c) and not os.path.exists(b)
+    assert service.get_cache_stats()["bytes"] == 2000
+
+    # A restarted service rebuilds the LRU order from file mtimes
+    os.utime(c, (time.time() - 60, time.time() - 60))
+    restarted = ChartGeneratorService(chart_dir=str(tmp_path), max_files=1, max_bytes=10_000)
+    restarted.cleanup_old_charts()
+    assert os.path.exists(a) and not os.path.exists(c)
+
+
+def test_renders_are_moved_into_place_and_analyses_keep_their_own_copy(tmp_path):
+    service = ChartGeneratorService(chart_dir=str(tmp_path), max_files=1)
+    targets = []
+    def plot(df, savefig, **kwargs):
+        targets.append(savefig["fname"])
+        _fake_plot(df, savefig)
+
+    with patch('backend.services.chart_generator.mpf.plot', side_effect=plot):
+        first = service.generate_chart_image("AAA", _bars())
+        # Rendered into a private temp file, then os.replace'd to the content key
+        assert targets[0] != first and not targets[0].endswith(".png")
+        saved = service.keep_for_analysis("AAA", first)
+        also_saved = service.keep_for_analysis("AAA", first)
+        service.generate_chart_image("BBB", _bars())
+
+    # The cached chart was evicted; the analyses' copies were not
+    assert not os.path.exists(first)
+    assert os.path.exists(saved) and os.path.exists(also_saved) and saved != also_saved
+    assert os.path.dirname(saved) == str(tmp_path / "analyses")
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
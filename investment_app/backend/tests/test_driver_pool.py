@@ -0,0 +1,159 @@
+import sys
+import os
+import threading
+import time
+import pytest
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.driver_pool import DriverPool, PooledDriver, DriverUnavailable
+    from backend.services.gemini_service import GeminiService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.driver_pool import DriverPool, PooledDriver, DriverUnavailable
+    from backend.services.gemini_service import GeminiService
+
+
+class FakeDriver:
+    """Stands in for a Selenium WebDriver attached to one tab."""
+    def __init__(self, idx):
+        self.idx = idx
+        self.alive = True
+        self.closed = False
+
+
+def _make_pool(**kwargs):
+    created = []
+    closed = []
+
+    def factory():
+        d = FakeDriver(len(created))
+        created.append(d)
+        return PooledDriver(d, handle=f"tab-{d.idx}")
+
+    def closer(pd):
+        pd.driver.closed = True
+        closed.append(pd.driver)
+
+    pool = DriverPool(factory=factory, closer=closer,
+                      health_check=lambda pd: pd.driver.alive, **kwargs)
+    return pool, created, closed
+
+
+def test_sessions_are_reused():
+    pool, created, _ = _make_pool(size=2)
+    for _ in range(5):
+        with pool.borrow() as driver:
+            assert driver is created[0]
+    assert len(created) == 1
+    stats = pool.get_stats()
+    assert stats["latency"]["count"] == 5
+    assert stats["wait"]["count"] == 5
+
+
+def test_unhealthy_and_expired_sessions_are_recycled():
+    pool, created, closed = _make_pool(size=1, max_uses=3)
+    with pool.borrow() as driver:
+        driver.alive = False
+    with pool.borrow() as driver:
+        assert driver is created[1]
+    assert closed == [created[0]]
+
+    # Two more uses reach max_uses=3 and the session is recycled on return
+    with pool.borrow():
+        pass
+    with pool.borrow():
+        pass
+    assert created[1].closed
+    with pool.borrow() as driver:
+        assert driver is created[2]
+
+
+def test_borrower_exception_discards_session():
+    pool, created, closed = _make_pool(size=1)
+    with pytest.raises(RuntimeError):
+        with pool.borrow():
+            raise RuntimeError("tab crashed")
+    assert closed == [created[0]]
+    with pool.borrow() as driver:
+        assert driver is created[1]
+
+
+def test_pool_bounds_concurrency_and_times_out():
+    pool, created, _ = _make_pool(size=2)
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def work():
+        with pool.borrow():
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.05)
+            with lock:
+                state["running"] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(created) == 2
+    assert state["peak"] == 2
+    assert pool.get_stats()["wait"]["max_seconds"] > 0
+
+    with pool.borrow():
+        with pool.borrow():
+            with pytest.raises(DriverUnavailable):
+                with pool.borrow(timeout=0.05):
+                    pass
+
+
+def test_factory_failure_raises_driver_unavailable():
+    pool = DriverPool(factory=lambda: None, size=1)
+    with pytest.raises(DriverUnavailable):
+        with pool.borrow():
+            pass
+    assert pool.get_stats()["open"] == 0
+
+
+def test_gemini_error_results_recycle_the_tab():
+    service = GeminiService()
+    service.pool, created, closed = _make_pool(size=1)
+    results = iter(["summary", "Error: Generation timed out (>300s).", "Scraping error: stale element", "again"])
+    service._generate_content = lambda driver, prompt: next(results)
+
+    assert service.generate_content("p") == "summary"
+    # Internals return error strings instead of raising: the caller still gets the
+    # string, but the tab is discarded instead of going back to the pool
+    assert service.generate_content("p") == "Error: Generation timed out (>300s)."
+    assert service.generate_content("p").startswith("Scraping error")
+    assert service.generate_content("p") == "again"
+    assert closed == created[:2] and len(created) == 3
+    assert service.pool.get_stats()["recycled"] == 2
+
+
+def test_closing_a_session_stops_its_chromedriver():
+    class Service:
+        stopped = False
+        def stop(self):
+            self.stopped = True
+    class Switch:
+        def window(self, handle):
+            pass
+    class Driver:
+        window_handles = ["main", "tab-1"]
+        switch_to = Switch()
+        service = Service()
+        tab_closed = False
+        quit_called = False
+        def close(self):
+            self.tab_closed = True
+        def quit(self):
+            self.quit_called = True
+
+    driver = Driver()
+    GeminiService()._close_session(PooledDriver(driver, handle="tab-1"))
+    assert driver.tab_closed and driver.service.stopped and not driver.quit_called
@@ -0,0 +1,79 @@
+import sys
+import os
+import threading
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlmodel import SQLModel, Session, select
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, StockTombstone, TradeHistory
+    from backend.services.enrichment import EnrichmentQueue
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, StockTombstone, TradeHistory
+    from backend.services.enrichment import EnrichmentQueue
+
+
+def test_enrichment_dedups_and_resolves_pending_rows(tmp_path):
+    # File DB: the worker pool uses its own connections
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(test_engine)
+    with Session(test_engine) as session:
+        for sym in ("GOOD", "BADBARS", "TYPO", "DELISTED", "OLDCO"):
+            session.add(Stock(symbol=sym, company_name=sym, enrichment_status="pending"))
+        # Traded before (trade import writes no Stock row), opened from the detail view
+        session.add(TradeHistory(symbol="OLDCO", trade_type="買い", quantity=5, price=10.0, trade_date=datetime(2020, 1, 6)))
+        session.commit()
+
+    release = threading.Event()
+    def fake_info(symbol):
+        release.wait(5)
+        if symbol == "OLDCO":
+            return None  # provider error or delisted
+        return {} if symbol in ("TYPO", "DELISTED") else {"symbol": symbol, "shortName": f"{symbol} Inc", "sector": "Tech"}
+    def fake_refresh(symbol):
+        if symbol == "BADBARS":
+            raise Exception("Empty data")
+
+    def fake_check(symbol):
+        # get_stock_info records a provider-confirmed unknown ticker
+        return {"reason": "unknown_symbol"} if symbol == "DELISTED" else None
+
+    queue = EnrichmentQueue(max_workers=1)
+    with patch('backend.services.enrichment.engine', new=test_engine), \
+         patch('backend.services.enrichment.stock_service.get_stock_info', side_effect=fake_info), \
+         patch('backend.services.enrichment.update_manager.refresh_symbol', side_effect=fake_refresh), \
+         patch('backend.services.enrichment.negative_cache.check', side_effect=fake_check), \
+         patch('backend.services.enrichment.progress_stream.emit') as emit:
+        assert queue.submit("GOOD")
+        assert not queue.submit("GOOD")  # already queued
+        assert queue.submit("BADBARS")
+        assert queue.submit("TYPO", source="detail")
+        assert queue.submit("DELISTED", source="create")
+        assert queue.submit("OLDCO", source="detail")
+        assert queue.get_stats()["pending"] == ["BADBARS", "DELISTED", "GOOD", "OLDCO", "TYPO"]
+        release.set()
+        queue._executor.shutdown(wait=True)
+
+    stats = queue.get_stats()
+    assert stats["pending"] == [] and stats["coalesced"] == 1
+    assert stats["completed"] == 1 and stats["failed"] == 4
+    events = [(c.args[1], c.args[2]["symbol"]) for c in emit.call_args_list]
+    assert ("ready", "GOOD") in events and ("failed", "BADBARS") in events and ("failed", "TYPO") in events
+
+    with Session(test_engine) as session:
+        good = session.get(Stock, "GOOD")
+        assert good.enrichment_status is None and good.company_name == "GOOD Inc" and good.sector == "Tech"
+        assert session.get(Stock, "BADBARS").enrichment_status == "failed"
+        # Unknown ticker auto-registered from the detail view is removed again
+        assert session.get(Stock, "TYPO") is None
+        # It was never listed, so clients need no tombstone
+        assert session.get(StockTombstone, "TYPO") is None
+        # A hand-added symbol the provider reports as unknown does not stay 'failed' forever
+        assert session.get(Stock, "DELISTED") is None
+        # A failed lookup never takes the user's trades with it
+        assert session.get(Stock, "OLDCO").enrichment_status == "failed"
+        assert len(session.exec(select(TradeHistory).where(TradeHistory.symbol == "OLDCO")).all()) == 1
@@ -0,0 +1,89 @@
+import sys
+import os
+from datetime import datetime
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.equity_curve import EquityCurveEngine
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.equity_curve import EquityCurveEngine
+
+
+def _trade(id, symbol, trade_type, quantity, price, day):
+    return SimpleNamespace(id=id, symbol=symbol, trade_type=trade_type, quantity=quantity,
+                           price=price, trade_date=datetime.fromisoformat(day))
+
+def _closes(days):
+    index = pd.bdate_range("2024-01-01", periods=days)
+    rng = np.random.default_rng(7)
+    return {
+        "AAA": pd.Series(100 + rng.normal(0, 1, days).cumsum(), index=index),
+        "BBB": pd.Series(50 + rng.normal(0, 1, days).cumsum(), index=index),
+    }
+
+def _naive_equity(trades, closes, dates):
+    """Day-by-day reference: apply each day's trades, then mark to the close."""
+    qty, cost, realized = {}, {}, 0.0
+    equity = []
+    pending = sorted(trades, key=lambda t: (t.trade_date, t.id))
+    for d in dates:
+        while pending and pd.Timestamp(pending[0].trade_date).normalize() <= d:
+            t = pending.pop(0)
+            q, c = qty.get(t.symbol, 0.0), cost.get(t.symbol, 0.0)
+            if t.trade_type == '買い':
+                q, c = q + t.quantity, c + t.price * t.quantity
+            else:
+                basis = (c / q if q > 0 else 0.0) * t.quantity
+                realized += t.price * t.quantity - basis
+                q = max(0.0, q - t.quantity)
+                c = 0.0 if q == 0 else c - basis
+            qty[t.symbol], cost[t.symbol] = q, c
+        unrealized = sum(qty[s] * closes[s].asof(d) - cost[s] for s in qty if qty[s] > 0)
+        equity.append(realized + unrealized)
+    return np.array(equity)
+
+def test_equity_curve_matches_daily_replay_and_extends_incrementally():
+    closes = _closes(60)
+    trades = [
+        _trade(1, "AAA", '買い', 10, 100.0, "2024-01-03"),
+        _trade(2, "BBB", '買い', 20, 50.0, "2024-01-06"),  # Saturday -> next bar
+        _trade(3, "AAA", '売り', 4, 103.0, "2024-01-15"),
+        _trade(4, "AAA", '買い', 5, 98.0, "2024-02-01"),
+        _trade(5, "BBB", '売り', 20, 52.0, "2024-03-05"),
+    ]
+    sectors = {"AAA": "Tech", "BBB": "Energy"}
+
+    engine = EquityCurveEngine()
+    short = {s: c.iloc[:40] for s, c in closes.items()}
+    first = engine.get(trades[:4], short, sectors)
+    assert engine.last_build["mode"] == "full"
+    assert engine.get(trades[:4], short, sectors) is first
+    assert engine.last_build["mode"] == "cached"
+
+    # New bars and a new trade after the last curve day: only the tail is recomputed
+    extended = engine.get(trades, closes, sectors)
+    assert engine.last_build["mode"] == "incremental"
+    assert engine.last_build["days_computed"] < len(extended["dates"])
+
+    full = EquityCurveEngine().get(trades, closes, sectors)
+    assert extended["dates"] == full["dates"]
+    for name in ("equity", "market_value", "realized_pl", "unrealized_pl"):
+        assert np.allclose(extended[name], full[name])
+    assert extended["exposure"] == full["exposure"]
+
+    dates = pd.DatetimeIndex(full["dates"])
+    assert np.allclose(full["equity"], _naive_equity(trades, closes, dates), atol=0.01)
+    assert np.isclose(full["realized_pl"][-1], 4 * 103.0 - 400.0 + 20 * 2.0)
+    assert full["summary"]["max_drawdown"] <= 0
+    assert set(full["exposure"]["sectors"]) == {"Tech", "Energy"}
+
+    # Editing an old trade forces a full replay
+    edited = list(trades)
+    edited[0] = _trade(1, "AAA", '買い', 10, 99.0, "2024-01-03")
+    engine.get(edited, closes, sectors)
+    assert engine.last_build["mode"] == "full"
@@ -0,0 +1,53 @@
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.frame_dtypes import compact_bars, bar_value, widen, to_panel
+    from backend.services.stock_service import StockService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.frame_dtypes import compact_bars, bar_value, widen, to_panel
+    from backend.services.stock_service import StockService
+
+
+def _bars(n=60):
+    close = 100 + np.arange(n) * 0.25
+    df = pd.DataFrame({
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+        "Volume": np.full(n, 1_500_000.0),
+    }, index=pd.bdate_range("2024-01-01", periods=n))
+    df.iloc[-1, df.columns.get_loc("Volume")] = np.nan  # today's bar before the close
+    return df
+
+
+def test_enriched_frames_are_compact_and_keep_nan():
+    df = StockService()._add_technical_indicators(_bars())
+
+    assert df["Close"].dtype == np.float32 and df["Close_MA200"].dtype == np.float32
+    assert df["Volume"].dtype == np.int32
+    assert df["Volume"].iloc[-1] == 0
+    # 60 bars: the 200-day MA has no value yet (previously zero-filled)
+    assert df["Close_MA200"].isna().all() and df["Close_MA50"].notna().iloc[-1]
+
+    # Leaving the frame: plain floats, exact quotes, None instead of NaN
+    assert bar_value(df["Close"].iloc[1]) == 100.25 and type(bar_value(df["Close"].iloc[1])) is float
+    assert bar_value(df["Close_MA200"].iloc[-1]) is None
+    assert widen(df["Close"]).iloc[1] == 100.25
+    json.dumps([bar_value(v) for v in df["Close_MA200"]], allow_nan=False)
+
+    # Volumes above int32 use int64
+    big = compact_bars(pd.DataFrame({"Volume": [3e9, np.nan]}))
+    assert big["Volume"].dtype == np.int64 and big["Volume"].tolist() == [3_000_000_000, 0]
+
+
+def test_panel_ticker_is_categorical():
+    frames = {"AAA": compact_bars(_bars(10)), "BBB": compact_bars(_bars(5)), "EMPTY": pd.DataFrame()}
+    panel = to_panel(frames)
+    assert isinstance(panel["ticker"].dtype, pd.CategoricalDtype)
+    assert list(panel["ticker"].cat.categories) == ["AAA", "BBB"]
+    assert len(panel) == 15 and panel["Close"].dtype == np.float32
@@ -0,0 +1,82 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, StockGroup, StockGroupMember, TradeHistory, GroupSummary
+    from backend.services.group_summaries import GroupSummaryService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, StockGroup, StockGroupMember, TradeHistory, GroupSummary
+    from backend.services.group_summaries import GroupSummaryService
+
+
+def test_group_summaries_refresh_and_on_demand():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    service = GroupSummaryService()
+
+    with Session(test_engine) as session:
+        session.add_all([
+            Stock(symbol="AAA", company_name="A", current_price=10.0, change_percentage_1d=2.0, rs_20d=5.0, signal_newhigh=1),
+            Stock(symbol="BBB", company_name="B", current_price=30.0, change_percentage_1d=-1.0, rs_20d=-3.0),
+            Stock(symbol="CCC", company_name="C", current_price=5.0, change_percentage_1d=4.0, signal_newhigh=1),
+            StockGroup(id=1, name="Portfolio", group_type="portfolio"),
+            StockGroup(id=2, name="Empty"),
+        ])
+        session.add_all([StockGroupMember(group_id=1, symbol=s) for s in ("AAA", "BBB", "CCC", "ZZZ")])
+        day = datetime(2024, 1, 2)
+        session.add_all([
+            TradeHistory(symbol="AAA", trade_type='買い', quantity=30, price=9.0, trade_date=day),
+            TradeHistory(symbol="BBB", trade_type='買い', quantity=20, price=25.0, trade_date=day),
+            TradeHistory(symbol="BBB", trade_type='売り', quantity=10, price=28.0, trade_date=day),
+            TradeHistory(symbol="CCC", trade_type='買い', quantity=5, price=5.0, trade_date=day),
+            TradeHistory(symbol="CCC", trade_type='売り', quantity=5, price=6.0, trade_date=day),
+        ])
+        session.commit()
+
+    with patch('backend.services.group_summaries.engine', new=test_engine):
+        assert service.refresh_all()["groups"] == 2
+
+    with Session(test_engine) as session:
+        summary = service.get(session, 1)
+        # AAA 30 x 10 = 300, BBB 10 x 30 = 300, CCC sold out, ZZZ not registered
+        assert summary["member_count"] == 4
+        assert summary["held_count"] == 2
+        assert summary["total_value"] == 600.0
+        assert [m["weight"] for m in summary["members"][:2]] == [50.0, 50.0]
+        assert summary["changes"]["1d"] == {"average": 1.67, "weighted": 0.5}
+        assert summary["relative_strength"]["20d"] == {"average": 1.0, "weighted": 1.0}
+        assert summary["signals"] == {"newhigh": 2}
+        assert service.get(session, 2)["member_count"] == 0
+        assert service.get(session, 99) is None
+
+        # Membership change drops the stored row; the next read recomputes that group
+        session.add(StockGroupMember(group_id=2, symbol="AAA"))
+        service.invalidate(session, 2)
+        session.commit()
+        assert session.get(GroupSummary, 2) is None
+        assert service.get(session, 2)["total_value"] == 300.0
+        assert session.get(GroupSummary, 2) is not None
+
+        # Trades written for a symbol drop the summaries of the groups holding it
+        session.add(StockGroup(id=3, name="Other"))
+        session.add(StockGroupMember(group_id=3, symbol="CCC"))
+        session.add(GroupSummary(group_id=3, member_count=1, summary_json="{}"))
+        session.add(TradeHistory(symbol="AAA", trade_type='買い', quantity=10, price=10.0, trade_date=day))
+        service.invalidate_symbols(session, ["AAA"])
+        session.commit()
+        assert session.get(GroupSummary, 1) is None and session.get(GroupSummary, 2) is None
+        assert session.get(GroupSummary, 3) is not None
+        assert service.get(session, 1)["total_value"] == 700.0
+        assert service.get(session, 2)["total_value"] == 400.0
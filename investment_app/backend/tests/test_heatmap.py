@@ -0,0 +1,63 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine, update
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, TradeHistory
+    from backend.services.heatmap import HeatmapCache
+    from backend.routers.stocks import update_stock, StockUpdateRequest
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, TradeHistory
+    from backend.services.heatmap import HeatmapCache
+    from backend.routers.stocks import update_stock, StockUpdateRequest
+
+
+def _leaves(result):
+    return {leaf[0]: leaf[6] for s in result["sectors"] for i in s["industries"] for leaf in i["leaves"]}
+
+
+def test_heatmap_cache_follows_stock_and_trade_writes():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    with Session(test_engine) as session:
+        for sym, cap in (("AAA", 300.0), ("BBB", 200.0)):
+            session.add(Stock(symbol=sym, sector="Tech", industry="Software", market_cap=cap, change_percentage_1d=1.0))
+        session.commit()
+
+    cache = HeatmapCache()
+    with patch('backend.services.heatmap.engine', new=test_engine):
+        assert _leaves(cache.get()) == {"AAA": False, "BBB": False}
+        cache.get()
+        assert cache.get_stats()["hits"] == 1
+
+        with Session(test_engine) as session:
+            # Trade import: held flag
+            session.add(TradeHistory(symbol="AAA", trade_type="買い", quantity=10, price=1.0, trade_date=datetime(2024, 1, 2)))
+            session.commit()
+            assert _leaves(cache.get()) == {"AAA": True, "BBB": False}
+
+            # Single-symbol hide via PUT
+            update_stock("BBB", StockUpdateRequest(is_hidden=True), session=session)
+            assert _leaves(cache.get()) == {"AAA": True}
+
+            # New symbol, listed once its enrichment completes
+            session.add(Stock(symbol="CCC", company_name="CCC", enrichment_status="pending"))
+            session.commit()
+            assert _leaves(cache.get()) == {"AAA": True}
+            session.execute(update(Stock).where(Stock.symbol == "CCC").values(
+                sector="Tech", industry="Software", market_cap=100.0, enrichment_status=None, updated_at=datetime.utcnow()))
+            session.commit()
+            assert _leaves(cache.get()) == {"AAA": True, "CCC": False}
+
+    assert cache.get_stats()["misses"] == 5
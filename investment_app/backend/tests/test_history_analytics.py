@@ -0,0 +1,104 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import TradeHistory
+    from backend.routers import history
+    from backend.routers.history import forward_returns, calculate_analytics, FORWARD_RETURN_DAYS
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import TradeHistory
+    from backend.routers import history
+    from backend.routers.history import forward_returns, calculate_analytics, FORWARD_RETURN_DAYS
+
+
+def _loop_forward_return(df, trade_date, price, days):
+    """The per-trade lookup calculate_analytics used before forward_returns."""
+    t_date = pd.Timestamp(trade_date).normalize()
+    if not (t_date >= df.index[0] and t_date <= df.index[-1]):
+        return None
+    idx = df.index.get_loc(t_date) if t_date in df.index else df.index.searchsorted(t_date)
+    target_idx = int(idx) + days
+    if target_idx < len(df) and price > 0:
+        return (df['Close'].iloc[target_idx] - price) / price * 100.0
+    return None
+
+
+def _closes(n=80):
+    index = pd.bdate_range("2024-01-01", periods=n)
+    return pd.Series(100 + np.sin(np.arange(n)) * 5 + np.arange(n) * 0.3, index=index)
+
+
+def test_forward_returns_match_the_per_trade_loop():
+    closes = _closes()
+    trades = [
+        (datetime(2024, 1, 2, 10, 30), 101.0),  # intraday timestamp on a trading day
+        (datetime(2024, 1, 6), 99.0),           # Saturday: next bar
+        (datetime(2024, 2, 15), 0.0),           # zero price
+        (datetime(2024, 3, 1), 110.0),          # 50-day horizon past the last bar
+        (datetime(2024, 4, 30), 120.0),         # after the last bar
+        (datetime(2023, 12, 29), 95.0),         # before the first bar
+        (closes.index[-1].to_pydatetime(), 125.0),  # on the last bar: no future close
+    ]
+    dates = pd.to_datetime([d for d, _ in trades]).normalize().values
+    prices = np.array([p for _, p in trades], dtype=float)
+    result = forward_returns(closes, dates, prices)
+
+    df = closes.to_frame("Close")
+    for j, (trade_date, price) in enumerate(trades):
+        for days in FORWARD_RETURN_DAYS:
+            expected = _loop_forward_return(df, trade_date, price, days)
+            value = result[days][j]
+            if expected is None:
+                assert np.isnan(value), (trade_date, days)
+            else:
+                assert value == expected, (trade_date, days)
+    # The cases above reach every branch
+    assert not np.isnan(result[50][0]) and np.isnan(result[50][3]) and not np.isnan(result[20][3])
+
+
+def test_analytics_cache_hits_and_returns_copies():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    trades = [
+        TradeHistory(id=1, symbol="AAA", trade_type="買い", quantity=10, price=100.0, trade_date=datetime(2024, 1, 2)),
+        TradeHistory(id=2, symbol="AAA", trade_type="売り", quantity=10, price=110.0, trade_date=datetime(2024, 2, 1)),
+    ]
+    closes = _closes()
+    market_data = {"AAA": closes}
+
+    history._analytics_cache.clear()
+    stats = history.analytics_cache_stats
+    with patch('backend.routers.history.engine', new=test_engine), \
+         patch('backend.routers.history._load_market_data', side_effect=lambda symbols: dict(market_data)):
+        hits, misses = stats["hits"], stats["misses"]
+        first = calculate_analytics(trades)
+        assert (stats["hits"], stats["misses"]) == (hits, misses + 1)
+        assert first["stats"]["total_pl"] == 100.0
+
+        # Caller mutates its response; the next caller is unaffected
+        first["history"][0]["realized_pl"] = -1.0
+        first["stats"]["monthly"].clear()
+        second = calculate_analytics(list(reversed(trades)))
+        assert (stats["hits"], stats["misses"]) == (hits + 1, misses + 1)
+        assert second["history"][0]["realized_pl"] == 100.0
+        assert second["stats"]["monthly"] == {"2024-02": 100.0}
+        assert second is not first
+
+        # A new bar is a different key
+        market_data["AAA"] = _closes(81)
+        calculate_analytics(trades)
+        assert stats["misses"] == misses + 2
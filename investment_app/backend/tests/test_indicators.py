@@ -0,0 +1,116 @@
+import sys
+import os
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.indicators import IndicatorRegistry, PRICE_INDICATORS, RollingMax, ATR_14, chart_smas
+    from backend.services.stock_service import StockService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.indicators import IndicatorRegistry, PRICE_INDICATORS, RollingMax, ATR_14, chart_smas
+    from backend.services.stock_service import StockService
+
+
+def _bars(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    df = pd.DataFrame({
+        "Open": close + rng.normal(0, 0.5, n),
+        "High": close + rng.random(n),
+        "Low": close - rng.random(n),
+        "Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, n),
+    }, index=pd.bdate_range("2022-01-03", periods=n))
+    # Gaps as yfinance returns them for halted days / missing volume
+    df.iloc[120, df.columns.get_loc("Close")] = np.nan
+    df.iloc[310, df.columns.get_loc("High")] = np.nan
+    df = df.astype({"Volume": float})
+    df.iloc[400, df.columns.get_loc("Volume")] = np.nan
+    return df
+
+
+def _legacy(df):
+    """The hand-written pandas code the registry replaced."""
+    data = df.copy()
+    for w in (5, 20, 50, 200):
+        data[f'Close_MA{w}'] = data['Close'].rolling(window=w).mean()
+    for w in (5, 20, 50, 200):
+        data[f'Deviation_MA{w}'] = ((data['Close'] - data[f'Close_MA{w}']) / data[f'Close_MA{w}']) * 100
+    for w in (5, 20, 50, 200):
+        data[f'Slope_MA{w}'] = ((data[f'Close_MA{w}'] - data[f'Close_MA{w}'].shift(1)) / data['Close']) * 10000
+    data['Volume_MA50'] = data['Volume'].rolling(window=50).mean()
+    data['Volume_MA200'] = data['Volume'].rolling(window=200).mean()
+    for w in (5, 20, 50, 100, 200):
+        data[f'SMA{w}'] = data['Close'].rolling(window=w).mean()
+    prev_close = data['Close'].shift(1)
+    tr = pd.concat([data['High'] - data['Low'], (data['High'] - prev_close).abs(), (data['Low'] - prev_close).abs()], axis=1).max(axis=1)
+    data['ATR14'] = tr.rolling(window=14).mean()
+    data['Close_Max50'] = data['Close'].rolling(window=50).max()
+    return data
+
+
+def test_incremental_updates_match_pandas():
+    df = _bars()
+    legacy = _legacy(df)
+    registry = IndicatorRegistry(PRICE_INDICATORS.indicators + chart_smas("1d").indicators
+                                 + [ATR_14, RollingMax("Close_Max50", "Close", 50)])
+    batch = registry.compute(df.copy())
+    pd.testing.assert_frame_equal(batch, legacy[batch.columns])
+
+    # Seed from the first `start` bars, then append the rest one bar at a time
+    for start in (0, 1, 150, 202, 450, 599):
+        extended = registry.extend(batch, df, start)
+        assert list(extended.columns) == list(batch.columns)
+        np.testing.assert_allclose(extended[registry.names()].to_numpy(), batch[registry.names()].to_numpy(),
+                                   rtol=1e-9, atol=1e-9)
+
+    # Window moved by one bar: rebased rows of the old frame match a fresh pass
+    moved = registry.compute(df.iloc[1:].copy())
+    rebased = registry.rebase(registry.block(registry.compute(df.iloc[:-1].copy()))[1:])
+    np.testing.assert_allclose(rebased, registry.block(moved)[:-1], rtol=1e-9, atol=1e-9)
+
+    state = registry.seed(batch.iloc[:-1])
+    last = state.append(df.iloc[-1].to_dict())
+    for name, value in last.items():
+        np.testing.assert_allclose(value, batch[name].iloc[-1], rtol=1e-9, atol=1e-9)
+
+
+def test_refetch_only_computes_changed_bars():
+    df = _bars()
+    service = StockService()
+    key = ("TEST", "2y", "1d")
+    service._add_technical_indicators(df.iloc[:-1].copy(), key=key)
+
+    # Next fetch: the last bar was revised (intraday) and a new one appended
+    revised = df.copy()
+    revised.iloc[-2, revised.columns.get_loc("Close")] += 1.0
+    with patch.object(PRICE_INDICATORS, "extend", wraps=PRICE_INDICATORS.extend) as extend:
+        incremental = service._add_technical_indicators(revised.copy(), key=key)
+    assert extend.call_args.args[2] == len(df) - 2
+
+    full = service._add_technical_indicators(revised.copy())
+    assert list(incremental.columns) == list(full.columns)
+    np.testing.assert_allclose(incremental.to_numpy(), full.to_numpy(), atol=0.011)
+
+
+def test_refetch_with_moved_window_start_is_incremental():
+    # A fixed-period refetch ('2y') drops the oldest bar and appends a new one
+    df = _bars()
+    service = StockService()
+    key = ("TEST", "2y", "1d")
+    service._add_technical_indicators(df.iloc[:-1].copy(), key=key)
+
+    moved = df.iloc[1:]
+    with patch.object(PRICE_INDICATORS, "extend", wraps=PRICE_INDICATORS.extend) as extend:
+        incremental = service._add_technical_indicators(moved.copy(), key=key)
+    assert extend.call_args.args[2] == len(moved) - 1
+
+    # Same as computing the moved window from scratch, warm-up NaNs included
+    full = service._add_technical_indicators(moved.copy())
+    assert list(incremental.columns) == list(full.columns)
+    np.testing.assert_allclose(incremental.to_numpy(dtype=float), full.to_numpy(dtype=float), rtol=1e-6, equal_nan=True)
+    assert incremental["Close_MA200"].iloc[:199].isna().all()
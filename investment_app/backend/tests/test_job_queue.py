@@ -0,0 +1,117 @@
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, select
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.job_queue import JobQueue
+    from backend.database import NightlyJob
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.job_queue import JobQueue
+    from backend.database import NightlyJob
+
+
+def _make_engine():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    return test_engine
+
+
+def test_enqueue_is_idempotent_and_priority_ordered():
+    test_engine = _make_engine()
+    queue = JobQueue()
+    queue.register("news_summary", lambda s: None)
+    queue.register("financials", lambda s: None)
+
+    with patch('backend.services.job_queue.engine', new=test_engine):
+        assert queue.enqueue("news_summary", ["AAPL", "MSFT"], priority=20) == 2
+        assert queue.enqueue("news_summary", ["AAPL"], priority=20) == 0
+        queue.enqueue("financials", ["NVDA"], priority=10)
+
+        first = queue.dequeue()
+        assert first.job_type == "financials"
+        assert first.symbol == "NVDA"
+        assert first.attempts == 1
+
+
+def test_failed_job_backs_off_then_fails_permanently():
+    test_engine = _make_engine()
+    queue = JobQueue(backoff_base_seconds=60)
+
+    def broken(symbol):
+        raise Exception("provider down")
+
+    queue.register("financials", broken)
+
+    with patch('backend.services.job_queue.engine', new=test_engine):
+        queue.enqueue("financials", ["AAPL"], max_attempts=2)
+
+        job = queue.dequeue()
+        queue.run_job(job)
+        with Session(test_engine) as session:
+            row = session.exec(select(NightlyJob)).one()
+            assert row.status == "pending"
+            assert row.next_run_at > datetime.utcnow() + timedelta(seconds=50)
+            assert row.last_error == "provider down"
+
+        # Not runnable until backoff expires
+        assert queue.dequeue() is None
+
+        with Session(test_engine) as session:
+            row = session.exec(select(NightlyJob)).one()
+            row.next_run_at = datetime.utcnow() - timedelta(seconds=1)
+            session.add(row)
+            session.commit()
+
+        job = queue.dequeue()
+        queue.run_job(job)
+        with Session(test_engine) as session:
+            row = session.exec(select(NightlyJob)).one()
+            assert row.status == "failed"
+            assert row.attempts == 2
+
+
+def test_drain_respects_concurrency_limit(tmp_path):
+    # Workers run on separate threads; a file database gives each its own connection
+    # (a shared in-memory StaticPool connection is not safe under concurrent sessions)
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    SQLModel.metadata.create_all(test_engine)
+    queue = JobQueue()
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0, "done": []}
+
+    def handler(symbol):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+            state["done"].append(symbol)
+
+    queue.register("financials", handler, concurrency=3)
+
+    with patch('backend.services.job_queue.engine', new=test_engine):
+        symbols = [f"S{i}" for i in range(20)]
+        queue.enqueue("financials", symbols)
+        processed = queue.drain(idle_wait=0.01)
+
+        assert processed == 20
+        assert sorted(state["done"]) == sorted(symbols)
+        assert state["peak"] <= 3
+        assert queue.get_stats() == {"financials": {"done": 20}}
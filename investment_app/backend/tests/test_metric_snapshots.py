@@ -0,0 +1,92 @@
+import sys
+import os
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, select
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, StockDailySnapshot
+    from backend.services.metric_snapshots import MetricSnapshotStore, pack_signals, unpack_signals
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, StockDailySnapshot
+    from backend.services.metric_snapshots import MetricSnapshotStore, pack_signals, unpack_signals
+
+
+def test_snapshots_upsert_and_query_by_signal():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    store = MetricSnapshotStore()
+    d1, d2 = date(2024, 5, 1), date(2024, 5, 2)
+
+    a = Stock(symbol="AAA", company_name="A", sector="s", industry="i", current_price=10.0,
+              signal_newhigh=1, signal_high_volume=1, rs_rating=90)
+    b = Stock(symbol="BBB", company_name="B", sector="s", industry="i", current_price=20.0,
+              signal_newhigh=1)
+    assert unpack_signals(pack_signals(a)) == ["newhigh", "high_volume"]
+
+    with patch('backend.services.metric_snapshots.engine', new=test_engine):
+        with Session(test_engine) as session:
+            store.record(a, d1)
+            store.record(b, d1)
+            store.flush(session)
+            session.commit()
+            # Next day BBB loses the signal; a rerun of d1 replaces the row instead of duplicating it
+            b.signal_newhigh = 0
+            b.current_price = 21.0
+            store.record(b, d2)
+            a.rs_rating = 95
+            store.record(a, d1)
+            store.flush(session)
+            session.commit()
+            assert len(session.exec(select(StockDailySnapshot)).all()) == 3
+
+        assert store.symbols_with_signals(d1, ["newhigh"]) == ["AAA", "BBB"]
+        assert store.symbols_with_signals(d2, ["signal_newhigh"]) == []
+        assert store.symbols_with_signals(d1, ["newhigh", "high_volume"]) == ["AAA"]
+        assert store.symbols_with_signals(d1, ["high_volume", "break_atr"], match="any") == ["AAA"]
+
+        history = store.get_history("AAA", days=100000)
+        assert len(history) == 1 and history[0]["rs_rating"] == 95
+        assert [r["date"] for r in store.get_dates()] == ["2024-05-02", "2024-05-01"]
+
+
+def test_rs_ranks_are_copied_onto_the_runs_snapshots():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    store = MetricSnapshotStore()
+    d1, d2 = date(2024, 5, 1), date(2024, 5, 2)
+
+    with patch('backend.services.metric_snapshots.engine', new=test_engine):
+        with Session(test_engine) as session:
+            a, b = Stock(symbol="AAA", rs_rank=10, rs_score=1.0), Stock(symbol="BBB", rs_rank=20, rs_score=2.0)
+            session.add_all([a, b])
+            store.record(a, d1)
+            store.record(b, d1)
+            store.flush(session)
+            session.commit()
+            assert store.record_ranks() == 2
+
+            # Next run: only AAA updated before the rank stage moved both
+            store.begin_run()
+            store.record(a, d2)
+            store.flush(session)
+            a.rs_rank, b.rs_rank = 30, 40
+            session.commit()
+        assert store.record_ranks() == 1
+        assert store.record_ranks() == 0
+
+        assert [(r["rs_rank"], r["rs_score"]) for r in sorted(store.get_day(d1), key=lambda r: r["symbol"])] == [(10, 1.0), (20, 2.0)]
+        assert [(r["symbol"], r["rs_rank"]) for r in store.get_day(d2)] == [("AAA", 30)]
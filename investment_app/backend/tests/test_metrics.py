@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.metrics import MetricsRegistry, StageTimer
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.metrics import MetricsRegistry, StageTimer
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("http_requests_total", "Requests.", ("method", "path", "status"))
+    latency = registry.histogram("http_request_duration_seconds", "Latency.", ("path",), buckets=(0.1, 1.0))
+
+    requests.inc(method="GET", path="/stocks/{symbol}", status=200)
+    requests.inc(method="GET", path="/stocks/{symbol}", status=200)
+    latency.observe(0.05, path="/stocks")
+    latency.observe(0.5, path="/stocks")
+    latency.observe(5.0, path="/stocks")
+
+    text = registry.render()
+    assert '# TYPE http_requests_total counter' in text
+    assert 'http_requests_total{method="GET",path="/stocks/{symbol}",status="200"} 2.0' in text
+    assert 'http_request_duration_seconds_bucket{path="/stocks",le="0.1"} 1' in text
+    assert 'http_request_duration_seconds_bucket{path="/stocks",le="1.0"} 2' in text
+    assert 'http_request_duration_seconds_bucket{path="/stocks",le="+Inf"} 3' in text
+    assert 'http_request_duration_seconds_count{path="/stocks"} 3' in text
+
+
+def test_stage_timer_accumulates_repeated_stages():
+    registry = MetricsRegistry()
+    hist = registry.histogram("stage_seconds", "Stages.", ("stage",))
+    stages = StageTimer(hist)
+    time.sleep(0.01)
+    stages.mark("fetch")
+    stages.mark("indicators")
+    time.sleep(0.01)
+    stages.mark("indicators")
+    totals = stages.finish()
+
+    assert set(totals) == {"fetch", "indicators"}
+    assert totals["fetch"] >= 0.01 and totals["indicators"] >= 0.01
+    snap = hist.snapshot()
+    # One observation per stage, even though "indicators" was marked twice
+    assert snap[("indicators",)]["count"] == 1
@@ -0,0 +1,96 @@
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import FailedTicker
+    from backend.services.negative_cache import NegativeCache, NO_DATA, UNKNOWN_SYMBOL
+    from backend.services.stock_service import StockService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import FailedTicker
+    from backend.services.negative_cache import NegativeCache, NO_DATA, UNKNOWN_SYMBOL
+    from backend.services.stock_service import StockService
+
+
+def test_failed_fetches_are_cached_with_growing_ttl(tmp_path):
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    cache = NegativeCache()
+    service = StockService()
+    downloads = []
+    def fake_download(ticker, **kwargs):
+        downloads.append(ticker)
+        return pd.DataFrame()
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            self.ticker = ticker
+        @property
+        def info(self):
+            if self.ticker == "FLAKY":
+                raise ConnectionError("Too Many Requests")
+            return {"trailingPegRatio": None}  # what yfinance returns for an unknown ticker
+
+    with patch('backend.services.negative_cache.engine', new=test_engine), \
+         patch('backend.services.stock_service.negative_cache', new=cache), \
+         patch('backend.services.stock_service.DATA_DIR', new=str(tmp_path)), \
+         patch('backend.services.stock_service.yf.download', side_effect=fake_download), \
+         patch('backend.services.stock_service.yf.Ticker', side_effect=FakeTicker):
+        # Empty download confirmed by the info endpoint: unknown symbol
+        assert service.get_stock_data("TYPO").empty
+        entry = cache.check("TYPO")
+        assert entry["reason"] == UNKNOWN_SYMBOL and entry["failure_count"] == 1
+        # Every later fetch path (plain, max-period retry) skips the provider
+        assert service.get_stock_data("TYPO", period="max", force_refresh=True).empty
+        assert downloads == ["TYPO"]
+
+        # Persisted, and reloaded by a fresh instance
+        with Session(test_engine) as session:
+            assert session.get(FailedTicker, "TYPO").reason == UNKNOWN_SYMBOL
+        reloaded = NegativeCache()
+        assert reloaded.check("TYPO")["failure_count"] == 1
+
+        # Consecutive failures escalate; an expired entry no longer blocks
+        first_ttl = entry["expires_at"] - entry["last_failed_at"]
+        second = cache.record("TYPO", UNKNOWN_SYMBOL)
+        assert second["failure_count"] == 2
+        assert second["expires_at"] - second["last_failed_at"] > first_ttl
+        cache._entries["TYPO"]["expires_at"] = datetime.utcnow() - timedelta(seconds=1)
+        assert cache.check("TYPO") is None
+        assert cache.list_entries()[0]["active"] is False
+
+        # Empty download that the provider did not confirm (rate limit): short backoff that never escalates
+        for _ in range(3):
+            cache._entries.get("FLAKY", {})["expires_at"] = datetime.utcnow()
+            assert service.get_stock_data("FLAKY", force_refresh=True).empty
+        flaky = cache.check("FLAKY")
+        assert flaky["reason"] == NO_DATA and flaky["failure_count"] == 3
+        assert flaky["expires_at"] - flaky["last_failed_at"] == timedelta(minutes=5)
+        assert downloads == ["TYPO", "FLAKY", "FLAKY", "FLAKY"]
+        cache.clear("FLAKY")
+
+        # A different reason restarts the count; success clears the entry
+        assert cache.record("TYPO", NO_DATA)["failure_count"] == 1
+        cache.resolve("TYPO")
+        assert cache.check("TYPO") is None
+        with Session(test_engine) as session:
+            assert session.get(FailedTicker, "TYPO") is None
+
+        cache.record("A", NO_DATA)
+        cache.record("B", UNKNOWN_SYMBOL)
+        assert cache.get_stats() == {"entries": 2, "active": 2, "active_by_reason": {NO_DATA: 1, UNKNOWN_SYMBOL: 1}}
+        assert cache.clear("A") and not cache.clear("A")
+        assert cache.clear_all() == 1
+        assert cache.list_entries() == []
@@ -0,0 +1,135 @@
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, select
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, StockNews, NewsFetchState
+    from backend.services.news_ingester import NewsIngester, NEWS_TTL
+    from backend.services import scheduled_jobs
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, StockNews, NewsFetchState
+    from backend.services.news_ingester import NewsIngester, NEWS_TTL
+    from backend.services import scheduled_jobs
+
+
+def _item(link, title=None, tickers=None):
+    return {
+        "title": title or f"Headline {link}",
+        "publisher": None,
+        "link": f"https://news.example/{link}",
+        "provider_publish_time": datetime(2024, 5, 1, 12, 0),
+        "type": None,
+        "related_tickers": tickers or [],
+    }
+
+
+def test_ingest_dedupes_on_link_and_records_watermarks():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+
+    feeds = {
+        # "shared" is returned for both symbols: stored once, for the first symbol
+        "AAA": [_item("a1"), _item("shared", tickers=["AAA", "BBB"])],
+        "BBB": [_item("b1"), _item("shared", tickers=["AAA", "BBB"])],
+    }
+    def fake_fetch(symbol):
+        if symbol == "ERR":
+            raise Exception("provider down")
+        return feeds[symbol]
+
+    ingester = NewsIngester(max_workers=2)
+    with patch('backend.services.news_ingester.engine', new=test_engine), \
+         patch('backend.services.news_ingester.stock_service.fetch_news', side_effect=fake_fetch) as fetch:
+        assert ingester.ingest(["AAA", "BBB", "AAA", "ERR"]) == {"AAA": 2, "BBB": 2}
+        assert fetch.call_count == 3
+
+        with Session(test_engine) as session:
+            rows = session.exec(select(StockNews).order_by(StockNews.link)).all()
+            assert [(r.symbol, r.link.rsplit("/", 1)[1]) for r in rows] == [("AAA", "a1"), ("BBB", "b1"), ("AAA", "shared")]
+            assert rows[0].publisher == "Unknown" and rows[0].type == "STORY"
+            # The failed fetch gets no watermark, so it is retried
+            states = {s.symbol: s for s in session.exec(select(NewsFetchState)).all()}
+            assert set(states) == {"AAA", "BBB"} and states["AAA"].item_count == 2
+
+        # Re-ingesting the same links is a no-op (ON CONFLICT(link) DO NOTHING)
+        feeds["AAA"] = [_item("a1", title="Edited"), _item("a2")]
+        assert ingester.ingest(["AAA"]) == {"AAA": 2}
+        with Session(test_engine) as session:
+            assert len(session.exec(select(StockNews)).all()) == 4
+            assert ingester.get_news(session, "AAA", limit=10)[0].symbol == "AAA"
+            assert session.exec(select(StockNews.title).where(StockNews.link.endswith("/a1"))).one() == "Headline a1"
+
+
+def test_ensure_fresh_skips_symbols_inside_the_ttl():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    now = datetime.utcnow()
+    with Session(test_engine) as session:
+        session.add(NewsFetchState(symbol="FRESH", last_fetched_at=now - NEWS_TTL + timedelta(minutes=5), item_count=1))
+        session.add(NewsFetchState(symbol="STALE", last_fetched_at=now - NEWS_TTL - timedelta(minutes=5), item_count=1))
+        session.commit()
+
+    ingester = NewsIngester()
+    with patch('backend.services.news_ingester.engine', new=test_engine), \
+         patch('backend.services.news_ingester.stock_service.fetch_news', return_value=[]) as fetch:
+        assert ingester.stale_symbols(["FRESH", "STALE", "NEW"]) == ["STALE", "NEW"]
+        assert ingester.ensure_fresh(["FRESH", "STALE", "NEW"]) == {"STALE": 0, "NEW": 0}
+        assert sorted(c.args[0] for c in fetch.call_args_list) == ["NEW", "STALE"]
+
+        # Everything was just stamped: nothing left to fetch
+        assert ingester.ensure_fresh(["FRESH", "STALE", "NEW"]) == {}
+        assert fetch.call_count == 2
+
+
+def test_provider_error_leaves_no_watermark_and_summary_job_retries():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    with Session(test_engine) as session:
+        session.add(Stock(symbol="AAA"))
+        session.commit()
+
+    class DownTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+        @property
+        def news(self):
+            raise ConnectionError("rate limited")
+
+    ingester = NewsIngester()
+    # The real StockService.fetch_news, with yfinance failing underneath
+    with patch('backend.services.news_ingester.engine', new=test_engine), \
+         patch('backend.services.scheduled_jobs.engine', new=test_engine), \
+         patch('backend.services.scheduled_jobs.news_ingester', new=ingester), \
+         patch('backend.services.stock_service.yf.Ticker', side_effect=DownTicker), \
+         patch('backend.services.scheduled_jobs.gemini_service.generate_content') as generate:
+        assert ingester.ingest(["AAA"]) == {}
+        assert ingester.stale_symbols(["AAA"]) == ["AAA"]
+
+        # The summary job must not store "no news" for a provider error
+        with pytest.raises(Exception, match="News fetch failed"):
+            scheduled_jobs._run_news_summary_task("AAA")
+        generate.assert_not_called()
+
+    with Session(test_engine) as session:
+        assert session.exec(select(NewsFetchState)).all() == []
+        assert session.get(Stock, "AAA").news_summary_jp is None
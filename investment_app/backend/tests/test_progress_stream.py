@@ -0,0 +1,33 @@
+import sys
+import os
+import json
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.progress_stream import ProgressStream
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.progress_stream import ProgressStream
+
+
+def test_events_since_and_sse_format():
+    stream = ProgressStream(buffer_size=3)
+    stream.register_source("update", lambda: {"status": "running", "progress": 1})
+    start = stream.last_seq
+    for i in range(4):
+        stream.emit("update", "symbol_error", {"symbol": f"S{i}"})
+
+    events = stream.events_since(start)
+    # Oldest event fell out of the bounded buffer
+    assert [e[3]["symbol"] for e in events] == ["S1", "S2", "S3"]
+    assert stream.events_since(stream.last_seq) == []
+    assert stream.states() == {"update": {"status": "running", "progress": 1}}
+
+    seq, source, event, data = events[-1]
+    text = ProgressStream.format_sse(f"{source}.{event}", data, event_id=seq)
+    assert text.endswith("\n\n")
+    lines = text.strip().split("\n")
+    assert lines[0] == f"id: {seq}"
+    assert lines[1] == "event: update.symbol_error"
+    assert json.loads(lines[2][len("data: "):]) == {"symbol": "S3"}
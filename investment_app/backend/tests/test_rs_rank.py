@@ -0,0 +1,32 @@
+import sys
+import os
+import numpy as np
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.rs_rank import compute_rs_ranks
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.rs_rank import compute_rs_ranks
+
+
+def test_percentile_ranks_handle_ties_and_missing_horizons():
+    weights = np.array([0.2, 0.4, 0.4])
+    returns = np.array([
+        [10.0, 10.0, 10.0],       # score 10
+        [0.0, 0.0, 0.0],          # score 0
+        [np.nan, 20.0, 20.0],     # missing 20d -> renormalized, score 20
+        [0.0, 0.0, 0.0],          # tie with row 1
+        [np.nan, np.nan, np.nan], # no data -> unranked
+        [-5.0, -5.0, -5.0],       # worst
+    ])
+    score, rank = compute_rs_ranks(returns, weights)
+
+    assert np.isclose(score[2], 20.0)
+    assert np.isnan(score[4])
+    assert rank[4] == 0
+    assert rank[2] == 99 and rank[5] == 1
+    assert rank[1] == rank[3]
+    assert rank[5] < rank[1] < rank[0] < rank[2]
+    assert ((rank[rank > 0] >= 1) & (rank[rank > 0] <= 99)).all()
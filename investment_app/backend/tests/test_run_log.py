@@ -0,0 +1,52 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.run_log import UpdateRunLog
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.run_log import UpdateRunLog
+
+
+def _make_engine():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    return test_engine
+
+
+def test_top_slowest_ranks_symbols_and_steps():
+    test_engine = _make_engine()
+    log = UpdateRunLog()
+
+    with patch('backend.services.run_log.engine', new=test_engine):
+        started = datetime.utcnow()
+        run_id = log.start_run()
+        log.record("AAPL", {"fetch": 0.5, "fundamentals.info": 0.2})
+        log.record("SLOW", {"fetch": 0.4, "fundamentals.earnings_dates": 6.0})
+        with Session(test_engine) as session:
+            log.flush(session)
+            session.commit()
+        log.record("ERR", {"fetch": 1.0, "error": 0.1}, error="Empty data")
+        log.finish_run("completed", started, profile_path=None)
+
+        report = log.top_slowest(limit=2)
+        assert report["run"].id == run_id
+        assert report["run"].symbol_count == 3
+        assert report["run"].status == "completed"
+        assert [r["symbol"] for r in report["symbols"]] == ["SLOW", "ERR"]
+        assert report["symbols"][1]["error"] == "Empty data"
+        assert report["steps"][0] == {"symbol": "SLOW", "step": "fundamentals.earnings_dates", "seconds": 6.0}
+        assert report["step_totals"][0]["step"] == "fundamentals.earnings_dates"
+        fetch_total = next(t for t in report["step_totals"] if t["step"] == "fetch")
+        assert fetch_total == {"step": "fetch", "seconds": 1.9, "count": 3}
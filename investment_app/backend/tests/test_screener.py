@@ -0,0 +1,73 @@
+import sys
+import os
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, TradeHistory, StockNote
+    from backend.services.screener import run_screen
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, TradeHistory, StockNote
+    from backend.services.screener import run_screen
+
+
+def _seed(session):
+    rows = [
+        # symbol, composite, rs, forward_pe, industry, newhigh, hidden
+        ("AAA", 99, 90, 20.0, "Software", 1, False),
+        ("BBB", 95, 80, None, "Software", 1, False),
+        ("CCC", 95, 70, 35.0, "Banks", 0, False),
+        ("DDD", 95, 99, 15.0, "Software", 1, False),
+        ("EEE", None, 60, 10.0, "Software", 1, False),
+        ("HID", 99, 99, 10.0, "Software", 1, True),
+    ]
+    for sym, comp, rs, pe, industry, newhigh, hidden in rows:
+        session.add(Stock(symbol=sym, company_name=sym, sector="Tech", industry=industry,
+                          composite_rating=comp, rs_rating=rs, forward_pe=pe,
+                          signal_newhigh=newhigh, is_hidden=hidden))
+    now = datetime.utcnow()
+    session.add(TradeHistory(symbol="AAA", trade_type="買い", quantity=10, price=1.0, trade_date=now))
+    session.add(TradeHistory(symbol="DDD", trade_type="買い", quantity=10, price=1.0, trade_date=now))
+    session.add(TradeHistory(symbol="DDD", trade_type="売り", quantity=10, price=1.0, trade_date=now))
+    session.add(StockNote(symbol="BBB", content="watch"))
+    session.commit()
+
+
+def test_screen_criteria_sorting_and_keyset_pages():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    with Session(test_engine) as session:
+        _seed(session)
+
+        criteria = {"signal_newhigh": True, "industry": "Software", "min_rs_rating": 70,
+                    "max_forward_pe": 30, "status": "None", "has_analysis": False, "unknown_key": 1}
+        result = run_screen(session, criteria)
+        # Missing forward_pe counts as 0 (same as the dashboard), hidden rows are excluded
+        assert result["symbols"] == ["AAA", "BBB", "DDD"]
+        assert result["ignored"] == ["unknown_key"]
+
+        assert run_screen(session, {"status": "Holding"})["symbols"] == ["AAA"]
+        assert run_screen(session, {"status": "Past Trade"})["symbols"] == ["DDD"]
+        assert run_screen(session, {"has_note": True})["symbols"] == ["BBB"]
+
+        # Keyset pages across ties (95 x3) and a NULL sort value (sorted last)
+        seen, cursor = [], None
+        while True:
+            page = run_screen(session, {}, sort="composite_rating", order="desc", limit=2, cursor=cursor)
+            seen.extend(page["symbols"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert seen == ["AAA", "BBB", "CCC", "DDD", "EEE"]
+
+        asc = run_screen(session, {}, sort="forward_pe", order="asc", limit=10)["symbols"]
+        assert asc == ["EEE", "DDD", "AAA", "CCC", "BBB"]
@@ -0,0 +1,77 @@
+import sys
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, select
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, StockTombstone
+    from backend.services import bulk_symbols
+    from backend.routers.stocks import list_stock_changes, update_note, NoteUpdate
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, StockTombstone
+    from backend.services import bulk_symbols
+    from backend.routers.stocks import list_stock_changes, update_note, NoteUpdate
+
+
+def _changes(session, since=None):
+    result = list_stock_changes(since=since, asset_type="stock", show_hidden_only=False, lite=True, session=session)
+    result["symbols"] = sorted(s.symbol for s in result["changed"])
+    result["removed"] = sorted((r["symbol"], r["reason"]) for r in result["removed"])
+    return result
+
+
+def test_changes_full_delta_and_removed():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    t0 = datetime.utcnow() - timedelta(hours=1)
+
+    with Session(test_engine) as session:
+        session.add_all([
+            Stock(symbol="A", updated_at=t0), Stock(symbol="B", updated_at=t0), Stock(symbol="C", updated_at=t0),
+            Stock(symbol="OLD", updated_at=t0 - timedelta(hours=1)),
+            Stock(symbol="HID", is_hidden=True, updated_at=t0 - timedelta(hours=1)),
+        ])
+        session.add(StockTombstone(symbol="GONE", deleted_at=t0 - timedelta(days=40)))
+        session.commit()
+
+        # No watermark: the whole visible list
+        first = _changes(session)
+        assert first["full"] and first["symbols"] == ["A", "B", "C", "OLD"]
+        watermark = first["watermark"]
+        # GET no longer prunes; that happens after the update run
+        assert session.get(StockTombstone, "GONE") is not None
+
+        # Note edit (other table), hide, delete, and a row whose stamp is older than
+        # the watermark but committed after it (e.g. an update chunk)
+        update_note("A", NoteUpdate(content="watch"), session=session)
+        bulk_symbols.set_hidden(session, ["B"], True)
+        bulk_symbols.delete_symbols(session, ["C"])
+        session.add(Stock(symbol="LATE", updated_at=t0 - timedelta(seconds=30)))
+        session.commit()
+
+        delta = _changes(session, since=watermark)
+        assert not delta["full"]
+        assert delta["symbols"] == ["A", "LATE"]
+        assert delta["removed"] == [("B", "hidden"), ("C", "deleted")]
+        assert delta["watermark"] > watermark
+
+        # Re-reading from the new watermark only repeats rows inside the overlap
+        again = _changes(session, since=delta["watermark"])
+        assert "OLD" not in again["symbols"] and "LATE" not in again["symbols"]
+
+        # A watermark older than the tombstone retention gets a full resync
+        stale = (datetime.utcnow() - timedelta(days=bulk_symbols.TOMBSTONE_RETENTION_DAYS + 1)).isoformat() + "Z"
+        assert _changes(session, since=stale)["full"]
+
+        assert bulk_symbols.prune_tombstones(session) == 1
+        session.commit()
+        assert [t.symbol for t in session.exec(select(StockTombstone)).all()] == ["C"]
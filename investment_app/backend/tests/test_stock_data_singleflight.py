@@ -0,0 +1,74 @@
+import sys
+import os
+import threading
+import time
+import pandas as pd
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.services.stock_service import StockService
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.services.stock_service import StockService
+
+
+def _slow_service(calls, delay=0.1, error=None):
+    service = StockService()
+
+    def fake_fetch(symbol, period, interval, force_refresh):
+        calls.append((symbol, period, interval))
+        time.sleep(delay)
+        if error:
+            raise error
+        return pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.bdate_range("2024-01-01", periods=2))
+
+    service._get_stock_data = fake_fetch
+    return service
+
+
+def _run_concurrently(fn, n):
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_fetch():
+    calls = []
+    service = _slow_service(calls)
+    results, errors = _run_concurrently(lambda: service.get_stock_data("AAPL"), 5)
+
+    assert errors == [None] * 5
+    assert len(calls) == 1
+    assert service.get_singleflight_stats() == {"fetched": 1, "coalesced": 4, "in_flight": 0}
+    # Every caller gets an independent copy it can mutate
+    assert len({id(df) for df in results}) == 5
+    results[0]["SMA5"] = 0
+    assert "SMA5" not in results[1].columns
+
+    # Different keys are not coalesced; a finished flight is not reused
+    service.get_stock_data("AAPL", interval="1wk")
+    service.get_stock_data("AAPL")
+    assert len(calls) == 3
+
+
+def test_errors_propagate_to_waiters():
+    calls = []
+    service = _slow_service(calls, error=RuntimeError("provider down"))
+    results, errors = _run_concurrently(lambda: service.get_stock_data("MSFT"), 3)
+
+    assert len(calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert service.get_singleflight_stats()["in_flight"] == 0
@@ -0,0 +1,61 @@
+import sys
+import os
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock
+    from backend.routers.stocks import get_stock_detail, list_stocks, list_stock_changes
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock
+    from backend.routers.stocks import get_stock_detail, list_stocks, list_stock_changes
+
+
+def _listed(session):
+    listed = [s.symbol for s in list_stocks(asset_type="stock", lite=True, session=session)]
+    changes = list_stock_changes(since=None, asset_type="stock", show_hidden_only=False, lite=True, session=session)
+    assert sorted(s.symbol for s in changes["changed"]) == sorted(listed)
+    return sorted(listed)
+
+
+def test_detail_auto_registration_stays_unlisted_until_enriched():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+
+    with Session(test_engine) as session, \
+         patch('backend.routers.stocks.enrichment_queue.submit') as submit, \
+         patch('backend.routers.stocks.negative_cache.check', return_value=None), \
+         patch('backend.services.gdrive_loader.gdrive_loader.get_latest_summaries', return_value={}):
+        session.add(Stock(symbol="AAPL", company_name="Apple"))
+        session.add(Stock(symbol="BAD", company_name="BAD", enrichment_status="failed"))
+        session.commit()
+
+        detail = get_stock_detail("NEWCO", session=session)
+        assert detail.enrichment_status == "pending"
+        submit.assert_called_once_with("NEWCO", source="detail")
+        # The row exists for the detail view but is not listed until enrichment validates it
+        assert session.get(Stock, "NEWCO") is not None
+        assert _listed(session) == ["AAPL", "BAD"]
+
+        # Path values that cannot be tickers are not registered at all
+        for junk in ("wp-admin/x", "a b", "", "VERYLONGSYMBOLNAME"):
+            with pytest.raises(HTTPException) as exc:
+                get_stock_detail(junk, session=session)
+            assert exc.value.status_code == 404
+        assert submit.call_count == 1
+
+        # Enrichment done: listed
+        session.get(Stock, "NEWCO").enrichment_status = None
+        session.commit()
+        assert _listed(session) == ["AAPL", "BAD", "NEWCO"]
@@ -0,0 +1,67 @@
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.database import Stock, StockNews, NewsSummaryCache
+    from backend.services.summary_cache import SummaryCache
+    from backend.services import scheduled_jobs
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.database import Stock, StockNews, NewsSummaryCache
+    from backend.services.summary_cache import SummaryCache
+    from backend.services import scheduled_jobs
+
+
+def test_key_ignores_order_and_whitespace_but_not_template():
+    cache = SummaryCache()
+    key = cache.make_key(["Apple beats estimates", "Fed holds rates"], "template v1")
+    assert cache.make_key(["  fed  holds\trates ", "APPLE beats estimates", "Fed holds rates", None], "template v1") == key
+    # Full-width characters normalize (NFKC) to the same headline
+    assert cache.make_key(["Ａｐｐｌｅ beats estimates", "Fed holds rates"], "template v1") == key
+    assert cache.make_key(["Apple beats estimates", "Fed holds rates"], "template v2") != key
+    assert cache.make_key(["Apple beats estimates"], "template v1") != key
+
+
+def test_cached_summary_skips_gemini():
+    test_engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(test_engine)
+    with Session(test_engine) as session:
+        session.add_all([Stock(symbol="AAA"), Stock(symbol="BBB")])
+        session.commit()
+
+    def news(session, symbol, limit=50):
+        # Same headlines for both symbols, in a different order
+        titles = ["Chip demand rises", "Sector rally continues"]
+        if symbol == "BBB":
+            titles.reverse()
+        return [StockNews(symbol=symbol, title=t, publisher="X", link=f"{symbol}/{t}",
+                          provider_publish_time=datetime(2024, 5, 1), type="STORY") for t in titles]
+
+    cache = SummaryCache()
+    with patch('backend.services.scheduled_jobs.engine', new=test_engine), \
+         patch('backend.services.summary_cache.engine', new=test_engine), \
+         patch('backend.services.scheduled_jobs.summary_cache', new=cache), \
+         patch('backend.services.scheduled_jobs.news_ingester.stale_symbols', return_value=[]), \
+         patch('backend.services.scheduled_jobs.news_ingester.get_news', side_effect=news), \
+         patch('backend.services.scheduled_jobs.gemini_service.generate_content', return_value="要約") as generate:
+        scheduled_jobs._run_news_summary_task("AAA")
+        scheduled_jobs._run_news_summary_task("BBB")
+
+    assert generate.call_count == 1
+    assert cache.get_stats() == {"hits": 1, "misses": 1}
+    with Session(test_engine) as session:
+        assert session.get(Stock, "AAA").news_summary_jp == "要約"
+        assert session.get(Stock, "BBB").news_summary_jp == "要約"
+        row = session.get(NewsSummaryCache, cache.make_key(["Chip demand rises", "Sector rally continues"], scheduled_jobs.NEWS_SUMMARY_PROMPT))
+        assert row.hit_count == 1 and row.headline_count == 2
@@ -0,0 +1,54 @@
+import sys
+import os
+
+# Run from investment_app
+sys.path.append(os.getcwd())
+try:
+    from backend.benchmarks.synthetic import SyntheticMarket, generate_ohlcv, use_synthetic_market
+    from backend.services import stock_service as stock_service_module
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'investment_app'))
+    from backend.benchmarks.synthetic import SyntheticMarket, generate_ohlcv, use_synthetic_market
+    from backend.services import stock_service as stock_service_module
+
+
+def test_generate_ohlcv_is_deterministic_and_valid():
+    a = generate_ohlcv("SYN00001", years=1, seed=3, end="2024-12-31", gap_rate=0.05)
+    b = generate_ohlcv("SYN00001", years=1, seed=3, end="2024-12-31", gap_rate=0.05)
+    assert a.equals(b)
+    assert list(a.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert a.index.is_monotonic_increasing
+    assert (a["High"] >= a[["Open", "Close"]].max(axis=1)).all()
+    assert (a["Low"] <= a[["Open", "Close"]].min(axis=1)).all()
+    # Gaps drop sessions but keep the latest bar
+    assert len(a) < 252
+    assert str(a.index[-1].date()) == "2024-12-31"
+
+
+def test_download_matches_yfinance_shapes():
+    market = SyntheticMarket(years=2)
+    single = market.download("SYN00002", period="1mo", interval="1d")
+    assert list(single.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert 15 <= len(single) <= 24
+
+    weekly = market.download("SYN00002", period="1y", interval="1wk")
+    assert (weekly.index.dayofweek == 0).all()
+
+    multi = market.download(["SYN00002", "SYN00003"], period="6mo")
+    assert multi.columns.names == ["Price", "Ticker"]
+    assert set(multi.columns.get_level_values("Ticker")) == {"SYN00002", "SYN00003"}
+
+
+def test_synthetic_market_keeps_the_parquet_cache_out_of_data_dir():
+    market = SyntheticMarket(years=1, seed=3)
+    real_dir = stock_service_module.DATA_DIR
+    before = set(os.listdir(real_dir)) if os.path.isdir(real_dir) else set()
+    with use_synthetic_market(market):
+        data_dir = stock_service_module.DATA_DIR
+        assert data_dir != real_dir
+        closes, _ = stock_service_module.stock_service.get_daily_closes("SYNA")
+        assert not closes.empty
+        assert any(name.startswith("SYNA_") for name in os.listdir(data_dir))
+    assert stock_service_module.DATA_DIR == real_dir and not os.path.exists(data_dir)
+    after = set(os.listdir(real_dir)) if os.path.isdir(real_dir) else set()
+    assert after == before
@@ -0,0 +1,104 @@
+"use client";
+
+import { useState, useEffect } from 'react';
+import Link from 'next/link';
+import { fetchFailedTickers, clearFailedTicker, clearFailedTickers, FailedTicker } from '@/lib/api';
+
+const REASON_LABELS: Record<string, string> = {
+    unknown_symbol: '銘柄情報なし',
+    no_data: '価格データなし',
+};
+
+export default function FailedTickersPage() {
+    const [entries, setEntries] = useState<FailedTicker[]>([]);
+    const [loading, setLoading] = useState(true);
+
+    useEffect(() => {
+        loadEntries();
+    }, []);
+
+    const loadEntries = () => {
+        setLoading(true);
+        fetchFailedTickers().then(data => {
+            setEntries(data.entries);
+            setLoading(false);
+        }).catch(err => {
+            console.error(err);
+            setLoading(false);
+        });
+    };
+
+    const handleClear = async (symbol: string) => {
+        try {
+            await clearFailedTicker(symbol);
+            loadEntries();
+        } catch (err: any) {
+            alert(err.message);
+        }
+    };
+
+    const handleClearAll = async (expiredOnly: boolean) => {
+        if (!expiredOnly && !confirm("すべてのエントリを削除しますか？")) return;
+        try {
+            await clearFailedTickers(expiredOnly);
+            loadEntries();
+        } catch (err: any) {
+            alert(err.message);
+        }
+    };
+
+    return (
+        <div className="min-h-screen bg-black text-gray-200 p-8">
+            <header className="mb-8 flex justify-between items-center">
+                <div>
+                    <Link href="/" className="text-gray-400 hover:text-white mb-2 inline-block">← ダッシュボード</Link>
+                    <h1 className="text-3xl font-bold text-white">取得失敗ティッカー</h1>
+                    <div className="text-sm text-gray-500">有効なエントリの銘柄は期限までデータ取得をスキップします。</div>
+                </div>
+                <div className="flex gap-2">
+                    <button onClick={() => handleClearAll(true)} className="text-sm border border-gray-700 hover:bg-gray-800 px-3 py-1 rounded">
+                        期限切れを削除
+                    </button>
+                    <button onClick={() => handleClearAll(false)} className="text-sm text-red-400 border border-red-500/50 hover:bg-red-900/30 px-3 py-1 rounded">
+                        すべて削除
+                    </button>
+                </div>
+            </header>
+
+            {loading ? (
+                <div>読み込み中...</div>
+            ) : entries.length === 0 ? (
+                <div className="text-gray-500 italic">エントリはありません。</div>
+            ) : (
+                <table className="max-w-5xl w-full text-sm">
+                    <thead>
+                        <tr className="text-left text-gray-400 border-b border-gray-800">
+                            <th className="py-2">銘柄</th>
+                            <th>理由</th>
+                            <th>回数</th>
+                            <th>最終失敗 (UTC)</th>
+                            <th>スキップ期限 (UTC)</th>
+                            <th></th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {entries.map(e => (
+                            <tr key={e.symbol} className={`border-b border-gray-900 ${e.active ? '' : 'text-gray-600'}`}>
+                                <td className="py-2 font-mono font-bold">{e.symbol}</td>
+                                <td title={e.detail ?? ''}>{REASON_LABELS[e.reason] ?? e.reason}</td>
+                                <td className="font-mono">{e.failure_count}</td>
+                                <td className="font-mono">{e.last_failed_at.slice(0, 16).replace('T', ' ')}</td>
+                                <td className="font-mono">{e.expires_at.slice(0, 16).replace('T', ' ')}{!e.active && ' (期限切れ)'}</td>
+                                <td className="text-right">
+                                    <button onClick={() => handleClear(e.symbol)} className="text-red-500 hover:text-red-400 underline">
+                                        削除
+                                    </button>
+                                </td>
+                            </tr>
+                        ))}
+                    </tbody>
+                </table>
+            )}
+        </div>
+    );
+}
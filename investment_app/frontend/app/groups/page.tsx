@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import Link from 'next/link';
-import { fetchGroups, createGroup, deleteGroup, StockGroup, StockGroupMember, fetchGroupMembers, removeGroupMember } from '@/lib/api';
+import { fetchGroups, createGroup, deleteGroup, StockGroup, StockGroupMember, fetchGroupMembers, removeGroupMember, fetchGroupSummary, GroupSummary } from '@/lib/api';
 import { useRouter } from 'next/navigation';
 import PortfolioAnalysisDialog from '@/components/PortfolioAnalysisDialog';
 
@@ -17,6 +17,7 @@ export default function GroupsPage() {
     const [expandedGroupId, setExpandedGroupId] = useState<number | null>(null);
     const [members, setMembers] = useState<any[]>([]); // Using any for stock object for now
     const [membersLoading, setMembersLoading] = useState(false);
+    const [summary, setSummary] = useState<GroupSummary | null>(null);
 
     useEffect(() => {
         loadGroups();
@@ -66,6 +67,8 @@ export default function GroupsPage() {
             // In database, we fetch members. But fetchGroupMembers returns Stocks.
             const stocks = await fetchGroupMembers(id);
             setMembers(stocks);
+            setSummary(null);
+            fetchGroupSummary(id).then(setSummary).catch(console.error);
         } catch (err) {
             console.error(err);
         } finally {
@@ -80,6 +83,7 @@ export default function GroupsPage() {
             // Reload members
             const stocks = await fetchGroupMembers(groupId);
             setMembers(stocks);
+            fetchGroupSummary(groupId).then(setSummary).catch(console.error);
         } catch (err: any) {
             alert(err.message);
         }
@@ -172,6 +176,18 @@ export default function GroupsPage() {
                             {/* Expanded Content (Members) */}
                             {expandedGroupId === group.id && (
                                 <div className="border-t border-gray-800 bg-gray-950 p-4">
+                                    {summary && summary.group_id === group.id && summary.member_count > 0 && (
+                                        <div className="flex flex-wrap gap-4 text-xs text-gray-400 mb-3">
+                                            {summary.total_value > 0 && <span>評価額 <span className="text-white font-mono">{summary.total_value.toLocaleString()}</span></span>}
+                                            {(['1d', '5d', '20d'] as const).map(p => (
+                                                <span key={p}>{p} <span className={`font-mono ${(summary.changes[p].average ?? 0) >= 0 ? 'text-green-400' : 'text-red-400'}`}>{summary.changes[p].average ?? '-'}%</span></span>
+                                            ))}
+                                            <span>RS 20d vs S&amp;P <span className="text-white font-mono">{summary.relative_strength['20d'].average ?? '-'}</span></span>
+                                            {Object.keys(summary.signals).length > 0 && (
+                                                <span>シグナル {Object.entries(summary.signals).map(([k, n]) => `${k}:${n}`).join(' ')}</span>
+                                            )}
+                                        </div>
+                                    )}
                                     {membersLoading ? (
                                         <div className="text-sm text-gray-500">メンバー読み込み中...</div>
                                     ) : members.length === 0 ? (
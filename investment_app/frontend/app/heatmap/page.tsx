@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState, useMemo } from 'react';
-import { fetchStocks, Stock } from '@/lib/api';
+import { fetchHeatmap, HeatmapData } from '@/lib/api';
 import { Treemap, ResponsiveContainer, Tooltip } from 'recharts';
 import Link from 'next/link';
 import { useRouter } from 'next/navigation';
@@ -136,9 +136,9 @@ const formatCap = (cap: number | null) => {
 };
 
 export default function HeatmapPage() {
-    const [stocks, setStocks] = useState<Stock[]>([]);
+    const [heatmap, setHeatmap] = useState<HeatmapData | null>(null);
     const [loading, setLoading] = useState(true);
-    const [metric, setMetric] = useState<'1d' | '5d'>('1d');
+    const [metric, setMetric] = useState<'1d' | '5d' | '20d'>('1d');
     const [maxCap, setMaxCap] = useState<number | null>(null); // Null means no limit
 
     const [error, setError] = useState<string | null>(null);
@@ -153,17 +153,14 @@ export default function HeatmapPage() {
             setLoading(false);
         }, 15000); // 15s timeout
 
-        fetchStocks(0, 5000, "stock", false, true).then(data => {
+        // Aggregated and cached server-side; the market cap filter is applied there too
+        fetchHeatmap(maxCap).then(data => {
             clearTimeout(timeoutId);
-            console.log("Heatmap: Data received", data.length);
-            setStocks(data);
-            if (data.length === 0) {
+            setHeatmap(data);
+            if (data.total.count === 0) {
                 setError("No stocks found. Please check database or connection.");
             } else {
                 setLoading(false);
-                // Log sample data to verify market_cap formatting
-                const sample = data.find(s => s.market_cap > 0);
-                console.log("Sample Stock Market Cap:", sample?.symbol, sample?.market_cap, typeof sample?.market_cap);
             }
         }).catch(err => {
             clearTimeout(timeoutId);
@@ -173,52 +170,32 @@ export default function HeatmapPage() {
         });
 
         return () => clearTimeout(timeoutId);
-    }, []);
+    }, [maxCap]);
 
     const treeData = useMemo(() => {
-        if (stocks.length === 0) return [];
-
-        const sectors: Record<string, any> = {};
-
-        let filteredCount = 0;
-        stocks.forEach(s => {
-            if (!s.sector || !s.market_cap || s.asset_type === 'index') return;
-
-            // Market Cap Filter
-            // Handle potentially string or already number market_cap
-            // Python backend might send scientific notation or simple ints
-            const cap = Number(s.market_cap);
-
-            if (maxCap !== null) {
-                // Debug first few rejections
-                if (cap > maxCap) {
-                    // console.log(`Filtering out ${s.symbol}: ${cap} > ${maxCap}`);
-                    return;
-                }
-            }
-
-            if (!sectors[s.sector]) {
-                sectors[s.sector] = { name: s.sector, children: [] };
-            }
-
-            const change = metric === '1d' ? s.change_percentage_1d : s.change_percentage_5d;
-
-            sectors[s.sector].children.push({
-                name: s.symbol,
-                size: cap,
-                change: change || 0,
-                company: s.company_name,
-                isHeld: (s.holding_quantity || 0) > 0.0001 // Determine strict holding
-            });
-            filteredCount++;
-        });
-
-        console.log(`Filtered stocks count: ${filteredCount} / ${stocks.length} (MaxCap: ${maxCap})`);
-
-        // Filter out empty sectors
-        return Object.values(sectors).filter(s => s.children.length > 0);
-
-    }, [stocks, metric, maxCap]);
+        if (!heatmap) return [];
+
+        const changeIndex = metric === '1d' ? 3 : metric === '5d' ? 4 : 5;
+        const changeKey = `change_${metric}` as 'change_1d' | 'change_5d' | 'change_20d';
+
+        return heatmap.sectors.map(sector => {
+            const sectorChange = sector[changeKey];
+            return {
+                // Sector label carries the cap-weighted change and breadth
+                name: sectorChange !== null
+                    ? `${sector.name} ${sectorChange > 0 ? '+' : ''}${sectorChange.toFixed(1)}% (${sector.breadth_pct ?? 0}%↑)`
+                    : sector.name,
+                children: sector.industries.flatMap(industry => (industry.leaves || []).map(leaf => ({
+                    name: leaf[0],
+                    company: leaf[1],
+                    size: leaf[2],
+                    change: leaf[changeIndex] || 0,
+                    isHeld: leaf[6]
+                })))
+            };
+        }).filter(s => s.children.length > 0);
+
+    }, [heatmap, metric]);
 
     return (
         <div className="min-h-screen bg-black text-gray-200">
@@ -264,6 +241,12 @@ export default function HeatmapPage() {
                         >
                             5 Days
                         </button>
+                        <button
+                            onClick={() => setMetric('20d')}
+                            className={`px-4 py-1.5 rounded-md text-sm font-bold transition-all ${metric === '20d' ? 'bg-blue-600 text-white shadow-lg' : 'text-gray-400 hover:text-white'}`}
+                        >
+                            20 Days
+                        </button>
                     </div>
                 </div>
             </header>
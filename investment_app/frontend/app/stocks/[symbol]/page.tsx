@@ -2,7 +2,7 @@
 
 import Link from 'next/link';
 import { useEffect, useState } from 'react';
-import { fetchStockDetail, fetchStockChart, fetchStockSignals, fetchStockHistory, fetchStockNote, saveStockNote, fetchStockAnalysis, deleteStock, Stock, StockGroup, fetchGroups, ChartData, TradeHistory, StockNote, AnalysisResult, updateStock, fetchPrompts, fetchStockPriceHistory, GeminiPrompt, openFile, generateText, updateTradeNote, pickFile, AlertCondition, triggerVisualAnalysis, deleteAnalysisResult, StockNews, fetchStockNews, refreshFinancials, StockFinancials, fetchStockFinancials, summarizeNews } from '@/lib/api';
+import { fetchStockDetail, fetchStockChart, fetchStockSignals, fetchStockHistory, fetchStockNote, saveStockNote, fetchStockAnalysis, deleteStock, enrichStock, subscribeSystemStream, Stock, StockGroup, fetchGroups, ChartData, TradeHistory, StockNote, AnalysisResult, updateStock, fetchPrompts, fetchStockPriceHistory, GeminiPrompt, openFile, generateText, updateTradeNote, pickFile, AlertCondition, triggerVisualAnalysis, deleteAnalysisResult, StockNews, fetchStockNews, refreshFinancials, StockFinancials, fetchStockFinancials, summarizeNews } from '@/lib/api';
 import { addResearchTicker } from '@/lib/research-storage';
 import { SIGNAL_LABELS } from '@/lib/signals';
 import { StockChart } from '@/components/StockChart';
@@ -75,6 +75,33 @@ export default function StockDetailPage() {
         }
     }, [symbol]);
 
+    // New / auto-registered symbol: reload once the background enrichment is done
+    useEffect(() => {
+        if (!symbol || !stock?.enrichment_status) return;
+        return subscribeSystemStream(() => {}, (event, data) => {
+            if (data?.symbol !== symbol) return;
+            if (event === 'enrichment.ready') {
+                loadData(symbol);
+            } else if (event === 'enrichment.failed') {
+                if (data.removed) {
+                    setToastMsg(`${symbol}: 銘柄が見つかりません`);
+                    setStock(prev => prev ? { ...prev, enrichment_status: 'failed' } : null);
+                } else {
+                    loadData(symbol);
+                }
+            }
+        });
+    }, [symbol, stock?.enrichment_status]);
+
+    async function handleRetryEnrichment() {
+        try {
+            await enrichStock(symbol);
+            setStock(prev => prev ? { ...prev, enrichment_status: 'pending' } : null);
+        } catch (e) {
+            setToastMsg("再取得に失敗しました: " + e);
+        }
+    }
+
     async function loadData(sym: string) {
         setLoading(true);
         try {
@@ -401,6 +428,13 @@ export default function StockDetailPage() {
                     <h1 className="text-2xl font-bold">
                         {stock.symbol}
                         {stock.is_hidden && <span className="text-red-500 text-lg ml-2">(非表示)</span>}
+                        {stock.enrichment_status === 'pending' && <span className="text-yellow-400 text-sm ml-2 animate-pulse">データ取得中…</span>}
+                        {stock.enrichment_status === 'failed' && (
+                            <span className="text-red-400 text-sm ml-2">
+                                取得失敗
+                                <button onClick={handleRetryEnrichment} className="ml-2 px-2 py-0.5 text-xs rounded bg-gray-700 hover:bg-gray-600 text-white">再試行</button>
+                            </span>
+                        )}
                         <span className="text-lg font-normal text-gray-400 ml-2">{stock.company_name}</span>
                         {/* Buy Mark Toggle */}
                         <button
@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState, useMemo, useRef } from 'react';
-import { fetchStocks, Stock, triggerImport, createStock, pickFile, updateStock, openAnalysisFolder, fetchStockPriceHistory, generateText, saveStockNote, fetchPrompts, GeminiPrompt } from '@/lib/api';
+import { fetchStockChanges, applyStockChanges, subscribeSystemStream, Stock, triggerImport, createStock, pickFile, updateStock, openAnalysisFolder, fetchStockPriceHistory, generateText, saveStockNote, fetchPrompts, GeminiPrompt } from '@/lib/api';
 import { addResearchTicker } from '@/lib/research-storage';
 import Toast from '@/components/Toast';
 import Link from 'next/link';
@@ -58,6 +58,7 @@ export default function Dashboard({ showHiddenOnly = false }: DashboardProps) {
         { key: 'sector', label: t('sector') || 'セクター', width: 120, sortable: true }, { key: 'industry', label: t('industry') || '業界' },
         { key: 'composite_rating', label: 'CR' },
         { key: 'rs_rating', label: 'RS' },
+        { key: 'rs_rank', label: 'RS順位' },
         { key: 'note', label: t('note') || 'メモ', width: 200 },
         { key: 'note_multiline', label: 'メモ(複数行)', width: 600 },
         { key: 'latest_analysis', label: t('analysis') || 'AI分析', width: 100 },
@@ -324,15 +325,22 @@ export default function Dashboard({ showHiddenOnly = false }: DashboardProps) {
             localStorage.setItem('dashboardColumnFilters', JSON.stringify(columnFilters));
         }
     }, [columnFilters, areSettingsLoaded]);
+    // Watermark of the last /stocks/changes call, per tab + hidden scope
+    const syncRef = useRef<{ scope: string; watermark: string | null }>({ scope: '', watermark: null });
+
     async function loadStocks(silent: boolean = false) {
         if (!silent) setLoading(true);
         const targetTab = activeTab; // Capture fetch scope
+        const scope = `${targetTab}:${showHiddenOnly}`;
+        // Silent refreshes (focus, polling) only transfer rows changed since the last sync
+        const since = silent && syncRef.current.scope === scope ? syncRef.current.watermark : null;
         try {
-            const data = await fetchStocks(0, 2000, targetTab, showHiddenOnly); // Pass showHiddenOnly
+            const changes = await fetchStockChanges(since, targetTab, showHiddenOnly); // Pass showHiddenOnly
 
             // Guard: Only update if we are still on the same tab
             if (activeTabRef.current === targetTab) {
-                setStocks(data);
+                setStocks(prev => applyStockChanges(prev, changes));
+                syncRef.current = { scope, watermark: changes.watermark };
             }
         } catch (e) {
             console.error(e);
@@ -545,7 +553,7 @@ export default function Dashboard({ showHiddenOnly = false }: DashboardProps) {
 
                 if (key.includes('percentage') || key.includes('deviation_')) {
                     type = 'percentage';
-                } else if (['current_price', 'market_cap', 'realized_pl', 'composite_rating', 'rs_rating', 'slope_5ma', 'slope_20ma', 'slope_50ma', 'slope_200ma'].includes(key)) {
+                } else if (['current_price', 'market_cap', 'realized_pl', 'composite_rating', 'rs_rating', 'rs_rank', 'slope_5ma', 'slope_20ma', 'slope_50ma', 'slope_200ma'].includes(key)) {
                     type = 'number';
                 } else if (key.includes('date') || key.includes('updated_at')) {
                     type = 'date';
@@ -932,6 +940,10 @@ Market Cap: ${stock.market_cap}
                             {stock.signal_base_formation === 1 && (
                                 <span title="Base Formation (Tight Area)" className="cursor-help">🧱</span>
                             )}
+                            {/* Enrichment failed: info/metrics missing until a retry or the next update */}
+                            {stock.enrichment_status === 'failed' && (
+                                <span title="データ取得失敗 (詳細画面から再試行)" className="px-1 text-[10px] rounded bg-red-900 text-red-300 border border-red-700 cursor-help">取得失敗</span>
+                            )}
                             <a
                                 href={`https://research.investors.com/ibdchartsenlarged.aspx?symbol=${stock.symbol}`}
                                 target="_blank"
@@ -1098,6 +1110,7 @@ Market Cap: ${stock.market_cap}
                 return <span className={getRatingColor(Number(crVal))}>{crVal || '-'}</span>;
 
             case 'rs_rating':
+            case 'rs_rank':
                 const rsVal = stock[key as keyof Stock];
                 return <span className={getRatingColor(Number(rsVal))}>{rsVal || '-'}</span>;
 
@@ -1228,6 +1241,16 @@ Market Cap: ${stock.market_cap}
         return () => window.removeEventListener('focus', handleFocus);
     }, [activeTab, sortConfig, currentPage, searchQuery, filterMode, appliedQuery]);
 
+    // Newly added symbols are enriched in the background: pull their rows when ready
+    useEffect(() => {
+        return subscribeSystemStream(
+            () => { },
+            (event) => {
+                if (event === 'enrichment.ready' || event === 'enrichment.failed') loadStocks(true);
+            }
+        );
+    }, [activeTab, showHiddenOnly]);
+
     // Derived Activity State
     const isBackgroundActive = loading || importStatus === 'loading' || (batchProgress && batchProgress.status === 'running') || false;
     const [isMenuOpen, setIsMenuOpen] = useState(false);
@@ -1567,7 +1590,7 @@ Market Cap: ${stock.market_cap}
                                 <tr>
                                     {visibleColumns.map(colKey => {
                                         const def = INITIAL_COLUMNS.find(c => c.key === colKey);
-                                        const isNumeric = ['current_price', 'market_cap', 'volume', 'realized_pl', 'composite_rating', 'rs_rating'].includes(colKey) || colKey.includes('percentage') || colKey.includes('deviation_') || colKey === 'volume_increase_pct';
+                                        const isNumeric = ['current_price', 'market_cap', 'volume', 'realized_pl', 'composite_rating', 'rs_rating', 'rs_rank'].includes(colKey) || colKey.includes('percentage') || colKey.includes('deviation_') || colKey === 'volume_increase_pct';
                                         return (
                                             <th key={colKey} className="px-4 py-3 whitespace-nowrap group" style={{ minWidth: def?.width, width: def?.width }}>
                                                 <div className={`flex flex-col gap-1 ${isNumeric ? 'items-end' : ''}`}>
@@ -1,22 +1,37 @@
 import { useState, useEffect } from 'react';
-import { fetchSystemStatus, triggerSystemUpdate, SystemStatus } from '@/lib/api';
+import { fetchSystemStatus, subscribeSystemStream, triggerSystemUpdate, SystemStatus } from '@/lib/api';
 
 export default function SystemStatusBanner() {
     const [status, setStatus] = useState<SystemStatus | null>(null);
 
     useEffect(() => {
-        const interval = setInterval(async () => {
-            try {
-                const data = await fetchSystemStatus();
-                // Only show if running or waiting retry, or JUST completed (show for a bit?)
-                // Requirement: "Show status during update", "Show completion message when done".
-                setStatus(data);
-            } catch (e) {
-                console.error("Status fetch error", e);
-            }
-        }, 5000); // Poll every 5s
-
-        return () => clearInterval(interval);
+        let interval: ReturnType<typeof setInterval> | null = null;
+
+        // Fallback when the stream is unavailable (e.g. a proxy that buffers SSE)
+        const startPolling = () => {
+            if (interval) return;
+            interval = setInterval(async () => {
+                try {
+                    const data = await fetchSystemStatus();
+                    setStatus(data);
+                } catch (e) {
+                    console.error("Status fetch error", e);
+                }
+            }, 5000); // Poll every 5s
+        };
+
+        const unsubscribe = subscribeSystemStream(
+            (source, state) => {
+                if (source === 'update') setStatus(state);
+            },
+            undefined,
+            () => startPolling()
+        );
+
+        return () => {
+            unsubscribe();
+            if (interval) clearInterval(interval);
+        };
     }, []);
 
     if (!status) return null;
@@ -80,6 +95,11 @@ export default function SystemStatusBanner() {
                     <span className="opacity-80">
                         {status.progress} / {status.total}
                     </span>
+                    {status.throughput && status.throughput.symbols_per_sec > 0 && (
+                        <span className="text-gray-400 hidden xl:inline">
+                            {status.throughput.symbols_per_sec.toFixed(1)} 銘柄/秒
+                        </span>
+                    )}
                     <div className="w-20 bg-gray-700 rounded-full h-1.5 overflow-hidden">
                         <div
                             className="bg-blue-400 h-full rounded-full transition-all duration-500"
@@ -12,6 +12,7 @@ export interface Stock {
   holding_quantity: number;
   trade_count: number;
   is_hidden?: boolean;
+  enrichment_status?: 'pending' | 'failed' | null; // background enrichment of newly added symbols
   last_buy_date?: string;
   last_sell_date?: string;
   realized_pl?: number;
@@ -76,6 +77,8 @@ export interface Stock {
   latest_analysis?: string;
   composite_rating?: number;
   rs_rating?: number;
+  rs_rank?: number; // Computed universe-wide RS percentile (1-99)
+  rs_score?: number;
   ibd_rating_date?: string;
   first_import_date?: string;
   analysis_file_path?: string;
@@ -158,6 +161,32 @@ export async function fetchGroupMembers(groupId: number): Promise<Stock[]> {
   return res.json();
 }
 
+export interface PeriodAverage {
+  average: number | null;   // equal-weighted over members
+  weighted: number | null;  // weighted by holding value (null when nothing is held)
+}
+
+export interface GroupSummary {
+  group_id: number;
+  name: string;
+  group_type: string;
+  member_count: number;
+  held_count: number;
+  total_value: number;
+  members: { symbol: string; company_name: string | null; quantity: number | null; value: number | null; weight: number | null }[];
+  changes: Record<'1d' | '5d' | '20d' | '50d' | '200d', PeriodAverage>;
+  relative_strength: Record<'5d' | '20d' | '50d' | '200d', PeriodAverage>; // vs ^GSPC
+  rs_rank_average: number | null;
+  signals: Record<string, number>;
+  computed_at: string;
+}
+
+export async function fetchGroupSummary(groupId: number): Promise<GroupSummary> {
+  const res = await fetch(`${API_URL}/groups/${groupId}/summary`);
+  if (!res.ok) throw new Error('Failed to fetch group summary');
+  return res.json();
+}
+
 export async function addGroupMember(groupId: number, symbol: string): Promise<StockGroupMember> {
   const res = await fetch(`${API_URL}/groups/${groupId}/members?symbol=${symbol}&group_id=${groupId}`, {
     method: 'POST'
@@ -294,6 +323,38 @@ export const fetchHistoryAnalytics = async (): Promise<HistoryAnalytics> => {
   return res.json();
 };
 
+// Columnar daily series: every array is aligned with `dates`
+export interface EquityCurve {
+  dates: string[];
+  equity: number[];
+  drawdown: number[];
+  market_value: number[];
+  cost_basis: number[];
+  realized_pl: number[];
+  unrealized_pl: number[];
+  exposure: { sectors: string[]; values: number[][] };
+  summary: {
+    days: number;
+    total_pl: number;
+    realized_pl: number;
+    unrealized_pl: number;
+    market_value: number;
+    max_drawdown: number;
+    max_drawdown_peak: string | null;
+    max_drawdown_trough: string | null;
+  };
+  build: { mode: 'full' | 'incremental' | 'cached'; days_computed?: number; ms: number };
+}
+
+export const fetchEquityCurve = async (): Promise<EquityCurve> => {
+  const res = await fetch(`${API_URL}/history/equity-curve`);
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    throw new Error(err.detail || 'Failed to fetch equity curve');
+  }
+  return res.json();
+};
+
 export interface StockNote {
   symbol: string;
   content: string;
@@ -391,6 +452,36 @@ export async function fetchStocks(offset = 0, limit = 2000, asset_type: string =
   return res.json();
 }
 
+export interface StockChanges {
+  full: boolean; // true: `changed` is the whole list (no/expired watermark)
+  watermark: string | null;
+  changed: Stock[];
+  removed: { symbol: string; reason: 'deleted' | 'hidden' | 'visible' }[];
+}
+
+// Delta sync: rows changed since `since` (a watermark from a previous call), or the full list when null.
+export async function fetchStockChanges(since: string | null, asset_type: string = "stock", show_hidden_only: boolean = false, lite: boolean = false): Promise<StockChanges> {
+  const sinceParam = since ? `&since=${encodeURIComponent(since)}` : '';
+  const res = await fetch(`${API_URL}/stocks/changes?asset_type=${asset_type}&show_hidden_only=${show_hidden_only}&lite=${lite}${sinceParam}`);
+  if (!res.ok) throw new Error('Failed to fetch stock changes');
+  return res.json();
+}
+
+export function applyStockChanges(prev: Stock[], changes: StockChanges): Stock[] {
+  if (changes.full) return changes.changed;
+  if (changes.changed.length === 0 && changes.removed.length === 0) return prev;
+  const removed = new Set(changes.removed.map(r => r.symbol));
+  const changed = new Map(changes.changed.map(s => [s.symbol, s]));
+  const next = prev
+    .filter(s => !removed.has(s.symbol))
+    .map(s => {
+      const updated = changed.get(s.symbol);
+      if (updated) changed.delete(s.symbol);
+      return updated ?? s;
+    });
+  return next.concat(Array.from(changed.values()));
+}
+
 export async function createStock(symbol: string, asset_type: string): Promise<Stock> {
   const res = await fetch(`${API_URL}/stocks/`, {
     method: 'POST',
@@ -410,6 +501,14 @@ export async function fetchStockDetail(symbol: string): Promise<Stock> {
   return res.json();
 }
 
+export async function enrichStock(symbol: string): Promise<{ symbol: string; status: string; queued: boolean }> {
+  const res = await fetch(`${API_URL}/stocks/${symbol}/enrich`, {
+    method: 'POST',
+  });
+  if (!res.ok) throw new Error('Failed to start enrichment');
+  return res.json();
+}
+
 export async function deleteStock(symbol: string): Promise<void> {
   const res = await fetch(`${API_URL}/stocks/${symbol}`, {
     method: 'DELETE',
@@ -417,6 +516,33 @@ export async function deleteStock(symbol: string): Promise<void> {
   if (!res.ok) throw new Error('Failed to delete stock');
 }
 
+export interface BulkSymbolsResult {
+  status: string;
+  requested: number;
+  changed?: number;          // hide/unhide: rows whose state changed
+  not_found?: string[];      // hide/unhide
+  deleted?: string[];        // delete: symbols that had a Stock row
+  rows?: Record<string, number>; // delete: rows removed per table
+  cache_files?: number;
+}
+
+const bulkSymbols = async (action: 'hide' | 'unhide' | 'delete', symbols: string[]): Promise<BulkSymbolsResult> => {
+  const res = await fetch(`${API_URL}/stocks/bulk/${action}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ symbols }),
+  });
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    throw new Error(err.detail || `Failed to ${action} stocks`);
+  }
+  return res.json();
+};
+
+export const bulkHideStocks = (symbols: string[]) => bulkSymbols('hide', symbols);
+export const bulkUnhideStocks = (symbols: string[]) => bulkSymbols('unhide', symbols);
+export const bulkDeleteStocks = (symbols: string[]) => bulkSymbols('delete', symbols);
+
 export async function fetchStockHistory(symbol: string): Promise<TradeHistory[]> {
   const res = await fetch(`${API_URL}/stocks/${symbol}/history`);
   if (!res.ok) throw new Error('Failed to fetch history');
@@ -498,6 +624,82 @@ export async function updateFilter(id: number, name: string, criteria_json: stri
   return res.json();
 }
 
+// Heatmap (/analytics/heatmap): sector -> industry aggregates, leaves as compact arrays
+export interface HeatmapAggregate {
+  name: string;
+  count: number;
+  market_cap: number;
+  change_1d: number | null;
+  change_5d: number | null;
+  change_20d: number | null;
+  advancers: number;
+  decliners: number;
+  breadth_pct: number | null;
+  signals: Record<string, number>;
+}
+
+// [symbol, company_name, market_cap, change_1d, change_5d, change_20d, held]
+export type HeatmapLeaf = [string, string, number, number | null, number | null, number | null, boolean];
+
+export interface HeatmapIndustry extends HeatmapAggregate {
+  leaves?: HeatmapLeaf[];
+}
+
+export interface HeatmapSector extends HeatmapAggregate {
+  industries: HeatmapIndustry[];
+}
+
+export interface HeatmapData {
+  total: HeatmapAggregate;
+  sectors: HeatmapSector[];
+  leaf_columns: string[] | null;
+}
+
+export async function fetchHeatmap(maxCap: number | null = null, asset_type: string = "stock"): Promise<HeatmapData> {
+  const capParam = maxCap ? `&max_cap=${maxCap}` : '';
+  const res = await fetch(`${API_URL}/analytics/heatmap?asset_type=${asset_type}${capParam}`);
+  if (!res.ok) throw new Error('Failed to fetch heatmap');
+  return res.json();
+}
+
+// Server-side screen (/screen): returns matching symbols one keyset page at a time
+export interface ScreenResult {
+  symbols: string[];
+  next_cursor: string | null;
+  ignored: string[];
+  rows?: Stock[];
+  filter?: { id: number; name: string };
+}
+
+export interface ScreenOptions {
+  sort?: string;
+  order?: 'asc' | 'desc';
+  limit?: number;
+  cursor?: string | null;
+  asset_type?: string;
+  include_rows?: boolean;
+}
+
+export async function runScreen(criteria: Record<string, any>, options: ScreenOptions = {}): Promise<ScreenResult> {
+  const res = await fetch(`${API_URL}/screen/`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ criteria, ...options })
+  });
+  if (!res.ok) throw new Error('Failed to run screen');
+  return res.json();
+}
+
+export async function runSavedFilter(id: number, options: ScreenOptions = {}): Promise<ScreenResult> {
+  const params = new URLSearchParams();
+  Object.entries(options).forEach(([k, v]) => {
+    if (v !== undefined && v !== null) params.set(k, String(v));
+  });
+  const res = await fetch(`${API_URL}/screen/${id}?${params.toString()}`);
+  if (!res.ok) throw new Error('Failed to run saved filter');
+  return res.json();
+}
+
 // System
 export interface SystemStatus {
   status: 'idle' | 'running' | 'waiting_retry' | 'completed' | 'error';
@@ -505,6 +707,11 @@ export interface SystemStatus {
   progress: number;
   total: number;
   last_completed: string | null;
+  throughput?: {
+    elapsed_seconds: number;
+    symbols_per_sec: number;
+    stages: Record<string, { avg_ms: number; symbols_per_sec: number | null }>;
+  };
 }
 
 export async function fetchSystemStatus(): Promise<SystemStatus> {
@@ -512,6 +719,32 @@ export async function fetchSystemStatus(): Promise<SystemStatus> {
   return res.json();
 }
 
+// Push-based progress (/system/stream). Returns an unsubscribe function.
+// onProgress receives the latest state of a source ("update" | "automation") when it changes;
+// onEvent receives discrete events such as "update.symbol_error" or "update.completed".
+export function subscribeSystemStream(
+  onProgress: (source: string, state: any) => void,
+  onEvent?: (event: string, data: any) => void,
+  onError?: () => void
+): () => void {
+  const source = new EventSource(`${API_URL}/system/stream`);
+  source.addEventListener('progress', (e) => {
+    const payload = JSON.parse((e as MessageEvent).data);
+    onProgress(payload.source, payload.state);
+  });
+  if (onEvent) {
+    for (const name of ['update.started', 'update.symbol_error', 'update.completed', 'update.stopped', 'update.failed',
+                        'automation.log', 'automation.completed', 'automation.stopped',
+                        'enrichment.queued', 'enrichment.ready', 'enrichment.failed']) {
+      source.addEventListener(name, (e) => onEvent(name, JSON.parse((e as MessageEvent).data)));
+    }
+  }
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED && onError) onError();
+  };
+  return () => source.close();
+}
+
 export async function triggerSystemUpdate(): Promise<{ status: string }> {
   const res = await fetch(`${API_URL}/system/update/start`, {
     method: 'POST',
@@ -520,6 +753,35 @@ export async function triggerSystemUpdate(): Promise<{ status: string }> {
   return res.json();
 }
 
+// Negative cache of tickers the data provider could not resolve
+export interface FailedTicker {
+  symbol: string;
+  reason: string; // "unknown_symbol" | "no_data"
+  detail: string | null;
+  failure_count: number;
+  first_failed_at: string;
+  last_failed_at: string;
+  expires_at: string;
+  active: boolean;
+}
+
+export async function fetchFailedTickers(): Promise<{ stats: { entries: number; active: number; active_by_reason: Record<string, number> }; entries: FailedTicker[] }> {
+  const res = await fetch(`${API_URL}/system/failed-tickers`);
+  if (!res.ok) throw new Error('Failed to fetch failed tickers');
+  return res.json();
+}
+
+export async function clearFailedTicker(symbol: string): Promise<void> {
+  const res = await fetch(`${API_URL}/system/failed-tickers/${encodeURIComponent(symbol)}`, { method: 'DELETE' });
+  if (!res.ok) throw new Error('Failed to clear failed ticker');
+}
+
+export async function clearFailedTickers(expiredOnly = false): Promise<{ count: number }> {
+  const res = await fetch(`${API_URL}/system/failed-tickers?expired_only=${expiredOnly}`, { method: 'DELETE' });
+  if (!res.ok) throw new Error('Failed to clear failed tickers');
+  return res.json();
+}
+
 export interface GeminiPrompt {
   id: number;
   name: string;
@@ -0,0 +1,90 @@
+import os
+import re
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class FrameCache:
+    """
+    銘柄ごとのDataFrameを保持するメモリ上限付きLRUキャッシュ
+    - max_bytes を超えたら最も古く使われた銘柄から追い出す
+    - spill_dir を指定すると追い出したデータをParquetに書き出し、次回アクセス時に読み戻す
+      (Parquetの読み書きには pyarrow が必要。無い場合は追い出したデータを破棄する)
+
+    dictと同じように `symbol in cache`, `cache[symbol]`, `cache.keys()` で使える。
+    """
+    def __init__(self, max_bytes=None, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._frames = OrderedDict()  # symbol -> DataFrame (古い順)
+        self._sizes = {}
+        self._spilled = set()
+        self.total_bytes = 0
+        self.hits = 0
+        self.spill_loads = 0
+        self.evictions = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, symbol):
+        safe = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.spill_dir, f"{safe}.parquet")
+
+    def __contains__(self, symbol):
+        return symbol in self._frames or symbol in self._spilled
+
+    def __len__(self):
+        return len(self._frames) + len(self._spilled)
+
+    def keys(self):
+        return list(self._frames.keys()) + [s for s in self._spilled if s not in self._frames]
+
+    def __getitem__(self, symbol):
+        if symbol in self._frames:
+            self._frames.move_to_end(symbol)
+            self.hits += 1
+            return self._frames[symbol]
+        if symbol in self._spilled:
+            data = pd.read_parquet(self._spill_path(symbol))
+            self.spill_loads += 1
+            self[symbol] = data
+            return data
+        raise KeyError(symbol)
+
+    def __setitem__(self, symbol, data):
+        if symbol in self._frames:
+            self.total_bytes -= self._sizes.pop(symbol)
+            del self._frames[symbol]
+        self._spilled.discard(symbol)
+        size = int(data.memory_usage(deep=True).sum())
+        self._frames[symbol] = data
+        self._sizes[symbol] = size
+        self.total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        # 直近に追加した1銘柄は上限を超えていても残す
+        while self.total_bytes > self.max_bytes and len(self._frames) > 1:
+            symbol, data = self._frames.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(symbol)
+            self.evictions += 1
+            if self.spill_dir:
+                try:
+                    data.to_parquet(self._spill_path(symbol))
+                    self._spilled.add(symbol)
+                except Exception as e:
+                    print(f"Error spilling {symbol} to parquet: {e}")
+
+    def get_stats(self):
+        return {
+            "in_memory": len(self._frames),
+            "spilled": len(self._spilled),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "spill_loads": self.spill_loads,
+            "evictions": self.evictions,
+        }
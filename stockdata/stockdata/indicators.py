@@ -0,0 +1,21 @@
+import pandas as pd
+
+# 移動平均の定義: (出力列, 入力列, 期間)
+# investment_app の PRICE_INDICATORS と同じ列名・同じ計算
+MOVING_AVERAGES = [
+    ('Close_MA5', 'Close', 5),
+    ('Close_MA20', 'Close', 20),
+    ('Close_MA50', 'Close', 50),
+    ('Close_MA200', 'Close', 200),
+    ('Volume_MA50', 'Volume', 50),
+    ('Volume_MA200', 'Volume', 200),
+]
+
+
+def add_moving_averages(data: pd.DataFrame) -> pd.DataFrame:
+    """MOVING_AVERAGES の列を追加し、2桁に丸めて欠損値を0で埋める"""
+    for name, source, window in MOVING_AVERAGES:
+        data[name] = data[source].rolling(window=window).mean()
+    data = data.round(2)
+    data.fillna(0, inplace=True)
+    return data
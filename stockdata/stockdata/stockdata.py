@@ -1,10 +1,22 @@
 from datetime import date, timedelta, datetime
+import numpy as np
 import yfinance as yf
 import pandas as pd
+try:
+    from .frame_cache import FrameCache
+    from .indicators import add_moving_averages
+except ImportError:
+    from frame_cache import FrameCache
+    from indicators import add_moving_averages
+
+# data_dict に保持するDataFrameのメモリ上限 (MB)
+DEFAULT_CACHE_MB = 512
 
 class StockData:
-    def __init__(self, start_date=None):
-        self.data_dict = {}
+    def __init__(self, start_date=None, max_cache_mb=DEFAULT_CACHE_MB, spill_dir=None):
+        # 銘柄ごとのデータ。上限を超えたら古いものから追い出す (spill_dir指定時はParquetへ退避)
+        max_bytes = None if max_cache_mb is None else int(max_cache_mb * 1024 * 1024)
+        self.data_dict = FrameCache(max_bytes=max_bytes, spill_dir=spill_dir)
         self.info_dict = {}
         if start_date is None:
             today = date.today()
@@ -36,6 +48,12 @@ class StockData:
         ラッセル・インデックスの構成銘柄入れ替え日に伴う出来高を前日の値に修正する
         - 毎年6月の最終金曜日
         - 2026年以降、毎年11月の第2金曜日
+
+        日付の照合はタイムゾーンを外し、時刻を切り捨てた暦日で行う。
+        - 0時の日足 (tz無し・tz付き): 従来のループと同じ行を修正する
+        - 時刻付きの日足 (例: 16:00): 従来はget_locがスライスを返して例外となり修正されなかったが、
+          暦日が一致すれば修正する
+        - 1日に複数行ある分足・時間足: 従来どおり修正しない
         """
         if data.empty:
             return data
@@ -53,23 +71,24 @@ class StockData:
                 dates_to_adjust.append(self._find_nth_friday(year, 11, 2))
         
         # DataFrameのインデックス（Timestamp型）と一致させる
-        dates_to_adjust_ts = dates_to_adjust
-        
-        volume_index = data.columns.get_loc('Volume')
-        for trade_date in dates_to_adjust_ts:
-            # 調整対象日がデータに含まれているか確認
-            if trade_date in data.index:
-                try:
-                    loc = data.index.get_loc(trade_date)
-                    if loc > 0:
-                        # 前営業日の出来高を取得
-                        prev_day_volume = data.iloc[loc - 1]['Volume']
-                        #print(trade_date, data.iloc[loc]['Volume'], " -> ", prev_day_volume)
-                        # 当該日の出来高を前日の値で上書き
-                        data.iloc[loc, volume_index] = prev_day_volume
-                except Exception as e:
-                    print(f"Error getting info for {trade_date}: {e}")
-                    continue
+        dates_to_adjust_ts = pd.DatetimeIndex([pd.Timestamp(d) for d in dates_to_adjust])
+
+        index = data.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        # 調整対象日の位置をまとめて求め、先頭行（前日が無い）は除く
+        days = index.normalize()
+        if not days.is_unique:
+            return data
+        positions = np.flatnonzero(days.isin(dates_to_adjust_ts))
+        positions = positions[positions > 0]
+        if len(positions) == 0:
+            return data
+
+        # 当該日の出来高を前営業日の値で上書き
+        volume = data['Volume'].to_numpy(copy=True)
+        volume[positions] = volume[positions - 1]
+        data['Volume'] = volume
         return data
 
     def get_stock_info(self, symbol):
@@ -122,18 +141,8 @@ class StockData:
         return data
 
     def _normalize_stock_data(self, data):
-        data['Close_MA5'] = data['Close'].rolling(window=5).mean()
-        data['Close_MA20'] = data['Close'].rolling(window=20).mean()
-        data['Close_MA50'] = data['Close'].rolling(window=50).mean()
-        data['Close_MA200'] = data['Close'].rolling(window=200).mean()
-        data['Volume_MA50'] = data['Volume'].rolling(window=50).mean()
-        data['Volume_MA200'] = data['Volume'].rolling(window=200).mean()
-
-        # 上記のdataの列について、四捨五入した値を再設定
-        data = data.round(2)
-
-        data.fillna(0, inplace=True)
-        return data
+        # 移動平均 (indicators.MOVING_AVERAGES) を計算し、四捨五入・欠損値を0埋め
+        return add_moving_averages(data)
 
     def get_symbol_list(self):
         return list(self.data_dict.keys())
@@ -1,11 +1,23 @@
 from datetime import date, timedelta, datetime
+import numpy as np
 import yfinance as yf
 import pandas as pd
+try:
+    from .frame_cache import FrameCache
+    from .indicators import add_moving_averages
+except ImportError:
+    from frame_cache import FrameCache
+    from indicators import add_moving_averages
+
+# data_dict に保持するDataFrameのメモリ上限 (MB)
+DEFAULT_CACHE_MB = 512
 
 class StockData:
-    def __init__(self, start_date=None):
+    def __init__(self, start_date=None, max_cache_mb=DEFAULT_CACHE_MB, spill_dir=None):
         """コンストラクタ"""
-        self.data_dict = {}
+        # 銘柄ごとのデータ。上限を超えたら古いものから追い出す (spill_dir指定時はParquetへ退避)
+        max_bytes = None if max_cache_mb is None else int(max_cache_mb * 1024 * 1024)
+        self.data_dict = FrameCache(max_bytes=max_bytes, spill_dir=spill_dir)
         self.info_dict = {}
         if start_date is None:
             today = date.today()
@@ -38,6 +50,14 @@ class StockData:
         ラッセル・インデックスの構成銘柄入れ替え日に伴う出来高を前日の値に修正する
         - 毎年6月の最終金曜日
         - 2026年以降、毎年11月の第2金曜日
+
+        日付の照合はタイムゾーンを外し、時刻を切り捨てた暦日で行う。
+        - 0時の日足 (tz無し): 従来のループと同じ行を修正する
+        - 0時の日足 (tz付き): 従来はtz無しのTimestampで照合していたため一致せず修正されなかったが、
+          暦日が一致すれば修正する (stockdata.py と同じ結果)
+        - 時刻付きの日足 (例: 16:00): 従来はget_locがスライスを返して例外となり修正されなかったが、
+          暦日が一致すれば修正する
+        - 1日に複数行ある分足・時間足: 従来どおり修正しない
         """
         if data.empty:
             return data
@@ -55,20 +75,24 @@ class StockData:
                 dates_to_adjust.append(self._find_nth_friday(year, 11, 2))
         
         # DataFrameのインデックス（Timestamp型）と一致させる
-        dates_to_adjust_ts = [pd.Timestamp(d) for d in dates_to_adjust]
-        
-        for trade_date in dates_to_adjust_ts:
-            # 調整対象日がデータに含まれているか確認
-            if trade_date in data.index:
-                try:
-                    loc = data.index.get_loc(trade_date)
-                    if loc > 0:
-                        # 前営業日の出来高を取得
-                        prev_day_volume = data.iloc[loc - 1]['Volume']
-                        # 当該日の出来高を前日の値で上書き
-                        data.loc[trade_date, 'Volume'] = prev_day_volume
-                except KeyError:
-                    continue
+        dates_to_adjust_ts = pd.DatetimeIndex([pd.Timestamp(d) for d in dates_to_adjust])
+
+        index = data.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        # 調整対象日の位置をまとめて求め、先頭行（前日が無い）は除く
+        days = index.normalize()
+        if not days.is_unique:
+            return data
+        positions = np.flatnonzero(days.isin(dates_to_adjust_ts))
+        positions = positions[positions > 0]
+        if len(positions) == 0:
+            return data
+
+        # 当該日の出来高を前営業日の値で上書き
+        volume = data['Volume'].to_numpy(copy=True)
+        volume[positions] = volume[positions - 1]
+        data['Volume'] = volume
         return data
 
     def get_stock_info(self, symbol):
@@ -99,17 +123,8 @@ class StockData:
             # ★★★ 出来高の調整処理を呼び出す ★★★
             data = self._adjust_rebalance_volume(data)
 
-            # 各種移動平均を計算
-            data['Close_MA5'] = data['Close'].rolling(window=5).mean()
-            data['Close_MA20'] = data['Close'].rolling(window=20).mean()
-            data['Close_MA50'] = data['Close'].rolling(window=50).mean()
-            data['Close_MA200'] = data['Close'].rolling(window=200).mean()
-            data['Volume_MA50'] = data['Volume'].rolling(window=50).mean()
-            data['Volume_MA200'] = data['Volume'].rolling(window=200).mean()
-
-            # データを四捨五入し、欠損値を0で埋める
-            data = data.round(2)
-            data.fillna(0, inplace=True)
+            # 各種移動平均を計算し、四捨五入・欠損値を0埋め (indicators.MOVING_AVERAGES)
+            data = add_moving_averages(data)
 
             self.data_dict[symbol] = data
 
@@ -0,0 +1,56 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Run from stockdata
+sys.path.append(os.getcwd())
+try:
+    from stockdata.frame_cache import FrameCache
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'stockdata'))
+    from stockdata.frame_cache import FrameCache
+
+
+def _frame(n=100, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"Close": rng.random(n), "Volume": rng.integers(0, 1000, n)},
+                        index=pd.bdate_range("2024-01-01", periods=n))
+
+
+def test_lru_eviction_without_spill():
+    size = int(_frame().memory_usage(deep=True).sum())
+    cache = FrameCache(max_bytes=size * 2)
+    cache["AAA"] = _frame(seed=1)
+    cache["BBB"] = _frame(seed=2)
+    cache["AAA"]  # AAA is now the most recently used
+    cache["CCC"] = _frame(seed=3)
+
+    assert "BBB" not in cache and "AAA" in cache and "CCC" in cache
+    assert cache.total_bytes == size * 2
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 1 and stats["spilled"] == 0
+
+    # A frame larger than the bound is kept on its own
+    cache["BIG"] = _frame(n=1000)
+    assert cache.keys() == ["BIG"]
+
+
+def test_spill_to_parquet_and_reload(tmp_path):
+    size = int(_frame().memory_usage(deep=True).sum())
+    cache = FrameCache(max_bytes=size, spill_dir=str(tmp_path))
+    original = {sym: _frame(seed=i) for i, sym in enumerate(["AAA", "BRK/B"])}
+    for sym, df in original.items():
+        cache[sym] = df
+
+    # AAA spilled to disk, still listed
+    assert os.path.exists(tmp_path / "AAA.parquet")
+    assert "AAA" in cache and len(cache) == 2 and sorted(cache.keys()) == ["AAA", "BRK/B"]
+    assert cache.get_stats()["spilled"] == 1
+
+    # Reading it back loads the Parquet file and spills the other symbol
+    pd.testing.assert_frame_equal(cache["AAA"], original["AAA"], check_freq=False)
+    assert os.path.exists(tmp_path / "BRK_B.parquet")
+    pd.testing.assert_frame_equal(cache["BRK/B"], original["BRK/B"], check_freq=False)
+    stats = cache.get_stats()
+    assert stats["spill_loads"] == 2 and stats["in_memory"] == 1 and stats["evictions"] == 3
@@ -0,0 +1,71 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# Run from stockdata
+sys.path.append(os.getcwd())
+try:
+    from stockdata.stockdata import StockData
+    from stockdata.stockdata_new import StockData as StockDataNew
+except ImportError:
+    sys.path.append(os.path.join(os.getcwd(), 'stockdata'))
+    from stockdata.stockdata import StockData
+    from stockdata.stockdata_new import StockData as StockDataNew
+
+
+def _loop_adjust(sd, data, timestamps=False):
+    """
+    The per-date loop _adjust_rebalance_volume replaced. stockdata.py looked the
+    dates up as strings, stockdata_new.py as tz-naive Timestamps.
+    """
+    dates = []
+    for year in range(data.index.min().year, data.index.max().year + 1):
+        dates.append(sd._find_last_friday(year, 6))
+        if year >= 2026:
+            dates.append(sd._find_nth_friday(year, 11, 2))
+    volume_index = data.columns.get_loc('Volume')
+    for trade_date in [pd.Timestamp(d) for d in dates] if timestamps else dates:
+        if trade_date in data.index:
+            try:
+                loc = data.index.get_loc(trade_date)
+                if loc > 0:
+                    data.iloc[loc, volume_index] = data.iloc[loc - 1]['Volume']
+            except Exception:
+                continue
+    return data
+
+
+def _bars(index):
+    return pd.DataFrame({"Close": 1.0, "Volume": np.arange(1, len(index) + 1, dtype=float)}, index=index)
+
+
+@pytest.mark.parametrize("cls", [StockData, StockDataNew])
+@pytest.mark.parametrize("tz", [None, "America/New_York"])
+def test_daily_bars_match_the_loop(cls, tz):
+    sd = cls(max_cache_mb=None)
+    df = _bars(pd.bdate_range("2023-01-02", "2027-01-05", tz=tz))
+    adjusted = sd._adjust_rebalance_volume(df.copy())
+    if cls is StockDataNew and tz is not None:
+        # A naive Timestamp never matched a tz-aware index: the loop adjusted nothing
+        assert _loop_adjust(sd, df.copy(), timestamps=True)["Volume"].equals(df["Volume"])
+    else:
+        pd.testing.assert_frame_equal(adjusted, _loop_adjust(sd, df.copy(), timestamps=cls is StockDataNew))
+    # June 2023-2026 and November 2026
+    assert (adjusted["Volume"] != df["Volume"]).sum() == 5
+    assert adjusted.loc["2024-06-28", "Volume"].item() == df.loc["2024-06-27", "Volume"].item()
+
+
+def test_time_stamped_and_intraday_bars():
+    sd = StockData(max_cache_mb=None)
+    # Daily bars stamped at the close: the loop skipped them, now matched by calendar date
+    df = _bars(pd.bdate_range("2024-06-24", "2024-07-03") + pd.Timedelta(hours=16))
+    adjusted = sd._adjust_rebalance_volume(df.copy())
+    changed = adjusted.index[adjusted["Volume"] != df["Volume"]]
+    assert list(changed) == [pd.Timestamp("2024-06-28 16:00")]
+    assert _loop_adjust(sd, df.copy())["Volume"].equals(df["Volume"])
+
+    # Several bars per day: left unchanged, as before
+    hourly = _bars(pd.date_range("2024-06-27", "2024-07-01", freq="h"))
+    assert sd._adjust_rebalance_volume(hourly.copy())["Volume"].equals(hourly["Volume"])